@@ -3,6 +3,7 @@ from typing import List, Optional, Dict, Any
 import json
 
 from .config import settings
+from .openai_client import openai_client
 
 
 async def generate_questions(track: Optional[str], size: int, level: Optional[str] = None) -> List[Dict[str, Any]]:
@@ -296,15 +297,6 @@ Rules:
         return []
 
     try:
-        # Lazy import so the package is optional
-        try:
-            from openai import OpenAI
-        except Exception:
-            # If SDK is not installed, skip generation gracefully
-            return []
-
-        client = OpenAI(api_key=settings.OPENAI_API_KEY)
-
         system = (
             "You are a German language quiz generator. "
             "Generate multiple-choice questions with exactly one correct answer. "
@@ -326,17 +318,16 @@ Rules:
         }
         prompt = f"System:\n{system}\nUser:\n{json.dumps(user)}"
 
-        # Use responses API if available; otherwise fallback to chat.completions
+        # Skips generation gracefully if the SDK is not installed or the call fails
         try:
-            resp = client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
+            content = await openai_client.chat(
+                [
                     {"role": "system", "content": system},
                     {"role": "user", "content": json.dumps(user)},
                 ],
+                model="gpt-4o-mini",
                 temperature=0.7,
-            )
-            content = resp.choices[0].message.content or "[]"
+            ) or "[]"
         except Exception:
             return []
 
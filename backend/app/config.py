@@ -10,6 +10,8 @@ class Settings(BaseSettings):
     MONGODB_DB_NAME: str | None = None
     JWT_SECRET: str
     OPENAI_API_KEY: str | None = None
+    OPENAI_TIMEOUT: int = 60
+    OPENAI_MAX_CONCURRENCY: int = 4  # OpenAI fallback requests in flight per worker
     ALLOW_SPEECH_FEATURE: bool = True
     ENABLE_AI_QUIZ_TOPUP: bool = False
     DEV_MODE: bool = False
@@ -32,6 +34,19 @@ class Settings(BaseSettings):
     OLLAMA_TIMEOUT: int = 120
     OLLAMA_TEMPERATURE: float = 0.7
     OLLAMA_MAX_TOKENS: int = 2048
+    OLLAMA_MAX_CONNECTIONS: int = 8  # Shared HTTP pool size for all Ollama calls
+    OLLAMA_MAX_CONCURRENCY: int = 4  # Requests admitted to Ollama at once (match OLLAMA_NUM_PARALLEL)
+    GRAMMAR_CACHE_TTL: int = 604800  # 7 days
+    QUIZ_BANK_TARGET: int = 40  # Questions kept per topic/level bucket
+    QUIZ_PREFILL_BATCH: int = 10  # Questions requested per generation call
+    QUIZ_PREFILL_INTERVAL: int = 600  # Seconds between bank sweeps
+    VOCAB_POOL_SIZE: int = 60  # Daily words generated per level (3x the largest batch)
+    VOCAB_POOL_WARMUP_LEAD: int = 3600  # Build tomorrow's pools this many seconds before midnight UTC
+    USER_CONTEXT_TTL: int = 300  # Redis copy of a user's journey/tier/role
+    USER_CONTEXT_LOCAL_TTL: int = 5  # In-process copy; bounds staleness on other workers after invalidation
+    LOOP_LAG_WARN_MS: int = 100  # Log when the event loop is blocked longer than this
+    CONVERSATION_ARCHIVE_AFTER: int = 200  # Archive older scenario messages once a document holds this many
+    CONVERSATION_MESSAGES_KEPT: int = 50  # Most recent messages left in the document after archiving
     
     # Voice Pipeline Configuration
     WHISPER_HOST: str = "http://whisper:9000"
@@ -46,6 +61,7 @@ class Settings(BaseSettings):
     ENABLE_AI_CONVERSATION: bool = False
     ENABLE_VOICE_FEATURES: bool = False
     ENABLE_LIFE_SIMULATION: bool = False
+    ENABLE_RATE_LIMITING: bool = False  # Per-tier GCRA limits in Redis (local buckets if Redis is down)
     
     # Stripe Configuration (Payment Processing)
     STRIPE_SECRET_KEY: str | None = None
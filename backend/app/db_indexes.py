@@ -47,6 +47,11 @@ async def create_indexes():
     await db.conversation_states.create_index("created_at")
     await db.conversation_states.create_index("updated_at")
     
+    # Archived scenario messages (chunks of old messages per conversation)
+    print("Creating indexes for 'conversation_message_archive' collection...")
+    await db.conversation_message_archive.create_index([("conversation_id", 1), ("start", 1)], unique=True)
+    await db.conversation_message_archive.create_index("user_id")
+    
     # Vocabulary collection
     print("Creating indexes for 'vocabulary' collection...")
     await db.vocabulary.create_index("german")
@@ -54,11 +59,32 @@ async def create_indexes():
     await db.vocabulary.create_index("category")
     await db.vocabulary.create_index([("level", 1), ("category", 1)])
     
+    # User vocabulary (learned words); (user_id, word) serves daily-word exclusion
+    print("Creating indexes for 'user_vocab' collection...")
+    await db.user_vocab.create_index([("user_id", 1), ("word", 1)])
+    await db.user_vocab.create_index([("user_id", 1), ("ts", -1)])
+    
+    # Seed words
+    print("Creating indexes for 'seed_words' collection...")
+    await db.seed_words.create_index([("level", 1), ("word", 1)])
+    
+    # AI vocabulary cache (daily pools)
+    print("Creating indexes for 'ai_vocab_cache' collection...")
+    await db.ai_vocab_cache.create_index("cache_key", unique=True)
+    await db.ai_vocab_cache.create_index("expires_at", expireAfterSeconds=0)
+    
     # Quiz questions collection
     print("Creating indexes for 'quiz_questions' collection...")
     await db.quiz_questions.create_index("topic")
     await db.quiz_questions.create_index("level")
     await db.quiz_questions.create_index([("topic", 1), ("level", 1)])
+    await db.quiz_questions.create_index(
+        [("level", 1), ("type", 1), ("hash", 1)],
+        unique=True,
+        partialFilterExpression={"hash": {"$exists": True}}
+    )
+    await db.quiz_questions.create_index([("skills", 1), ("level", 1), ("type", 1), ("hash", 1)])
+    await db.quiz_questions.create_index([("skills", 1), ("level", 1), ("cached", 1), ("random_key", 1)])
     
     # User progress collection
     print("Creating indexes for 'user_progress' collection...")
@@ -69,9 +95,20 @@ async def create_indexes():
     # Review cards collection (Spaced Repetition)
     print("Creating indexes for 'review_cards' collection...")
     await db.review_cards.create_index("user_id")
-    await db.review_cards.create_index("next_review")
-    await db.review_cards.create_index([("user_id", 1), ("next_review", 1)])
     await db.review_cards.create_index([("user_id", 1), ("status", 1)])
+    await db.review_cards.create_index([("user_id", 1), ("card_id", 1)])
+    # Range-only next_review_date queries (workload forecast, due counts)
+    await db.review_cards.create_index([
+        ("user_id", 1),
+        ("next_review_date", 1),
+        ("repetitions", 1)
+    ])
+    # Due queue in equality-sort-range order: walks DUE_SORT without an in-memory sort
+    await db.review_cards.create_index([
+        ("user_id", 1),
+        ("repetitions", 1),
+        ("next_review_date", 1)
+    ])
     
     # Achievements collection
     print("Creating indexes for 'achievements' collection...")
@@ -81,10 +118,24 @@ async def create_indexes():
     # User achievements collection
     print("Creating indexes for 'user_achievements' collection...")
     await db.user_achievements.create_index("user_id")
-    await db.user_achievements.create_index("achievement_id")
-    await db.user_achievements.create_index([("user_id", 1), ("achievement_id", 1)], unique=True)
+    await db.user_achievements.create_index([("user_id", 1), ("achievement_code", 1)], unique=True)
     await db.user_achievements.create_index("unlocked_at")
     
+    # User stats collection (one document per user, updated on every XP event)
+    print("Creating indexes for 'user_stats' collection...")
+    await db.user_stats.create_index("user_id", unique=True)
+    
+    # Gamification levels (one document per user, fed by the XP ledger)
+    print("Creating indexes for 'user_levels' collection...")
+    await db.user_levels.create_index("user_id", unique=True)
+    
+    # XP ledger: pending claims in insert order, abandoned batches, retention of applied events
+    print("Creating indexes for 'xp_ledger' collection...")
+    await db.xp_ledger.create_index([("batch_id", 1), ("_id", 1)])
+    await db.xp_ledger.create_index([("applied_at", 1), ("locked_until", 1)])
+    await db.xp_ledger.create_index("applied_at", expireAfterSeconds=7 * 24 * 3600)
+    await db.xp_ledger_leases.create_index("locked_until", expireAfterSeconds=3600)
+    
     # Organizations collection
     print("Creating indexes for 'organizations' collection...")
     await db.organizations.create_index("slug", unique=True)
@@ -117,6 +168,9 @@ async def create_indexes():
     await db.webhook_deliveries.create_index("status")
     await db.webhook_deliveries.create_index("created_at")
     await db.webhook_deliveries.create_index([("webhook_id", 1), ("created_at", -1)])
+    # Delivery queue: due pending deliveries, and this worker's leased batch
+    await db.webhook_deliveries.create_index([("status", 1), ("next_retry_at", 1)])
+    await db.webhook_deliveries.create_index([("lease_owner", 1), ("locked_until", 1)])
     
     # Audit logs collection
     print("Creating indexes for 'audit_logs' collection...")
@@ -148,6 +202,15 @@ async def create_indexes():
     await db.conversion_events.create_index([("event_type", 1), ("created_at", -1)])
     await db.conversion_events.create_index([("source", 1), ("event_type", 1)])
     
+    # Marketing rollup buckets (hour/day/total, one doc per metric + dimensions)
+    print("Creating indexes for 'marketing_rollups' collection...")
+    await db.marketing_rollups.create_index(
+        [("granularity", 1), ("bucket", 1), ("metric", 1), ("event_type", 1),
+         ("source", 1), ("tier", 1), ("test_id", 1), ("variant", 1)],
+        unique=True
+    )
+    await db.marketing_rollups.create_index([("metric", 1), ("granularity", 1), ("bucket", 1)])
+    
     # Invoices collection
     print("Creating indexes for 'invoices' collection...")
     await db.invoices.create_index("user_id")
@@ -184,7 +247,7 @@ async def create_indexes():
     # Review cards due today
     await db.review_cards.create_index([
         ("user_id", 1),
-        ("next_review", 1),
+        ("next_review_date", 1),
         ("status", 1)
     ])
     
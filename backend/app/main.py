@@ -6,10 +6,23 @@ from .routers import auth, vocab, grammar, quiz, progress, speech, quiz_v2, para
 from .routers import users, ai_conversation, scenarios, analytics, reviews, achievements, grammar_rules, payments
 from .routers import grammar_exercises, writing_practice, reading_practice, organizations, api_keys, webhooks, admin_dashboard, gdpr, referrals, marketing_analytics, gamification, friends, leaderboard, learning_paths, integrated_learning, websocket, journeys
 from .startup import seed_collections
+from .db import get_db
+from .services.leaderboard_service import LeaderboardService
+from .services.webhook_worker import webhook_worker
+from .services.xp_ledger import xp_ledger_writer
+from .services.mail_queue import mail_queue
+from .services.question_bank import question_bank_prefiller
+from .services.vocab_ai_service import daily_vocab_warmer
+from .services.vocab_search import get_vocab_search_index
+from .services.loop_lag import loop_lag_probe
+from .services.metrics import metrics, system_sampler
+from .middleware.rate_limit import RateLimitMiddleware
+from .middleware.metrics import MetricsMiddleware
 from .redis_client import redis_client
 from .ollama_client import ollama_client
 from .whisper_client import whisper_client
 from .piper_client import piper_client
+from .openai_client import openai_client
 from contextlib import asynccontextmanager
 import logging
 
@@ -20,9 +33,16 @@ async def lifespan(app: FastAPI):
     # Startup tasks
     logger.info("🚀 Starting German AI Backend...")
     
+    # Watch for anything blocking the event loop
+    loop_lag_probe.start()
+    
     # Initialize Redis
     await redis_client.connect()
     
+    # Flush request/AI metrics to Redis and sample system figures in the background
+    await metrics.start(redis_client)
+    system_sampler.start()
+    
     # Initialize Ollama
     await ollama_client.initialize()
     
@@ -51,13 +71,47 @@ async def lifespan(app: FastAPI):
     # Seed database collections
     await seed_collections()
     
+    # Build the in-memory vocabulary search index
+    try:
+        index = await get_vocab_search_index(await get_db())
+        logger.info(f"🔎 Vocab search index ready ({len(index)} words)")
+    except Exception as e:
+        logger.warning(f"⚠️  Vocab search index warm-up failed (will build on first search): {e}")
+    
+    # Populate Redis leaderboards if they start empty
+    await LeaderboardService(await get_db()).ensure_boards()
+    
+    # Deliver queued webhooks in the background
+    await webhook_worker.start(await get_db())
+    
+    # Apply queued XP ledger events as batched $inc writes
+    await xp_ledger_writer.start(await get_db())
+    
+    # Send outbound email over pooled SMTP sessions
+    await mail_queue.start(await get_db())
+    
+    # Keep the quiz question bank stocked
+    await question_bank_prefiller.start(await get_db())
+    
+    # Pre-generate daily vocabulary pools before midnight UTC
+    await daily_vocab_warmer.start(await get_db())
+    
     logger.info("✅ Backend startup complete")
     
     yield
     
     # Shutdown tasks
     logger.info("🛑 Shutting down...")
+    await webhook_worker.stop()
+    await xp_ledger_writer.stop()
+    await mail_queue.stop()
+    await question_bank_prefiller.stop()
+    await daily_vocab_warmer.stop()
+    await openai_client.close()
+    await system_sampler.stop()
+    await metrics.stop()
     await redis_client.disconnect()
+    await loop_lag_probe.stop()
 
 app = FastAPI(
     title="German AI Learner API", 
@@ -77,6 +131,12 @@ cors_origins = [
 if getattr(settings, "FRONTEND_ORIGIN", None):
     cors_origins.append(settings.FRONTEND_ORIGIN)
 
+# Added before CORS so CORS stays outermost (429s keep their CORS headers)
+if settings.ENABLE_RATE_LIMITING:
+    app.add_middleware(RateLimitMiddleware, redis_client=redis_client)
+
+app.add_middleware(MetricsMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=cors_origins,
@@ -0,0 +1,47 @@
+"""
+Request metrics middleware
+
+Pure ASGI: records one latency observation and one request count per
+HTTP request into the in-process registry. Requests are labelled with the
+matched route template ("/api/v1/vocab/{word_id}") rather than the raw
+path, so label cardinality stays bounded.
+"""
+import time
+
+from ..services.metrics import metrics
+
+
+class MetricsMiddleware:
+    """Per-endpoint request counters and latency histograms"""
+
+    def __init__(self, app, registry=metrics):
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = {"code": 500}
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            endpoint = getattr(route, "path", None) or "unmatched"
+            method = scope["method"]
+            self.registry.observe(
+                "http_request_duration_seconds", time.perf_counter() - start,
+                method=method, route=endpoint
+            )
+            self.registry.inc(
+                "http_requests_total",
+                method=method, route=endpoint, status=f"{status['code'] // 100}xx"
+            )
@@ -1,156 +1,184 @@
 """
 Rate Limiting Middleware
 Redis-based rate limiting for API endpoints
+
+Pure ASGI middleware (no BaseHTTPMiddleware, so streaming responses pass
+through untouched). Limits are enforced with GCRA, a token bucket stored as
+one "theoretical arrival time" per caller: the check, the decrement and the
+remaining count come from a single EVALSHA. If Redis is unreachable the
+limiter fails open onto an in-process bucket with the same semantics.
 """
-from fastapi import Request, HTTPException, status
-from starlette.middleware.base import BaseHTTPMiddleware
-from datetime import datetime, timedelta
 import hashlib
-from typing import Optional
+import json
+import logging
+import math
+import time
+from typing import Dict, Tuple
+
+import jwt
+
+from ..config import settings
+from ..db import get_db
+from ..services.user_context import get_user_context
+
+logger = logging.getLogger(__name__)
+
+# Requests per window for each tier
+TIER_LIMITS = {
+    "free": 100,
+    "premium": 1000,
+    "plus": 5000,
+    "enterprise": 10000
+}
+API_KEY_LIMIT = 1000
+ANONYMOUS_LIMIT = 50  # Strict limit for unauthenticated requests
+WINDOW_SECONDS = 3600
+
+SKIP_PREFIXES = ("/docs", "/redoc", "/openapi.json", "/health")
+LOCAL_BUCKETS_MAX = 50000
+
+# KEYS[1] = bucket key; ARGV[1] = emission interval (ms), ARGV[2] = burst (ms)
+# Returns {allowed, remaining, retry_after_ms, reset_ms}
+GCRA_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local interval = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local tat = tonumber(redis.call('GET', KEYS[1]) or now)
+if tat < now then
+    tat = now
+end
+local new_tat = tat + interval
+local allow_at = new_tat - burst
+if allow_at > now then
+    return {0, 0, allow_at - now, tat - now}
+end
+redis.call('SET', KEYS[1], new_tat, 'PX', new_tat - now)
+return {1, math.floor((now + burst - new_tat) / interval), 0, new_tat - now}
+"""
+
+
+def _bucket_params(limit: int) -> Tuple[int, int]:
+    """(emission interval, burst tolerance) in ms for `limit` requests per window"""
+    interval = max(1, math.ceil(WINDOW_SECONDS * 1000 / limit))
+    return interval, interval * limit
+
+
+class LocalRateLimiter:
+    """In-process GCRA buckets, used while Redis is unreachable"""
+
+    def __init__(self, max_buckets: int = LOCAL_BUCKETS_MAX):
+        self.max_buckets = max_buckets
+        self._tat: Dict[str, int] = {}
+
+    def hit(self, key: str, limit: int) -> Tuple[bool, int, int, int]:
+        interval, burst = _bucket_params(limit)
+        now = int(time.time() * 1000)
+        tat = max(self._tat.get(key, now), now)
+        new_tat = tat + interval
+        allow_at = new_tat - burst
+        if allow_at > now:
+            return False, 0, allow_at - now, tat - now
+        if key not in self._tat and len(self._tat) >= self.max_buckets:
+            # Drop buckets that have fully refilled; they carry no state
+            self._tat = {k: v for k, v in self._tat.items() if v > now}
+        self._tat[key] = new_tat
+        return True, (now + burst - new_tat) // interval, 0, new_tat - now
 
 
-class RateLimitMiddleware(BaseHTTPMiddleware):
+class RateLimitMiddleware:
     """Rate limiting middleware using Redis"""
-    
+
     def __init__(self, app, redis_client):
-        super().__init__(app)
+        self.app = app
         self.redis = redis_client
-        
-        # Default rate limits (requests per hour)
-        self.default_limits = {
-            "free": 100,
-            "premium": 1000,
-            "plus": 5000,
-            "enterprise": 10000
-        }
-    
-    async def dispatch(self, request: Request, call_next):
-        # Skip rate limiting for certain paths
-        skip_paths = ["/docs", "/redoc", "/openapi.json", "/health", "/"]
-        if any(request.url.path.startswith(path) for path in skip_paths):
-            return await call_next(request)
-        
-        # Get identifier (API key or user ID)
-        identifier = await self._get_identifier(request)
-        if not identifier:
-            # No authentication, use IP-based rate limiting
-            identifier = f"ip:{request.client.host}"
-            rate_limit = 50  # Strict limit for unauthenticated requests
-        else:
-            # Get rate limit based on organization tier
-            rate_limit = await self._get_rate_limit(identifier, request)
-        
-        # Check rate limit
-        allowed = await self._check_rate_limit(identifier, rate_limit)
-        
+        self.local = LocalRateLimiter()
+        self._script = None
+        self._script_client = None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or self._skip(scope["path"]):
+            await self.app(scope, receive, send)
+            return
+
+        identifier, limit = await self._resolve(scope)
+        allowed, remaining, retry_after_ms, reset_ms = await self._hit(f"rate_limit:{identifier}", limit)
+        reset_at = int(time.time() + reset_ms / 1000)
+        headers = [
+            (b"x-ratelimit-limit", str(limit).encode()),
+            (b"x-ratelimit-remaining", str(remaining).encode()),
+            (b"x-ratelimit-reset", str(reset_at).encode()),
+        ]
+
         if not allowed:
-            raise HTTPException(
-                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-                detail="Rate limit exceeded. Please try again later.",
-                headers={
-                    "X-RateLimit-Limit": str(rate_limit),
-                    "X-RateLimit-Remaining": "0",
-                    "X-RateLimit-Reset": str(int((datetime.utcnow() + timedelta(hours=1)).timestamp()))
-                }
-            )
-        
-        # Get remaining requests
-        remaining = await self._get_remaining(identifier, rate_limit)
-        
-        # Process request
-        response = await call_next(request)
-        
-        # Add rate limit headers
-        response.headers["X-RateLimit-Limit"] = str(rate_limit)
-        response.headers["X-RateLimit-Remaining"] = str(remaining)
-        response.headers["X-RateLimit-Reset"] = str(int((datetime.utcnow() + timedelta(hours=1)).timestamp()))
-        
-        return response
-    
-    async def _get_identifier(self, request: Request) -> Optional[str]:
-        """Get identifier from request (API key or user ID)"""
-        # Check for API key
-        api_key = request.headers.get("X-API-Key")
+            body = json.dumps({"detail": "Rate limit exceeded. Please try again later."}).encode()
+            await send({
+                "type": "http.response.start",
+                "status": 429,
+                "headers": headers + [
+                    (b"retry-after", str(math.ceil(retry_after_ms / 1000)).encode()),
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                ],
+            })
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + headers
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
+
+    @staticmethod
+    def _skip(path: str) -> bool:
+        return path == "/" or path.startswith(SKIP_PREFIXES)
+
+    async def _resolve(self, scope) -> Tuple[str, int]:
+        """(identifier, limit) from the API key, the JWT subject's tier, or the client IP"""
+        headers = dict(scope.get("headers") or [])
+        api_key = headers.get(b"x-api-key")
         if api_key:
-            # Hash API key for Redis key
-            key_hash = hashlib.sha256(api_key.encode()).hexdigest()
-            return f"api_key:{key_hash}"
-        
-        # Check for JWT token
-        auth_header = request.headers.get("Authorization")
-        if auth_header and auth_header.startswith("Bearer "):
-            token = auth_header.split(" ")[1]
-            # In production, decode JWT to get user ID
-            # For now, use token hash
-            token_hash = hashlib.sha256(token.encode()).hexdigest()
-            return f"user:{token_hash}"
-        
-        return None
-    
-    async def _get_rate_limit(self, identifier: str, request: Request) -> int:
-        """Get rate limit for identifier"""
-        # If API key, get from database
-        if identifier.startswith("api_key:"):
-            # In production, query database for API key rate limit
-            # For now, return default
-            return 1000
-        
-        # If user, get organization tier
-        if identifier.startswith("user:"):
-            # In production, query database for user's organization tier
-            # For now, return default
-            return 100
-        
-        # IP-based
-        return 50
-    
-    async def _check_rate_limit(self, identifier: str, limit: int) -> bool:
-        """Check if identifier has exceeded rate limit"""
-        if not self.redis or not self.redis.is_connected:
-            # If Redis is not available, allow request (fail open)
-            return True
-        
+            return f"api_key:{hashlib.sha256(api_key).hexdigest()}", API_KEY_LIMIT
+
+        auth_header = headers.get(b"authorization", b"").decode("latin-1")
+        if auth_header.startswith("Bearer "):
+            try:
+                payload = jwt.decode(auth_header[7:], settings.JWT_SECRET, algorithms=["HS256"])
+                user_id = payload["sub"]
+            except (jwt.InvalidTokenError, KeyError):
+                user_id = None
+            if user_id:
+                return f"user:{user_id}", await self._user_limit(user_id)
+
+        client = scope.get("client")
+        return f"ip:{client[0] if client else 'unknown'}", ANONYMOUS_LIMIT
+
+    async def _user_limit(self, user_id: str) -> int:
         try:
-            # Get current count
-            key = f"rate_limit:{identifier}"
-            current = await self.redis.get(key)
-            
-            if current is None:
-                # First request in this window
-                await self.redis.setex(key, 3600, 1)  # 1 hour TTL
-                return True
-            
-            current = int(current)
-            if current >= limit:
-                return False
-            
-            # Increment counter
-            await self.redis.incr(key)
-            return True
-        
+            context = await get_user_context(await get_db(), user_id)
         except Exception as e:
-            # If Redis fails, allow request (fail open)
-            print(f"Rate limit check failed: {e}")
-            return True
-    
-    async def _get_remaining(self, identifier: str, limit: int) -> int:
-        """Get remaining requests for identifier"""
-        if not self.redis or not self.redis.is_connected:
-            return limit
-        
-        try:
-            key = f"rate_limit:{identifier}"
-            current = await self.redis.get(key)
-            
-            if current is None:
-                return limit
-            
-            current = int(current)
-            remaining = max(0, limit - current)
-            return remaining
-        
-        except Exception:
-            return limit
+            logger.warning(f"Rate limit tier lookup failed: {e}")
+            context = None
+        tier = context["tier"] if context else "free"
+        return TIER_LIMITS.get(tier, TIER_LIMITS["free"])
+
+    async def _hit(self, key: str, limit: int) -> Tuple[bool, int, int, int]:
+        """(allowed, remaining, retry_after_ms, reset_ms)"""
+        client = self.redis.client if self.redis else None
+        if client is not None:
+            if self._script_client is not client:
+                # register_script runs EVALSHA and reloads the script on NOSCRIPT
+                self._script = client.register_script(GCRA_SCRIPT)
+                self._script_client = client
+            interval, burst = _bucket_params(limit)
+            try:
+                allowed, remaining, retry_after_ms, reset_ms = await self._script(keys=[key], args=[interval, burst])
+                return bool(allowed), int(remaining), int(retry_after_ms), int(reset_ms)
+            except Exception as e:
+                logger.warning(f"Rate limit check failed, using local bucket: {e}")
+        return self.local.hit(key, limit)
 
 
 # Decorator for endpoint-specific rate limiting
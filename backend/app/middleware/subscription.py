@@ -8,6 +8,7 @@ from typing import Callable, Optional
 from ..db import get_db
 from ..security import get_current_user_id, decode_jwt, security_scheme
 from ..models.subscription import SubscriptionTier, get_tier_features
+from ..services.user_context import get_user_context
 
 
 async def get_user_subscription_tier(
@@ -15,10 +16,12 @@ async def get_user_subscription_tier(
     db = Depends(get_db)
 ) -> SubscriptionTier:
     """Get user's current subscription tier"""
-    subscription = await db["subscriptions"].find_one({"user_id": user_id})
-    if not subscription:
-        return SubscriptionTier.FREE
-    return SubscriptionTier(subscription.get("tier", "free"))
+    return await _current_tier(db, user_id)
+
+
+async def _current_tier(db, user_id: str) -> SubscriptionTier:
+    context = await get_user_context(db, user_id)
+    return SubscriptionTier(context["tier"]) if context else SubscriptionTier.FREE
 
 
 async def check_subscription_tier(
@@ -27,11 +30,7 @@ async def check_subscription_tier(
     db = Depends(get_db)
 ) -> bool:
     """Check if user has required subscription tier"""
-    subscription = await db["subscriptions"].find_one({"user_id": user_id})
-    if not subscription:
-        current_tier = SubscriptionTier.FREE
-    else:
-        current_tier = SubscriptionTier(subscription.get("tier", "free"))
+    current_tier = await _current_tier(db, user_id)
     
     # Tier hierarchy: FREE < PREMIUM < PLUS < ENTERPRISE
     tier_levels = {
@@ -94,11 +93,7 @@ async def check_ai_usage_limit(
     from datetime import datetime
     
     # Get subscription tier
-    subscription = await db["subscriptions"].find_one({"user_id": user_id})
-    if not subscription:
-        tier = SubscriptionTier.FREE
-    else:
-        tier = SubscriptionTier(subscription.get("tier", "free"))
+    tier = await _current_tier(db, user_id)
     
     features = get_tier_features(tier)
     
@@ -128,11 +123,7 @@ async def check_scenario_limit(
     from datetime import datetime
     
     # Get subscription tier
-    subscription = await db["subscriptions"].find_one({"user_id": user_id})
-    if not subscription:
-        tier = SubscriptionTier.FREE
-    else:
-        tier = SubscriptionTier(subscription.get("tier", "free"))
+    tier = await _current_tier(db, user_id)
     
     features = get_tier_features(tier)
     
@@ -160,8 +151,8 @@ async def require_ai_access(
 ):
     """Require AI access (check usage limits)"""
     # Check if user is admin - admins have unlimited access
-    user = await db["users"].find_one({"_id": user_id})
-    if user and user.get("role") == "admin":
+    context = await get_user_context(db, user_id)
+    if context and context["role"] == "admin":
         return user_id
     
     can_use = await check_ai_usage_limit(user_id, db)
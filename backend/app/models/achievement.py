@@ -3,8 +3,10 @@ Achievement system for gamification
 Tracks user accomplishments and unlocks
 """
 
+from bisect import bisect_right
 from datetime import datetime
 from typing import List, Optional, Dict, Any
+import numpy as np
 from pydantic import BaseModel, Field
 from bson import ObjectId
 from enum import Enum
@@ -432,14 +434,46 @@ def calculate_xp_for_level(level: int) -> int:
     return int(100 * ((level - 1) ** 1.5))
 
 
+# Precomputed thresholds: LEVEL_XP_THRESHOLDS[i] is the XP needed for level i + 1.
+# 5000 levels covers ~3.5 * 10^7 XP; beyond that the closed-form inverse is used.
+MAX_TABLE_LEVEL = 5000
+LEVEL_XP_THRESHOLDS = [calculate_xp_for_level(level) for level in range(1, MAX_TABLE_LEVEL + 1)]
+_LEVEL_XP_THRESHOLDS_ARRAY = np.array(LEVEL_XP_THRESHOLDS, dtype=np.int64)
+
+
+def _level_from_xp_closed_form(xp: int) -> int:
+    """Invert 100 * (L - 1) ^ 1.5, then correct for the int() truncation"""
+    level = int((xp / 100) ** (2 / 3)) + 1
+    while calculate_xp_for_level(level + 1) <= xp:
+        level += 1
+    while level > 1 and calculate_xp_for_level(level) > xp:
+        level -= 1
+    return level
+
+
+def calculate_level(xp: int) -> int:
+    """Level reached with the given total XP"""
+    if xp < LEVEL_XP_THRESHOLDS[-1]:
+        return max(1, bisect_right(LEVEL_XP_THRESHOLDS, xp))
+    return _level_from_xp_closed_form(xp)
+
+
+def calculate_levels(xp_values) -> np.ndarray:
+    """Vectorized calculate_level for many XP totals at once"""
+    xp = np.asarray(xp_values, dtype=np.int64)
+    levels = np.maximum(np.searchsorted(_LEVEL_XP_THRESHOLDS_ARRAY, xp, side="right"), 1)
+    beyond = xp >= LEVEL_XP_THRESHOLDS[-1]
+    if beyond.any():
+        levels[beyond] = [_level_from_xp_closed_form(int(v)) for v in xp[beyond]]
+    return levels
+
+
 def get_level_from_xp(xp: int) -> tuple[int, int, int]:
     """
     Get level, current XP in level, and XP needed for next level
     Returns: (level, xp_in_current_level, xp_to_next_level)
     """
-    level = 1
-    while calculate_xp_for_level(level + 1) <= xp:
-        level += 1
+    level = calculate_level(xp)
     
     xp_for_current_level = calculate_xp_for_level(level)
     xp_for_next_level = calculate_xp_for_level(level + 1)
@@ -4,7 +4,7 @@ Conversation state model for tracking scenario progress
 
 from datetime import datetime
 from typing import List, Optional, Dict, Any
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr
 from bson import ObjectId
 
 
@@ -63,6 +63,11 @@ class Checkpoint(BaseModel):
     metadata: Dict[str, Any] = {}
 
 
+# Fields written with $inc / $push by ConversationState.build_update
+COUNTER_FIELDS = ("total_messages", "total_duration_seconds", "messages_archived")
+APPEND_FIELDS = ("grammar_corrections", "vocabulary_learned", "checkpoints")
+
+
 class ConversationState(BaseModel):
     """State of an ongoing scenario conversation"""
     id: Optional[PyObjectId] = Field(alias="_id", default=None)
@@ -76,8 +81,9 @@ class ConversationState(BaseModel):
     current_step: int = 0
     objectives_progress: List[ObjectiveProgress] = []
     
-    # Conversation history
+    # Conversation history (older messages move to conversation_message_archive)
     messages: List[Message] = []
+    messages_archived: int = 0  # Messages before messages[0] that live in the archive
     
     # Scoring
     score: int = 0
@@ -104,11 +110,67 @@ class ConversationState(BaseModel):
     total_messages: int = 0
     total_duration_seconds: int = 0
 
+    # What the stored document holds, for building delta updates
+    _persisted: Optional[Dict[str, Any]] = PrivateAttr(default=None)
+    _persisted_messages: int = PrivateAttr(default=0)
+
     class Config:
         populate_by_name = True
         arbitrary_types_allowed = True
         json_encoders = {ObjectId: str}
 
+    def _tracked(self) -> Dict[str, Any]:
+        # Everything except the message history, which is append-only
+        return self.dict(by_alias=True, exclude={"id", "messages"})
+
+    def mark_persisted(self) -> None:
+        """Record the current state as what the database document holds"""
+        self._persisted = self._tracked()
+        self._persisted_messages = len(self.messages)
+
+    @property
+    def new_messages(self) -> List[Message]:
+        return self.messages[self._persisted_messages:]
+
+    def build_update(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Update document for the changes since mark_persisted(): new messages
+        are $push-ed, counters $inc-ed, changed objective entries and other
+        fields $set. Without a baseline everything is $set.
+        """
+        if self._persisted is None:
+            return {"$set": self.dict(by_alias=True, exclude={"id"})}
+
+        set_fields: Dict[str, Any] = {}
+        inc_fields: Dict[str, int] = {}
+        push_fields: Dict[str, Any] = {}
+        for key, value in self._tracked().items():
+            old = self._persisted.get(key)
+            if old == value:
+                continue
+            if key in COUNTER_FIELDS and isinstance(old, int):
+                inc_fields[key] = value - old
+            elif key in APPEND_FIELDS and isinstance(old, list) and value[:len(old)] == old:
+                push_fields[key] = {"$each": value[len(old):]}
+            elif key == "objectives_progress" and isinstance(old, list) and len(old) == len(value):
+                for index, (before, after) in enumerate(zip(old, value)):
+                    if before != after:
+                        set_fields[f"objectives_progress.{index}"] = after
+            else:
+                set_fields[key] = value
+
+        if len(self.messages) < self._persisted_messages:
+            # History was rewritten in memory, not just appended to
+            set_fields["messages"] = [m.dict() for m in self.messages]
+        elif self.new_messages:
+            push_fields["messages"] = {"$each": [m.dict() for m in self.new_messages]}
+
+        update: Dict[str, Dict[str, Any]] = {}
+        for operator, fields in (("$set", set_fields), ("$inc", inc_fields), ("$push", push_fields)):
+            if fields:
+                update[operator] = fields
+        return update
+
 
 class ConversationStateResponse(BaseModel):
     """Response for conversation state"""
@@ -2,14 +2,157 @@
 Ollama client for self-hosted LLM integration
 """
 import ollama
-from typing import Optional, Dict, List, AsyncGenerator
+import httpx
+import asyncio
+import hashlib
+import heapq
+import itertools
+import json
+import time
+from contextlib import asynccontextmanager
+from enum import IntEnum
+from typing import Any, Awaitable, Callable, Optional, Dict, List, AsyncGenerator
 import logging
 from app.config import get_settings
 from app.environment import get_ollama_host, get_backend_info
+from app.redis_client import redis_client
+from app.services.metrics import metrics
 
 settings = get_settings()
 logger = logging.getLogger(__name__)
 
+class LLMPriority(IntEnum):
+    """Scheduling classes, lower value is admitted first"""
+    INTERACTIVE = 0  # live conversation turns
+    GRAMMAR = 1      # grammar checks a learner is waiting on
+    BACKGROUND = 2   # vocab / quiz / scenario generation, warm-up
+
+class LLMScheduler:
+    """
+    Admission control for Ollama requests
+    
+    At most max_concurrency requests run at once. When all slots are busy,
+    waiters are admitted by priority, then in arrival order. Identical
+    non-streaming requests that are already in flight are coalesced, so
+    concurrent callers share one model call.
+    """
+    
+    def __init__(self, max_concurrency: int):
+        self.max_concurrency = max(1, max_concurrency)
+        self._active = 0
+        self._waiters: List[tuple] = []  # heap of (priority, seq, future)
+        self._seq = itertools.count()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._stats = {
+            priority: {
+                "submitted": 0,
+                "coalesced": 0,
+                "completed": 0,
+                "failed": 0,
+                "wait_total": 0.0,
+                "wait_max": 0.0,
+            }
+            for priority in LLMPriority
+        }
+    
+    async def _acquire(self, priority: LLMPriority) -> float:
+        """Wait for a slot; returns the time spent queued in seconds"""
+        if self._active < self.max_concurrency and not self._waiters:
+            self._active += 1
+            return 0.0
+        
+        started = time.perf_counter()
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), future))
+        try:
+            await future
+        except asyncio.CancelledError:
+            # The slot was handed over just before cancellation; pass it on
+            if future.done() and not future.cancelled():
+                self._release()
+            raise
+        return time.perf_counter() - started
+    
+    def _release(self) -> None:
+        # Hand the slot straight to the next live waiter so it cannot be stolen
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                future.set_result(None)
+                return
+        self._active -= 1
+    
+    @asynccontextmanager
+    async def slot(self, priority: LLMPriority = LLMPriority.BACKGROUND):
+        """Hold one concurrency slot for the duration of the block"""
+        stats = self._stats[priority]
+        stats["submitted"] += 1
+        waited = await self._acquire(priority)
+        stats["wait_total"] += waited
+        stats["wait_max"] = max(stats["wait_max"], waited)
+        try:
+            yield
+            stats["completed"] += 1
+        except BaseException:
+            stats["failed"] += 1
+            raise
+        finally:
+            self._release()
+    
+    async def _execute(self, priority: LLMPriority, call: Callable[[], Awaitable[Any]]) -> Any:
+        async with self.slot(priority):
+            return await call()
+    
+    async def run(
+        self,
+        call: Callable[[], Awaitable[Any]],
+        priority: LLMPriority = LLMPriority.BACKGROUND,
+        key: Optional[str] = None
+    ) -> Any:
+        """
+        Run call() within a slot; callers passing the same key while it is in
+        flight get the same result
+        """
+        if key is None:
+            return await self._execute(priority, call)
+        
+        task = self._inflight.get(key)
+        if task is not None:
+            self._stats[priority]["coalesced"] += 1
+        else:
+            task = asyncio.ensure_future(self._execute(priority, call))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # Shielded so one caller disconnecting doesn't cancel the shared call
+        return await asyncio.shield(task)
+    
+    def metrics(self) -> Dict[str, Any]:
+        """Queue depth, concurrency and wait times per priority class"""
+        depth = {priority: 0 for priority in LLMPriority}
+        for priority, _, future in self._waiters:
+            if not future.done():
+                depth[priority] += 1
+        
+        classes = {}
+        for priority, stats in self._stats.items():
+            admitted = stats["submitted"] - depth[priority]
+            classes[priority.name.lower()] = {
+                "queued": depth[priority],
+                "submitted": stats["submitted"],
+                "coalesced": stats["coalesced"],
+                "completed": stats["completed"],
+                "failed": stats["failed"],
+                "avg_wait_ms": round(stats["wait_total"] / admitted * 1000, 2) if admitted else 0.0,
+                "max_wait_ms": round(stats["wait_max"] * 1000, 2),
+            }
+        return {
+            "max_concurrency": self.max_concurrency,
+            "active": self._active,
+            "queue_depth": sum(depth.values()),
+            "in_flight_keys": len(self._inflight),
+            "classes": classes,
+        }
+
 class OllamaClient:
     """Async Ollama client wrapper for German language learning"""
     
@@ -19,6 +162,7 @@ class OllamaClient:
         self.model = settings.OLLAMA_MODEL
         self.client = None
         self.is_available = False
+        self.scheduler = LLMScheduler(settings.OLLAMA_MAX_CONCURRENCY)
         
         # Log backend info
         backend_info = get_backend_info()
@@ -30,7 +174,15 @@ class OllamaClient:
     async def initialize(self):
         """Initialize Ollama client and check availability"""
         try:
-            self.client = ollama.AsyncClient(host=self.host)
+            # One pooled HTTP client shared by every caller in the process
+            self.client = ollama.AsyncClient(
+                host=self.host,
+                timeout=settings.OLLAMA_TIMEOUT,
+                limits=httpx.Limits(
+                    max_connections=settings.OLLAMA_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.OLLAMA_MAX_CONNECTIONS
+                )
+            )
             # Test connection by listing models
             models = await self.client.list()
             self.is_available = True
@@ -59,7 +211,10 @@ class OllamaClient:
         temperature: Optional[float] = None,
         max_tokens: Optional[int] = None,
         stream: bool = False,
-        keep_alive: str = "30m"
+        keep_alive: str = "30m",
+        model: Optional[str] = None,
+        options: Optional[Dict[str, Any]] = None,
+        priority: LLMPriority = LLMPriority.BACKGROUND
     ) -> Dict | AsyncGenerator:
         """
         Send chat request to Ollama
@@ -70,6 +225,10 @@ class OllamaClient:
             max_tokens: Maximum tokens to generate
             stream: Whether to stream the response
             keep_alive: How long to keep model in memory (e.g., "30m", "1h")
+            model: Model to use instead of the default OLLAMA_MODEL
+            options: Extra Ollama options (top_p, stop, num_ctx, ...)
+            priority: Scheduling class; interactive turns are admitted before
+                grammar checks, which are admitted before background generation
         
         Returns:
             Response dict or async generator for streaming
@@ -78,36 +237,52 @@ class OllamaClient:
             raise Exception("Ollama is not available")
         
         options = {
-            'temperature': temperature or settings.OLLAMA_TEMPERATURE,
+            'temperature': settings.OLLAMA_TEMPERATURE if temperature is None else temperature,
             'num_predict': max_tokens or settings.OLLAMA_MAX_TOKENS,
+            **(options or {}),
         }
+        model = model or self.model
         
         try:
             if stream:
-                return self._stream_chat(messages, options, keep_alive)
+                return self._stream_chat(messages, options, keep_alive, model, priority)
             else:
-                response = await self.client.chat(
-                    model=self.model,
-                    messages=messages,
-                    options=options,
-                    keep_alive=keep_alive
+                key = hashlib.sha256(json.dumps(
+                    [model, messages, options], sort_keys=True, ensure_ascii=False
+                ).encode()).hexdigest()
+                return await self.scheduler.run(
+                    lambda: self.client.chat(
+                        model=model,
+                        messages=messages,
+                        options=options,
+                        keep_alive=keep_alive
+                    ),
+                    priority=priority,
+                    key=key
                 )
-                return response
         except Exception as e:
             logger.error(f"Ollama chat error: {e}")
             raise
     
-    async def _stream_chat(self, messages: List[Dict], options: Dict, keep_alive: str = "30m") -> AsyncGenerator:
-        """Stream chat responses"""
+    async def _stream_chat(
+        self,
+        messages: List[Dict],
+        options: Dict,
+        keep_alive: str = "30m",
+        model: Optional[str] = None,
+        priority: LLMPriority = LLMPriority.BACKGROUND
+    ) -> AsyncGenerator:
+        """Stream chat responses, holding a scheduler slot until the stream ends"""
         try:
-            async for chunk in await self.client.chat(
-                model=self.model,
-                messages=messages,
-                options=options,
-                stream=True,
-                keep_alive=keep_alive
-            ):
-                yield chunk
+            async with self.scheduler.slot(priority):
+                async for chunk in await self.client.chat(
+                    model=model or self.model,
+                    messages=messages,
+                    options=options,
+                    stream=True,
+                    keep_alive=keep_alive
+                ):
+                    yield chunk
         except Exception as e:
             logger.error(f"Ollama streaming error: {e}")
             raise
@@ -116,7 +291,8 @@ class OllamaClient:
         self,
         prompt: str,
         system_prompt: Optional[str] = None,
-        cache_ttl: int = 3600
+        cache_ttl: int = 3600,
+        priority: LLMPriority = LLMPriority.BACKGROUND
     ) -> str:
         """
         Generate response with Redis caching
@@ -125,6 +301,7 @@ class OllamaClient:
             prompt: User prompt
             system_prompt: System instructions
             cache_ttl: Cache time-to-live in seconds
+            priority: Scheduling class for the model call on a cache miss
         
         Returns:
             Generated text
@@ -136,6 +313,7 @@ class OllamaClient:
         cached = await redis_client.get(cache_key)
         if cached:
             logger.info("✅ Cache hit for Ollama request")
+            metrics.inc("ai_cache_hits_total", source="ollama")
             return cached
         
         # Generate response
@@ -144,7 +322,7 @@ class OllamaClient:
             messages.append({"role": "system", "content": system_prompt})
         messages.append({"role": "user", "content": prompt})
         
-        response = await self.chat(messages)
+        response = await self.chat(messages, priority=priority)
         result = response.get('message', {}).get('content', '')
         
         # Cache the result
@@ -183,7 +361,9 @@ Be encouraging and educational."""
         prompt = f"Analyze this German sentence: '{sentence}'"
         
         try:
-            response = await self.generate_with_cache(prompt, system_prompt, cache_ttl=86400)
+            response = await self.generate_with_cache(
+                prompt, system_prompt, cache_ttl=86400, priority=LLMPriority.GRAMMAR
+            )
             
             # Try to parse JSON response
             try:
@@ -256,7 +436,7 @@ Guidelines:
         # Add current message
         messages.append({"role": "user", "content": user_message})
         
-        response = await self.chat(messages)
+        response = await self.chat(messages, priority=LLMPriority.INTERACTIVE)
         return response.get('message', {}).get('content', '')
     
     async def generate_scenario(
@@ -0,0 +1,83 @@
+"""
+OpenAI client for the cloud fallbacks (chat + Whisper transcription)
+
+One shared AsyncOpenAI instance, so fallback calls await the network
+instead of blocking the event loop, with a semaphore capping how many
+requests this worker sends to OpenAI at once. The openai package stays an
+optional dependency.
+"""
+import asyncio
+import io
+import logging
+from typing import Any, Dict, List, Optional
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class OpenAIUnavailable(RuntimeError):
+    """No API key configured or the openai package is not installed"""
+
+
+class OpenAIClient:
+    """Async OpenAI wrapper with a per-provider concurrency limit"""
+
+    def __init__(self):
+        self._client = None
+        self._semaphore = asyncio.Semaphore(settings.OPENAI_MAX_CONCURRENCY)
+
+    @property
+    def is_configured(self) -> bool:
+        return bool(settings.OPENAI_API_KEY)
+
+    def _get_client(self):
+        if not settings.OPENAI_API_KEY:
+            raise OpenAIUnavailable("OPENAI_API_KEY not configured")
+        if self._client is None:
+            try:
+                from openai import AsyncOpenAI
+            except Exception:
+                raise OpenAIUnavailable("openai package not installed in backend env")
+            self._client = AsyncOpenAI(
+                api_key=settings.OPENAI_API_KEY,
+                timeout=settings.OPENAI_TIMEOUT,
+                max_retries=1
+            )
+        return self._client
+
+    async def chat(
+        self,
+        messages: List[Dict[str, str]],
+        model: str = "gpt-4o-mini",
+        temperature: Optional[float] = None,
+        response_format: Optional[Dict[str, Any]] = None
+    ) -> str:
+        """Chat completion; returns the message content ('' if empty)"""
+        client = self._get_client()
+        kwargs: Dict[str, Any] = {"model": model, "messages": messages}
+        if temperature is not None:
+            kwargs["temperature"] = temperature
+        if response_format is not None:
+            kwargs["response_format"] = response_format
+        async with self._semaphore:
+            resp = await client.chat.completions.create(**kwargs)
+        return resp.choices[0].message.content or ""
+
+    async def transcribe(self, data: bytes, filename: str, language: str = "de", model: str = "whisper-1") -> str:
+        """Whisper transcription of an uploaded audio file"""
+        client = self._get_client()
+        audio_file = io.BytesIO(data)
+        audio_file.name = filename
+        async with self._semaphore:
+            resp = await client.audio.transcriptions.create(model=model, file=audio_file, language=language)
+        return (getattr(resp, "text", None) or "").strip()
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+
+
+# Global OpenAI client instance
+openai_client = OpenAIClient()
@@ -112,6 +112,41 @@ class RedisClient:
             logger.error(f"Failed to encode JSON: {e}")
             return False
     
+    async def hget_json(self, key: str, field: str) -> Optional[Any]:
+        """Get JSON value from a hash field"""
+        if not self.client:
+            return None
+        try:
+            value = await self.client.hget(key, field)
+            return json.loads(value) if value else None
+        except Exception as e:
+            logger.error(f"Redis HGET error: {e}")
+            return None
+    
+    async def hset_json(
+        self,
+        key: str,
+        field: str,
+        value: Any,
+        expire: Optional[int] = None
+    ) -> bool:
+        """
+        Set JSON value in a hash field. The expiration applies to the whole hash,
+        so related entries can be dropped together with a single delete().
+        """
+        if not self.client:
+            return False
+        try:
+            async with self.client.pipeline(transaction=False) as pipe:
+                pipe.hset(key, field, json.dumps(value))
+                if expire:
+                    pipe.expire(key, expire)
+                await pipe.execute()
+            return True
+        except Exception as e:
+            logger.error(f"Redis HSET error: {e}")
+            return False
+    
     async def increment(self, key: str, amount: int = 1) -> Optional[int]:
         """Increment counter"""
         if not self.client:
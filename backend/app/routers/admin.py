@@ -4,6 +4,9 @@ from ..startup import seed_collections, ensure_quiz_min
 from ..db import get_db
 import os, json
 from ..startup import SEED_DIR
+from ..services.grammar_rule_engine import bump_rules_version
+from ..services.vocab_search import bump_seed_words_version
+from ..openai_client import openai_client, OpenAIUnavailable
 from ..config import settings
 import csv
 import io
@@ -366,6 +369,8 @@ async def dev_cleanup_synthetic_words(db=Depends(get_db)):
     # Remove words like "das Wort12" that were created by previous synthetic top-up
     # Regex for exact pattern: starts with 'das Wort' followed by digits only
     res = await db["seed_words"].delete_many({"word": {"$regex": r"^das Wort\\d+$", "$options": "i"}})
+    if res.deleted_count:
+        await bump_seed_words_version(db)
     return {"deleted": res.deleted_count}
 
 @router.post("/dev/reset-seed-words")
@@ -382,6 +387,8 @@ async def dev_reset_seed_words(db=Depends(get_db)):
                 await db['seed_words'].insert_many(data)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to load seed words: {e}")
+    finally:
+        await bump_seed_words_version(db)
     count = await db['seed_words'].count_documents({})
     return {"status": "ok", "reloaded": count}
 
@@ -399,6 +406,8 @@ async def dev_reset_grammar_rules(db=Depends(get_db)):
                 await db['grammar_rules'].insert_many(data)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to load grammar rules: {e}")
+    finally:
+        await bump_rules_version(db)
     count = await db['grammar_rules'].count_documents({})
     return {"status": "ok", "reloaded": count}
 
@@ -471,6 +480,7 @@ async def dev_seed_random_real_words(count: int = 200, db=Depends(get_db)):
     } for it in unique[:count]]
     if docs:
         await db['seed_words'].insert_many(docs)
+    await bump_seed_words_version(db)
     return {"seeded": len(docs), "cap": len(unique)}
 
 @router.post("/dev/seed-ai-words")
@@ -482,11 +492,6 @@ async def dev_seed_ai_words(count: int = 500, level: str | None = None, db=Depen
     if count <= 0:
         raise HTTPException(status_code=400, detail="count must be > 0")
     try:
-        try:
-            from openai import OpenAI
-        except Exception:
-            raise HTTPException(status_code=500, detail="openai package not installed in backend env")
-        client = OpenAI(api_key=settings.OPENAI_API_KEY)
         system = (
             "You are a German language content generator. Return strictly valid JSON."
         )
@@ -502,15 +507,17 @@ async def dev_seed_ai_words(count: int = 500, level: str | None = None, db=Depen
             "count": min(1000, int(count)),
             "schema": schema,
         }
-        resp = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": system},
-                {"role": "user", "content": json.dumps(user)},
-            ],
-            temperature=0.5,
-        )
-        content = resp.choices[0].message.content or "[]"
+        try:
+            content = await openai_client.chat(
+                [
+                    {"role": "system", "content": system},
+                    {"role": "user", "content": json.dumps(user)},
+                ],
+                model="gpt-4o-mini",
+                temperature=0.5,
+            ) or "[]"
+        except OpenAIUnavailable:
+            raise HTTPException(status_code=500, detail="openai package not installed in backend env")
         try:
             data = json.loads(content)
         except Exception:
@@ -545,6 +552,7 @@ async def dev_seed_ai_words(count: int = 500, level: str | None = None, db=Depen
             raise HTTPException(status_code=500, detail="No usable entries from AI")
         await db['seed_words'].delete_many({})
         await db['seed_words'].insert_many(docs)
+        await bump_seed_words_version(db)
         return {"seeded": len(docs)}
     except HTTPException:
         raise
@@ -585,6 +593,7 @@ async def dev_seed_from_file(filename: str = "word_bank_large.json", count: int
         raise HTTPException(status_code=400, detail="No valid entries in file")
     await db['seed_words'].delete_many({})
     await db['seed_words'].insert_many(docs)
+    await bump_seed_words_version(db)
     return {"seeded": len(docs), "file": filename}
 
 @router.post("/dev/seed-from-url")
@@ -653,5 +662,6 @@ def dev_seed_from_url(url: str, count: int = 500, db=Depends(get_db)):
     async def _write():
         await db['seed_words'].delete_many({})
         await db['seed_words'].insert_many(docs)
+        await bump_seed_words_version(db)
     anyio.run(_write)
     return {"seeded": len(docs), "source": url}
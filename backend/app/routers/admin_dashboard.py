@@ -3,14 +3,52 @@ Admin Dashboard Router
 Administrative functions for organization management
 """
 from fastapi import APIRouter, Depends, HTTPException, status
-from typing import List, Optional
+from typing import Any, Awaitable, Callable, Dict, List, Optional
 from datetime import datetime, timedelta
+from bson import ObjectId
 from ..db import get_db
+from ..redis_client import redis_client
 from ..routers.auth import get_current_user
 from pydantic import BaseModel
+import json
 
 router = APIRouter(prefix="/admin", tags=["Admin Dashboard"])
 
+# Dashboard responses are cached per organization in one Redis hash
+ADMIN_CACHE_TTL = 60
+
+
+def _admin_cache_key(organization_id: str) -> str:
+    return f"admin:dashboard:{organization_id}"
+
+
+async def _cached_response(
+    organization_id: str,
+    field: str,
+    build: Callable[[], Awaitable[Dict[str, Any]]]
+) -> Dict[str, Any]:
+    """Serve a dashboard response from the org cache, building it on a miss"""
+    cache_key = _admin_cache_key(organization_id)
+    cached = await redis_client.hget_json(cache_key, field)
+    if cached is not None:
+        return cached
+    
+    # ObjectIds / datetimes become strings, same as on a cache hit
+    response = json.loads(json.dumps(await build(), default=str))
+    await redis_client.hset_json(cache_key, field, response, expire=ADMIN_CACHE_TTL)
+    return response
+
+
+async def invalidate_admin_cache(organization_id: str) -> None:
+    await redis_client.delete(_admin_cache_key(organization_id))
+
+
+def _id_variants(ids: List[str]) -> List[Any]:
+    """Match user _ids stored either as ObjectId or as string"""
+    variants: List[Any] = list(ids)
+    variants.extend(ObjectId(i) for i in ids if ObjectId.is_valid(i))
+    return variants
+
 
 async def check_admin_access(organization_id: str, user_id: str, db) -> bool:
     """Check if user has admin access"""
@@ -40,47 +78,52 @@ async def list_all_users(
             detail="Admin access required"
         )
     
-    # Get organization members
-    members = await db["organization_members"].find({
-        "organization_id": organization_id
-    }).to_list(length=1000)
-    
-    user_ids = [m["user_id"] for m in members]
-    
-    # Build query
-    query = {"_id": {"$in": user_ids}}
-    if search:
-        query["$or"] = [
-            {"name": {"$regex": search, "$options": "i"}},
-            {"email": {"$regex": search, "$options": "i"}}
-        ]
-    
-    # Get users
-    users = await db["users"].find(query).skip(skip).limit(limit).to_list(length=limit)
-    total = await db["users"].count_documents(query)
-    
-    # Enrich with stats
-    enriched_users = []
-    for user in users:
-        user["_id"] = str(user["_id"])
+    async def build():
+        # Get organization members
+        members = await db["organization_members"].find(
+            {"organization_id": organization_id},
+            {"user_id": 1, "role": 1, "joined_at": 1}
+        ).to_list(length=1000)
+        members_by_user = {m["user_id"]: m for m in members}
         
-        # Get user stats
-        stats = await db["user_stats"].find_one({"user_id": str(user["_id"])})
-        user["stats"] = stats if stats else {}
+        # Build query
+        query = {"_id": {"$in": _id_variants(list(members_by_user))}}
+        if search:
+            query["$or"] = [
+                {"name": {"$regex": search, "$options": "i"}},
+                {"email": {"$regex": search, "$options": "i"}}
+            ]
         
-        # Get member info
-        member = next((m for m in members if m["user_id"] == str(user["_id"])), None)
-        user["role"] = member.get("role") if member else "viewer"
-        user["joined_at"] = member.get("joined_at") if member else None
+        # Get users
+        users = await db["users"].find(query, {"password_hash": 0}).skip(skip).limit(limit).to_list(length=limit)
+        total = await db["users"].count_documents(query)
         
-        enriched_users.append(user)
+        # Enrich with stats in one query
+        page_ids = [str(u["_id"]) for u in users]
+        stats_by_user = {
+            s["user_id"]: s
+            for s in await db["user_stats"].find({"user_id": {"$in": page_ids}}).to_list(length=len(page_ids))
+        }
+        
+        enriched_users = []
+        for user in users:
+            user["_id"] = str(user["_id"])
+            user["stats"] = stats_by_user.get(user["_id"], {})
+            
+            member = members_by_user.get(user["_id"])
+            user["role"] = member.get("role") if member else "viewer"
+            user["joined_at"] = member.get("joined_at") if member else None
+            
+            enriched_users.append(user)
+        
+        return {
+            "users": enriched_users,
+            "total": total,
+            "skip": skip,
+            "limit": limit
+        }
     
-    return {
-        "users": enriched_users,
-        "total": total,
-        "skip": skip,
-        "limit": limit
-    }
+    return await _cached_response(organization_id, f"users:{skip}:{limit}:{search or ''}", build)
 
 
 @router.get("/users/{target_user_id}")
@@ -177,6 +220,7 @@ async def update_user_role(
             detail="User not found in organization"
         )
     
+    await invalidate_admin_cache(organization_id)
     return {"message": "User role updated successfully"}
 
 
@@ -206,6 +250,7 @@ async def suspend_user(
             detail="User not found in organization"
         )
     
+    await invalidate_admin_cache(organization_id)
     return {"message": "User suspended successfully"}
 
 
@@ -224,32 +269,39 @@ async def list_scenarios_admin(
             detail="Admin access required"
         )
     
-    scenarios = await db["scenarios"].find().to_list(length=1000)
-    
-    # Get usage stats for each scenario
-    enriched_scenarios = []
-    for scenario in scenarios:
-        scenario["_id"] = str(scenario["_id"])
-        
-        # Count starts and completions
-        starts = await db["conversation_states"].count_documents({
-            "scenario_id": str(scenario["_id"])
-        })
-        
-        completions = await db["conversation_states"].count_documents({
-            "scenario_id": str(scenario["_id"]),
-            "status": "completed"
-        })
+    async def build():
+        scenarios = await db["scenarios"].find().to_list(length=1000)
         
-        scenario["stats"] = {
-            "starts": starts,
-            "completions": completions,
-            "completion_rate": (completions / starts * 100) if starts > 0 else 0
+        # Starts and completions for every scenario in one pass
+        usage = {
+            row["_id"]: row
+            for row in await db["conversation_states"].aggregate([
+                {"$group": {
+                    "_id": "$scenario_id",
+                    "starts": {"$sum": 1},
+                    "completions": {"$sum": {"$cond": [{"$eq": ["$status", "completed"]}, 1, 0]}}
+                }}
+            ]).to_list(length=None)
         }
         
-        enriched_scenarios.append(scenario)
+        enriched_scenarios = []
+        for scenario in scenarios:
+            scenario["_id"] = str(scenario["_id"])
+            row = usage.get(scenario["_id"], {})
+            starts = row.get("starts", 0)
+            completions = row.get("completions", 0)
+            
+            scenario["stats"] = {
+                "starts": starts,
+                "completions": completions,
+                "completion_rate": (completions / starts * 100) if starts > 0 else 0
+            }
+            
+            enriched_scenarios.append(scenario)
+        
+        return {"scenarios": enriched_scenarios, "total": len(enriched_scenarios)}
     
-    return {"scenarios": enriched_scenarios, "total": len(enriched_scenarios)}
+    return await _cached_response(organization_id, "scenarios", build)
 
 
 @router.get("/achievements")
@@ -265,25 +317,28 @@ async def list_achievements_admin(
             detail="Admin access required"
         )
     
-    achievements = await db["achievements"].find().to_list(length=1000)
-    
-    # Get unlock stats
-    enriched_achievements = []
-    for achievement in achievements:
-        achievement["_id"] = str(achievement["_id"])
+    async def build():
+        achievements = await db["achievements"].find().to_list(length=1000)
         
-        # Count unlocks
-        unlocks = await db["user_achievements"].count_documents({
-            "achievement_code": achievement.get("code")
-        })
-        
-        achievement["stats"] = {
-            "unlocks": unlocks
+        # Unlock counts for every achievement in one pass
+        unlocks = {
+            row["_id"]: row["unlocks"]
+            for row in await db["user_achievements"].aggregate([
+                {"$group": {"_id": "$achievement_code", "unlocks": {"$sum": 1}}}
+            ]).to_list(length=None)
         }
         
-        enriched_achievements.append(achievement)
+        enriched_achievements = []
+        for achievement in achievements:
+            achievement["_id"] = str(achievement["_id"])
+            achievement["stats"] = {
+                "unlocks": unlocks.get(achievement.get("code"), 0)
+            }
+            enriched_achievements.append(achievement)
+        
+        return {"achievements": enriched_achievements, "total": len(enriched_achievements)}
     
-    return {"achievements": enriched_achievements, "total": len(enriched_achievements)}
+    return await _cached_response(organization_id, "achievements", build)
 
 
 # Analytics
@@ -431,11 +486,17 @@ async def get_audit_logs(
         "organization_id": organization_id
     }).sort("created_at", -1).limit(limit).to_list(length=limit)
     
-    # Enrich with user names
+    # Enrich with user names in one query
+    log_user_ids = list({log["user_id"] for log in logs if log.get("user_id")})
+    names = {
+        str(u["_id"]): u.get("name")
+        for u in await db["users"].find(
+            {"_id": {"$in": _id_variants(log_user_ids)}}, {"name": 1}
+        ).to_list(length=None)
+    }
     for log in logs:
         log["_id"] = str(log["_id"])
-        user = await db["users"].find_one({"_id": log["user_id"]})
-        log["user_name"] = user.get("name") if user else "Unknown"
+        log["user_name"] = names.get(log.get("user_id")) or "Unknown"
     
     return {"logs": logs, "total": len(logs)}
 
@@ -455,35 +516,60 @@ async def get_user_engagement_report(
             detail="Admin access required"
         )
     
-    # Get member IDs
-    members = await db["organization_members"].find({
-        "organization_id": organization_id
-    }).to_list(length=1000)
-    user_ids = [m["user_id"] for m in members]
-    
-    # Engagement metrics per user
-    engagement = []
-    for uid in user_ids:
-        user = await db["users"].find_one({"_id": uid})
-        if not user:
-            continue
+    async def build():
+        # Get member IDs
+        members = await db["organization_members"].find(
+            {"organization_id": organization_id}, {"user_id": 1}
+        ).to_list(length=1000)
+        user_ids = [m["user_id"] for m in members]
         
-        # Get stats
-        scenarios = await db["conversation_states"].count_documents({"user_id": uid})
-        achievements = await db["user_achievements"].count_documents({"user_id": uid})
+        # One query per collection for all members, joined in Python
+        users = {
+            str(u["_id"]): u
+            for u in await db["users"].find(
+                {"_id": {"$in": _id_variants(user_ids)}}, {"name": 1}
+            ).to_list(length=None)
+        }
+        scenario_counts = {
+            row["_id"]: row["count"]
+            for row in await db["conversation_states"].aggregate([
+                {"$match": {"user_id": {"$in": user_ids}}},
+                {"$group": {"_id": "$user_id", "count": {"$sum": 1}}}
+            ]).to_list(length=None)
+        }
+        achievement_counts = {
+            row["_id"]: row["count"]
+            for row in await db["user_achievements"].aggregate([
+                {"$match": {"user_id": {"$in": user_ids}}},
+                {"$group": {"_id": "$user_id", "count": {"$sum": 1}}}
+            ]).to_list(length=None)
+        }
+        stats_by_user = {
+            s["user_id"]: s
+            for s in await db["user_stats"].find(
+                {"user_id": {"$in": user_ids}},
+                {"user_id": 1, "total_xp": 1, "current_streak": 1}
+            ).to_list(length=None)
+        }
         
-        stats = await db["user_stats"].find_one({"user_id": uid})
+        engagement = []
+        for uid in user_ids:
+            user = users.get(uid)
+            if not user:
+                continue
+            stats = stats_by_user.get(uid) or {}
+            engagement.append({
+                "user_id": uid,
+                "user_name": user.get("name", "Unknown"),
+                "scenarios_completed": scenario_counts.get(uid, 0),
+                "achievements_unlocked": achievement_counts.get(uid, 0),
+                "total_xp": stats.get("total_xp", 0),
+                "current_streak": stats.get("current_streak", 0)
+            })
         
-        engagement.append({
-            "user_id": uid,
-            "user_name": user.get("name", "Unknown"),
-            "scenarios_completed": scenarios,
-            "achievements_unlocked": achievements,
-            "total_xp": stats.get("total_xp", 0) if stats else 0,
-            "current_streak": stats.get("current_streak", 0) if stats else 0
-        })
-    
-    # Sort by XP
-    engagement.sort(key=lambda x: x["total_xp"], reverse=True)
-    
-    return {"engagement": engagement, "total_users": len(engagement)}
+        # Sort by XP
+        engagement.sort(key=lambda x: x["total_xp"], reverse=True)
+        
+        return {"engagement": engagement, "total_users": len(engagement)}
+    
+    return await _cached_response(organization_id, "engagement", build)
@@ -7,7 +7,7 @@ from pydantic import BaseModel
 from typing import List, Optional, Dict
 import json
 import logging
-from ..ollama_client import get_ollama, OllamaClient
+from ..ollama_client import get_ollama, OllamaClient, LLMPriority
 from ..security import auth_dep
 from ..db import get_db
 from ..config import settings
@@ -141,7 +141,7 @@ Respond naturally in German, matching the user's level."""
             messages.append({"role": "user", "content": payload.message})
             
             # Stream response
-            async for chunk in await ollama.chat(messages, stream=True):
+            async for chunk in await ollama.chat(messages, stream=True, priority=LLMPriority.INTERACTIVE):
                 content = chunk.get('message', {}).get('content', '')
                 if content:
                     yield f"data: {json.dumps({'content': content})}\n\n"
@@ -227,6 +227,7 @@ async def ai_status(ollama: OllamaClient = Depends(get_ollama)):
         "ollama_available": ollama.is_available,
         "ollama_host": ollama.host,
         "ollama_model": ollama.model,
+        "scheduler": ollama.scheduler.metrics(),
         "features": {
             "conversation": settings.ENABLE_AI_CONVERSATION,
             "voice": settings.ENABLE_VOICE_FEATURES,
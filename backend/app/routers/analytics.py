@@ -2,122 +2,30 @@
 Analytics and performance monitoring endpoints
 """
 from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
 from pydantic import BaseModel
 from typing import Dict, List, Optional
 from datetime import datetime, timezone, timedelta
 from ..db import get_db
 from ..redis_client import redis_client
 from ..ollama_client import ollama_client
-import psutil
-import time
-import subprocess
-import platform
+from ..services.loop_lag import loop_lag_probe
+from ..services.metrics import GPUMetrics, metrics, system_sampler
 
 router = APIRouter(prefix="/analytics")
 
-class GPUMetrics(BaseModel):
-    available: bool
-    name: Optional[str] = None
-    memory_used_mb: Optional[float] = None
-    memory_total_mb: Optional[float] = None
-    memory_percent: Optional[float] = None
-    utilization_percent: Optional[float] = None
-    temperature: Optional[float] = None
+AI_FEATURES = ("grammar", "quiz", "voice", "scenario")
 
-def get_gpu_metrics() -> Optional[GPUMetrics]:
-    """
-    Get GPU metrics for macOS (Metal) or NVIDIA GPUs
-    """
-    try:
-        system = platform.system()
-        
-        if system == "Darwin":  # macOS
-            # Try to get Metal GPU info
-            try:
-                # Get GPU info using system_profiler
-                result = subprocess.run(
-                    ["system_profiler", "SPDisplaysDataType"],
-                    capture_output=True,
-                    text=True,
-                    timeout=2
-                )
-                
-                if result.returncode == 0:
-                    output = result.stdout
-                    gpu_name = None
-                    vram_mb = None
-                    
-                    # Parse GPU name
-                    for line in output.split('\n'):
-                        if 'Chipset Model:' in line:
-                            gpu_name = line.split(':')[1].strip()
-                        elif 'VRAM' in line or 'Metal' in line:
-                            # Try to extract VRAM size
-                            parts = line.split(':')
-                            if len(parts) > 1:
-                                vram_str = parts[1].strip()
-                                if 'GB' in vram_str:
-                                    try:
-                                        vram_gb = float(vram_str.split()[0])
-                                        vram_mb = vram_gb * 1024
-                                    except:
-                                        pass
-                    
-                    # For macOS, we can't easily get real-time GPU utilization
-                    # But we can provide basic info
-                    return GPUMetrics(
-                        available=True,
-                        name=gpu_name or "Apple GPU",
-                        memory_total_mb=vram_mb,
-                        memory_used_mb=None,  # Not available on macOS without additional tools
-                        memory_percent=None,
-                        utilization_percent=None,  # Not easily available on macOS
-                        temperature=None
-                    )
-            except Exception as e:
-                print(f"macOS GPU detection error: {e}")
-                return GPUMetrics(available=False)
-        
-        else:  # Linux/Windows - try nvidia-smi
-            try:
-                result = subprocess.run(
-                    [
-                        "nvidia-smi",
-                        "--query-gpu=name,memory.used,memory.total,utilization.gpu,temperature.gpu",
-                        "--format=csv,noheader,nounits"
-                    ],
-                    capture_output=True,
-                    text=True,
-                    timeout=2
-                )
-                
-                if result.returncode == 0:
-                    parts = result.stdout.strip().split(',')
-                    if len(parts) >= 5:
-                        name = parts[0].strip()
-                        memory_used = float(parts[1].strip())
-                        memory_total = float(parts[2].strip())
-                        utilization = float(parts[3].strip())
-                        temperature = float(parts[4].strip())
-                        
-                        return GPUMetrics(
-                            available=True,
-                            name=name,
-                            memory_used_mb=memory_used,
-                            memory_total_mb=memory_total,
-                            memory_percent=round((memory_used / memory_total) * 100, 1),
-                            utilization_percent=utilization,
-                            temperature=temperature
-                        )
-            except Exception as e:
-                print(f"NVIDIA GPU detection error: {e}")
-                return GPUMetrics(available=False)
-        
-        return GPUMetrics(available=False)
-    
-    except Exception as e:
-        print(f"GPU metrics error: {e}")
-        return GPUMetrics(available=False)
+
+def _by_label(series: Dict[str, float], label: str) -> Dict[str, float]:
+    """Sum a metric's series by one label ("feature=grammar,status=success" -> grammar)"""
+    totals: Dict[str, float] = {}
+    for field, value in series.items():
+        for part in field.split(","):
+            name, _, label_value = part.partition("=")
+            if name == label:
+                totals[label_value] = totals.get(label_value, 0) + value
+    return totals
 
 class SystemMetrics(BaseModel):
     cpu_percent: float
@@ -156,33 +64,19 @@ async def get_metrics(db=Depends(get_db)):
     Get comprehensive system, AI, and usage metrics
     """
     
-    # System metrics
-    cpu_percent = psutil.cpu_percent(interval=0.1)
-    memory = psutil.virtual_memory()
-    disk = psutil.disk_usage('/')
-    uptime = time.time() - psutil.boot_time()
-    
-    # Get GPU metrics
-    gpu_metrics = get_gpu_metrics()
-    
-    system_metrics = SystemMetrics(
-        cpu_percent=cpu_percent,
-        memory_percent=memory.percent,
-        memory_used_gb=round(memory.used / (1024**3), 2),
-        memory_total_gb=round(memory.total / (1024**3), 2),
-        memory_available_gb=round(memory.available / (1024**3), 2),
-        disk_percent=disk.percent,
-        uptime_seconds=uptime,
-        gpu=gpu_metrics
-    )
+    # System metrics (cached snapshot from the background sampler)
+    system_metrics = SystemMetrics(**await system_sampler.latest())
     
     # AI metrics
-    total_requests = await redis_client.get("ai:total_requests") or 0
-    total_time = await redis_client.get("ai:total_time") or 0
-    cache_hits = await redis_client.get("ai:cache_hits") or 0
+    snapshot = await metrics.collect()
+    total_requests = sum(snapshot["counters"].get("ai_requests_total", {}).values())
+    response_times = snapshot["histograms"].get("ai_response_time_seconds", {}).values()
+    total_time = sum(entry["sum"] for entry in response_times)
+    successes = sum(entry["count"] for entry in response_times)
+    cache_hits = sum(snapshot["counters"].get("ai_cache_hits_total", {}).values())
     
-    avg_response_time = float(total_time) / max(int(total_requests), 1)
-    cache_hit_rate = float(cache_hits) / max(int(total_requests), 1) * 100
+    avg_response_time = total_time / max(successes, 1)
+    cache_hit_rate = cache_hits / max(total_requests, 1) * 100
     
     ai_metrics = AIMetrics(
         model=ollama_client.model,
@@ -192,8 +86,8 @@ async def get_metrics(db=Depends(get_db)):
         cache_hit_rate=round(cache_hit_rate, 2)
     )
     
-    # Usage stats
-    total_users = await db["users"].count_documents({})
+    # Usage stats (whole-collection counts come from collection metadata)
+    total_users = await db["users"].estimated_document_count()
     
     # Active users in last 24h (based on conversation activity)
     yesterday = datetime.now(timezone.utc) - timedelta(hours=24)
@@ -202,13 +96,13 @@ async def get_metrics(db=Depends(get_db)):
         {"updated_at": {"$gte": yesterday.isoformat()}}
     )
     
-    total_scenarios = await db["scenarios"].count_documents({})
+    total_scenarios = await db["scenarios"].estimated_document_count()
     active_conversations = await db["conversation_states"].count_documents(
         {"status": "active"}
     )
     
-    total_quizzes = await db["quiz_sessions"].count_documents({})
-    total_grammar = await db["grammar_history"].count_documents({})
+    total_quizzes = await db["quiz_sessions"].estimated_document_count()
+    total_grammar = await db["grammar_history"].estimated_document_count()
     
     usage_stats = UsageStats(
         total_users=total_users,
@@ -237,19 +131,11 @@ async def log_ai_usage(log: AIUsageLog):
     """
     Log AI usage for analytics
     """
-    # Increment counters
-    await redis_client.incr("ai:total_requests")
-    await redis_client.incr(f"ai:{log.feature}:requests")
-    
+    # In-memory only; the registry flushes batched deltas to Redis
+    feature = log.feature if log.feature in AI_FEATURES else "other"
+    metrics.inc("ai_requests_total", feature=feature, status="success" if log.success else "error")
     if log.success:
-        # Track response time
-        current_total = await redis_client.get("ai:total_time") or 0
-        await redis_client.set("ai:total_time", float(current_total) + log.response_time)
-        
-        # Track per-feature metrics
-        await redis_client.incr(f"ai:{log.feature}:success")
-        feature_time = await redis_client.get(f"ai:{log.feature}:time") or 0
-        await redis_client.set(f"ai:{log.feature}:time", float(feature_time) + log.response_time)
+        metrics.observe("ai_response_time_seconds", log.response_time, feature=feature)
     
     return {"status": "logged"}
 
@@ -265,17 +151,16 @@ async def get_ai_feature_stats():
     """
     Get per-feature AI statistics
     """
-    features = ["grammar", "quiz", "voice", "scenario"]
+    snapshot = await metrics.collect()
+    request_counts = snapshot["counters"].get("ai_requests_total", {})
+    response_times = snapshot["histograms"].get("ai_response_time_seconds", {})
     stats = []
     
-    for feature in features:
-        requests = await redis_client.get(f"ai:{feature}:requests") or 0
-        success = await redis_client.get(f"ai:{feature}:success") or 0
-        total_time = await redis_client.get(f"ai:{feature}:time") or 0
-        
-        requests = int(requests)
-        success = int(success)
-        total_time = float(total_time)
+    for feature in AI_FEATURES:
+        requests = int(_by_label(request_counts, "feature").get(feature, 0))
+        timing = response_times.get(f"feature={feature}", {"sum": 0.0, "count": 0})
+        success = timing["count"]
+        total_time = timing["sum"]
         
         avg_time = total_time / max(success, 1)
         success_rate = (success / max(requests, 1)) * 100
@@ -290,9 +175,22 @@ async def get_ai_feature_stats():
     
     return stats
 
+@router.get('/prometheus', response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """
+    Counters, histograms and system gauges in Prometheus text format
+    """
+    snapshot = await metrics.collect()
+    await system_sampler.latest()
+    return PlainTextResponse(
+        metrics.render_prometheus(snapshot, system_sampler.gauges()),
+        media_type="text/plain; version=0.0.4"
+    )
+
 class HealthCheck(BaseModel):
     status: str
     services: Dict[str, bool]
+    event_loop: Dict[str, float]
     timestamp: str
 
 @router.get('/health', response_model=HealthCheck)
@@ -326,6 +224,7 @@ async def health_check(db=Depends(get_db)):
     return HealthCheck(
         status=status,
         services=services,
+        event_loop=loop_lag_probe.stats(),
         timestamp=datetime.now(timezone.utc).isoformat()
     )
 
@@ -3,13 +3,14 @@ GDPR Compliance Router
 Data export, deletion, and privacy management
 """
 from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
+from fastapi.responses import StreamingResponse
 from typing import List, Optional
 from datetime import datetime
+from bson import ObjectId
 from ..db import get_db
 from ..routers.auth import get_current_user
-import json
-import zipfile
-import io
+from ..services.data_export import write_export_archive, stream_export_file, delete_user_exports
+from ..services.user_context import invalidate_user_context
 from pydantic import BaseModel
 
 router = APIRouter(prefix="/gdpr", tags=["GDPR Compliance"])
@@ -80,91 +81,38 @@ async def request_data_export(
     }
 
 
+def _export_oid(export_id: str):
+    """Export ids are ObjectIds; unknown formats simply won't match"""
+    return ObjectId(export_id) if ObjectId.is_valid(export_id) else export_id
+
+
 async def generate_data_export(
     export_id: str,
     user_id: str,
     export_request: DataExportRequest,
     db
 ):
-    """Generate data export file"""
+    """Generate data export file (zip of NDJSON files stored in GridFS)"""
     try:
         # Update status
         await db["data_export_requests"].update_one(
-            {"_id": export_id},
+            {"_id": _export_oid(export_id)},
             {"$set": {"status": "processing", "started_at": datetime.utcnow()}}
         )
         
-        export_data = {}
-        
-        # User profile
-        user = await db["users"].find_one({"_id": user_id})
-        if user:
-            user["_id"] = str(user["_id"])
-            export_data["profile"] = user
-        
-        # User stats
-        stats = await db["user_stats"].find_one({"user_id": user_id})
-        if stats:
-            stats["_id"] = str(stats["_id"])
-            export_data["statistics"] = stats
-        
-        # Scenarios
-        if export_request.include_scenarios:
-            scenarios = await db["conversation_states"].find({
-                "user_id": user_id
-            }).to_list(length=10000)
-            for s in scenarios:
-                s["_id"] = str(s["_id"])
-            export_data["scenarios"] = scenarios
-        
-        # Achievements
-        if export_request.include_achievements:
-            achievements = await db["user_achievements"].find({
-                "user_id": user_id
-            }).to_list(length=1000)
-            for a in achievements:
-                a["_id"] = str(a["_id"])
-            export_data["achievements"] = achievements
-        
-        # Vocabulary
-        if export_request.include_vocabulary:
-            vocab_progress = await db["vocabulary_progress"].find({
-                "user_id": user_id
-            }).to_list(length=10000)
-            for v in vocab_progress:
-                v["_id"] = str(v["_id"])
-            export_data["vocabulary_progress"] = vocab_progress
-        
-        # Reviews
-        if export_request.include_reviews:
-            reviews = await db["review_cards"].find({
-                "user_id": user_id
-            }).to_list(length=10000)
-            for r in reviews:
-                r["_id"] = str(r["_id"])
-            export_data["review_cards"] = reviews
-        
-        # Conversations
-        if export_request.include_conversations:
-            conversations = await db["conversations"].find({
-                "user_id": user_id
-            }).to_list(length=10000)
-            for c in conversations:
-                c["_id"] = str(c["_id"])
-            export_data["conversations"] = conversations
+        export_file = await write_export_archive(db, export_id, user_id, export_request)
         
-        # Save export data
-        export_json = json.dumps(export_data, indent=2, default=str)
-        
-        # Store in database (in production, store in S3 or similar)
         await db["data_export_requests"].update_one(
-            {"_id": export_id},
+            {"_id": _export_oid(export_id)},
             {
                 "$set": {
                     "status": "completed",
                     "completed_at": datetime.utcnow(),
-                    "data": export_json,
-                    "size_bytes": len(export_json)
+                    "format": "zip",
+                    "file_id": export_file["file_id"],
+                    "filename": export_file["filename"],
+                    "size_bytes": export_file["size_bytes"],
+                    "counts": export_file["counts"]
                 }
             }
         )
@@ -172,7 +120,7 @@ async def generate_data_export(
     except Exception as e:
         # Update status to failed
         await db["data_export_requests"].update_one(
-            {"_id": export_id},
+            {"_id": _export_oid(export_id)},
             {
                 "$set": {
                     "status": "failed",
@@ -191,7 +139,7 @@ async def get_export_status(
 ):
     """Get status of data export request"""
     export_record = await db["data_export_requests"].find_one({
-        "_id": export_id,
+        "_id": _export_oid(export_id),
         "user_id": user_id
     })
     
@@ -203,6 +151,8 @@ async def get_export_status(
     
     export_record["_id"] = str(export_record["_id"])
     export_record.pop("data", None)  # Don't include data in status response
+    if export_record.get("file_id"):
+        export_record["file_id"] = str(export_record["file_id"])
     
     return export_record
 
@@ -215,7 +165,7 @@ async def download_export(
 ):
     """Download exported data"""
     export_record = await db["data_export_requests"].find_one({
-        "_id": export_id,
+        "_id": _export_oid(export_id),
         "user_id": user_id
     })
     
@@ -231,11 +181,25 @@ async def download_export(
             detail="Export not ready yet"
         )
     
-    return {
-        "data": export_record.get("data"),
-        "format": "json",
-        "size_bytes": export_record.get("size_bytes")
+    # Exports generated before archives were stored in GridFS
+    if not export_record.get("file_id"):
+        return {
+            "data": export_record.get("data"),
+            "format": "json",
+            "size_bytes": export_record.get("size_bytes")
+        }
+    
+    headers = {
+        "Content-Disposition": f'attachment; filename="{export_record.get("filename", "export.zip")}"'
     }
+    if export_record.get("size_bytes") is not None:
+        headers["Content-Length"] = str(export_record["size_bytes"])
+    
+    return StreamingResponse(
+        stream_export_file(db, export_record["file_id"]),
+        media_type="application/zip",
+        headers=headers
+    )
 
 
 # Data Deletion (Right to be Forgotten)
@@ -309,6 +273,7 @@ async def execute_account_deletion(user_id: str, db):
         "users",
         "user_stats",
         "conversation_states",
+        "conversation_message_archive",
         "user_achievements",
         "vocabulary_progress",
         "review_cards",
@@ -323,6 +288,11 @@ async def execute_account_deletion(user_id: str, db):
     for collection in collections_to_clean:
         await db[collection].delete_many({"user_id": user_id})
     
+    # Stored export archives contain a copy of the same data
+    await delete_user_exports(db, user_id)
+    await db["data_export_requests"].delete_many({"user_id": user_id})
+    await invalidate_user_context(user_id)
+    
     # Mark deletion as completed
     await db["data_deletion_requests"].update_one(
         {"user_id": user_id, "status": "pending"},
@@ -8,6 +8,7 @@ from pydantic import BaseModel
 from datetime import datetime
 from ..db import get_db
 from .auth import get_current_user
+from ..services.xp_ledger import emit_xp, USER_STATS
 import random
 
 router = APIRouter(prefix="/grammar-exercises", tags=["Grammar Exercises"])
@@ -238,16 +239,7 @@ async def submit_exercise(
     
     # Update user stats
     if correct:
-        await db["user_stats"].update_one(
-            {"user_id": user_id},
-            {
-                "$inc": {
-                    "grammar_errors_fixed": 1,
-                    "total_xp": xp_earned
-                }
-            },
-            upsert=True
-        )
+        await emit_xp(db, user_id, USER_STATS, {"grammar_errors_fixed": 1, "total_xp": xp_earned}, source="grammar_exercise")
     
     # Log the attempt
     await db["grammar_exercise_attempts"].insert_one({
@@ -3,6 +3,7 @@ from typing import List, Dict, Any, Optional
 from datetime import datetime
 from ..db import get_db
 from ..security import auth_dep
+from ..services.user_context import invalidate_user_context
 from ..models.journey import (
     JourneyType, SelectJourneyRequest, SwitchJourneyRequest,
     JourneyResponse, UserJourney, JourneyProgress, LearningJourneys
@@ -85,6 +86,7 @@ async def select_journey(
             {"_id": ObjectId(user_id)},
             {"$set": {"learning_journeys": learning_journeys}}
         )
+        await invalidate_user_context(user_id)
         
         # Serialize datetime for JSON response
         journey_response = new_journey.copy()
@@ -186,6 +188,7 @@ async def switch_journey(
             {"$set": {"learning_journeys.active_journey_id": request.journey_id, "learning_journeys.journeys.$[elem].last_accessed": datetime.utcnow()}},
             array_filters=[{"elem.id": request.journey_id}]
         )
+        await invalidate_user_context(user_id)
         
         return {
             "success": True,
@@ -234,6 +237,7 @@ async def remove_journey(
             {"_id": ObjectId(user_id)},
             {"$set": {"learning_journeys": learning_journeys}}
         )
+        await invalidate_user_context(user_id)
         
         return {
             "success": True,
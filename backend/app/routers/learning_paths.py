@@ -215,7 +215,7 @@ async def get_recommendations(
     # 3. Review vocabulary
     due_cards = await db.review_cards.count_documents({
         "user_id": user_id,
-        "next_review": {"$lte": datetime.utcnow()}
+        "next_review_date": {"$lte": datetime.utcnow()}
     })
     if due_cards > 0:
         recommendations.append({
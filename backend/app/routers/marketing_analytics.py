@@ -7,10 +7,28 @@ from typing import List, Optional, Dict, Any
 from datetime import datetime, timedelta
 from ..db import get_db
 from .auth import get_current_user
+from ..services.marketing_rollups import (
+    MarketingRollupService,
+    CONVERSION,
+    INVOICE_PAID,
+    SUBSCRIPTION_CANCELED,
+    ACTIVE_SUBSCRIPTIONS,
+    PAID_SUBSCRIPTIONS,
+    AB_ASSIGNMENT,
+    AB_CONVERSION
+)
 from pydantic import BaseModel
+from bson import ObjectId
 
 router = APIRouter(prefix="/marketing", tags=["Marketing Analytics"])
 
+# Event type that assigns a user to an A/B test variant (metadata: ab_test_id, variant)
+AB_ASSIGNMENT_EVENT = "ab_assignment"
+
+
+def _to_oid(value):
+    return ObjectId(value) if isinstance(value, str) and ObjectId.is_valid(value) else value
+
 
 class ConversionEvent(BaseModel):
     """Conversion event model"""
@@ -39,16 +57,34 @@ async def track_conversion(
     db=Depends(get_db)
 ):
     """Track a conversion event"""
+    now = datetime.utcnow()
     event_doc = {
         "event_type": event.event_type,
         "user_id": event.user_id,
         "source": event.source,
         "campaign": event.campaign,
         "metadata": event.metadata,
-        "created_at": datetime.utcnow()
+        "created_at": now
     }
     
     await db["conversion_events"].insert_one(event_doc)
+    rollups = MarketingRollupService(db)
+    await rollups.record_conversion(event.event_type, event.source, when=now)
+    
+    # Events tagged with an A/B test feed the per-variant counters
+    test_id = event.metadata.get("ab_test_id")
+    variant = event.metadata.get("variant")
+    if test_id and variant:
+        assignment = event.event_type == AB_ASSIGNMENT_EVENT
+        collection = "ab_test_assignments" if assignment else "ab_test_conversions"
+        await db[collection].insert_one({
+            "test_id": test_id,
+            "variant": variant,
+            "user_id": event.user_id,
+            "event_type": event.event_type,
+            "created_at": now
+        })
+        await rollups.record_ab_event(test_id, variant, assignment)
     
     return {"message": "Event tracked successfully"}
 
@@ -59,31 +95,14 @@ async def get_conversion_metrics(
     db=Depends(get_db)
 ):
     """Get conversion metrics"""
-    start_date = datetime.utcnow() - timedelta(days=days)
-    
-    # Total signups
-    signups = await db["conversion_events"].count_documents({
-        "event_type": "signup",
-        "created_at": {"$gte": start_date}
-    })
-    
-    # Trial starts
-    trials = await db["conversion_events"].count_documents({
-        "event_type": "trial_start",
-        "created_at": {"$gte": start_date}
-    })
-    
-    # Subscriptions
-    subscriptions = await db["conversion_events"].count_documents({
-        "event_type": "subscription",
-        "created_at": {"$gte": start_date}
-    })
-    
-    # Referrals
-    referrals = await db["conversion_events"].count_documents({
-        "event_type": "referral",
-        "created_at": {"$gte": start_date}
-    })
+    totals = await MarketingRollupService(db).window_totals(
+        [CONVERSION], days, group_by=["event_type"]
+    )
+    counts = {row["event_type"]: row["count"] for row in totals}
+    signups = counts.get("signup", 0)
+    trials = counts.get("trial_start", 0)
+    subscriptions = counts.get("subscription", 0)
+    referrals = counts.get("referral", 0)
     
     # Calculate conversion rates
     signup_to_trial = (trials / signups * 100) if signups > 0 else 0
@@ -110,34 +129,18 @@ async def get_conversions_by_source(
     db=Depends(get_db)
 ):
     """Get conversions grouped by source"""
-    start_date = datetime.utcnow() - timedelta(days=days)
-    
-    pipeline = [
-        {
-            "$match": {
-                "created_at": {"$gte": start_date},
-                "source": {"$ne": None}
-            }
-        },
-        {
-            "$group": {
-                "_id": {
-                    "source": "$source",
-                    "event_type": "$event_type"
-                },
-                "count": {"$sum": 1}
-            }
-        },
-        {"$sort": {"count": -1}}
-    ]
-    
-    results = await db["conversion_events"].aggregate(pipeline).to_list(length=1000)
+    results = await MarketingRollupService(db).window_totals(
+        [CONVERSION], days, group_by=["source", "event_type"]
+    )
+    results.sort(key=lambda row: row["count"], reverse=True)
     
     # Organize by source
     by_source = {}
     for result in results:
-        source = result["_id"]["source"]
-        event_type = result["_id"]["event_type"]
+        source = result["source"]
+        event_type = result["event_type"]
+        if source is None:
+            continue
         
         if source not in by_source:
             by_source[source] = {
@@ -245,34 +248,24 @@ async def get_ab_test_results(
     db=Depends(get_db)
 ):
     """Get A/B test results"""
-    test = await db["ab_tests"].find_one({"_id": test_id})
+    test = await db["ab_tests"].find_one({"_id": _to_oid(test_id)})
     if not test:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="A/B test not found"
         )
     
-    # Get variant assignments
-    variant_a_users = await db["ab_test_assignments"].count_documents({
-        "test_id": test_id,
-        "variant": "a"
-    })
-    
-    variant_b_users = await db["ab_test_assignments"].count_documents({
-        "test_id": test_id,
-        "variant": "b"
-    })
-    
-    # Get conversion counts (simplified)
-    variant_a_conversions = await db["ab_test_conversions"].count_documents({
-        "test_id": test_id,
-        "variant": "a"
-    })
-    
-    variant_b_conversions = await db["ab_test_conversions"].count_documents({
-        "test_id": test_id,
-        "variant": "b"
-    })
+    # Assignment and conversion counters per variant
+    counters = {
+        (row["metric"], row["variant"]): row["count"]
+        for row in await MarketingRollupService(db).gauges(
+            [AB_ASSIGNMENT, AB_CONVERSION], test_id=test_id
+        )
+    }
+    variant_a_users = counters.get((AB_ASSIGNMENT, "a"), 0)
+    variant_b_users = counters.get((AB_ASSIGNMENT, "b"), 0)
+    variant_a_conversions = counters.get((AB_CONVERSION, "a"), 0)
+    variant_b_conversions = counters.get((AB_CONVERSION, "b"), 0)
     
     # Calculate conversion rates
     variant_a_rate = (variant_a_conversions / variant_a_users * 100) if variant_a_users > 0 else 0
@@ -317,47 +310,23 @@ async def get_revenue_metrics(
     db=Depends(get_db)
 ):
     """Get revenue metrics"""
-    start_date = datetime.utcnow() - timedelta(days=days)
+    rollups = MarketingRollupService(db)
+    invoices = await rollups.window_totals([INVOICE_PAID], days)
     
-    # Get paid invoices
-    pipeline = [
-        {
-            "$match": {
-                "status": "paid",
-                "created_at": {"$gte": start_date}
-            }
-        },
-        {
-            "$group": {
-                "_id": None,
-                "total_revenue": {"$sum": "$amount"},
-                "invoice_count": {"$sum": 1}
-            }
-        }
-    ]
-    
-    result = await db["invoices"].aggregate(pipeline).to_list(length=1)
-    
-    total_revenue = result[0]["total_revenue"] / 100 if result else 0  # Convert from cents
-    invoice_count = result[0]["invoice_count"] if result else 0
+    total_revenue = invoices[0]["value"] / 100 if invoices else 0  # Convert from cents
+    invoice_count = invoices[0]["count"] if invoices else 0
     
-    # Get active subscriptions
-    active_subs = await db["subscriptions"].count_documents({
-        "status": "active",
-        "tier": {"$ne": "free"}
-    })
+    # Active subscriptions per tier
+    active_by_tier = {
+        row["tier"]: row["count"]
+        for row in await rollups.gauges([ACTIVE_SUBSCRIPTIONS])
+    }
+    active_subs = sum(active_by_tier.values())
     
     # Calculate MRR (Monthly Recurring Revenue)
     # Simplified: assume $9.99 for premium, $19.99 for plus
-    premium_count = await db["subscriptions"].count_documents({
-        "status": "active",
-        "tier": "premium"
-    })
-    
-    plus_count = await db["subscriptions"].count_documents({
-        "status": "active",
-        "tier": "plus"
-    })
+    premium_count = active_by_tier.get("premium", 0)
+    plus_count = active_by_tier.get("plus", 0)
     
     mrr = (premium_count * 9.99) + (plus_count * 19.99)
     
@@ -377,31 +346,27 @@ async def get_retention_metrics(
     db=Depends(get_db)
 ):
     """Get retention metrics"""
-    # Get users who signed up 30+ days ago
-    thirty_days_ago = datetime.utcnow() - timedelta(days=30)
-    
-    old_users = await db["users"].count_documents({
-        "created_at": {"$lt": thirty_days_ago}
-    })
-    
-    # Get active users from that cohort
-    active_old_users = await db["users"].count_documents({
-        "created_at": {"$lt": thirty_days_ago},
-        "last_active": {"$gte": datetime.utcnow() - timedelta(days=7)}
-    })
+    # 30+ day old cohort and its recently active members in one pass
+    now = datetime.utcnow()
+    cohort = await db["users"].aggregate([
+        {"$match": {"created_at": {"$lt": now - timedelta(days=30)}}},
+        {"$group": {
+            "_id": None,
+            "total": {"$sum": 1},
+            "active": {"$sum": {"$cond": [{"$gte": ["$last_active", now - timedelta(days=7)]}, 1, 0]}}
+        }}
+    ]).to_list(length=1)
+    old_users = cohort[0]["total"] if cohort else 0
+    active_old_users = cohort[0]["active"] if cohort else 0
     
     # Calculate retention rate
     retention_rate = (active_old_users / old_users * 100) if old_users > 0 else 0
     
     # Get churn rate (canceled subscriptions)
-    total_subs = await db["subscriptions"].count_documents({
-        "tier": {"$ne": "free"}
-    })
-    
-    churned_subs = await db["subscriptions"].count_documents({
-        "status": "canceled",
-        "updated_at": {"$gte": datetime.utcnow() - timedelta(days=30)}
-    })
+    rollups = MarketingRollupService(db)
+    total_subs = sum(row["count"] for row in await rollups.gauges([PAID_SUBSCRIPTIONS]))
+    churned = await rollups.window_totals([SUBSCRIPTION_CANCELED], 30)
+    churned_subs = churned[0]["count"] if churned else 0
     
     churn_rate = (churned_subs / total_subs * 100) if total_subs > 0 else 0
     
@@ -2,6 +2,7 @@ from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
 from ..security import auth_dep
 from ..config import settings
+from ..openai_client import openai_client
 from typing import List, Optional
 import random
 import logging
@@ -76,21 +77,17 @@ async def generate_paragraph(
         if settings.OPENAI_API_KEY:
             # Use AI to generate a paragraph if API key is available
             try:
-                from openai import OpenAI
-                client = OpenAI(api_key=settings.OPENAI_API_KEY)
-                
                 prompt = f"Generate a short paragraph in German with 10 simple sentences about {topic or 'a random everyday topic'}. "
                 prompt += f"The language level should be {level or 'A2'} German. "
                 prompt += "Return the response as a JSON object with 'title' and 'sentences' (an array of exactly 10 sentences)."
                 
-                response = client.chat.completions.create(
+                content = await openai_client.chat(
+                    [{"role": "user", "content": prompt}],
                     model="gpt-3.5-turbo",
-                    messages=[{"role": "user", "content": prompt}],
                     response_format={ "type": "json_object" }
                 )
                 
                 # Parse the response
-                content = response.choices[0].message.content
                 if not content:
                     raise ValueError("No content in AI response")
                     
@@ -5,7 +5,7 @@ from datetime import datetime, timezone
 from bson import ObjectId
 from ..security import auth_dep, optional_auth_dep
 from ..db import get_db
-from ..ai import generate_questions
+from ..services.question_bank import sample_questions, question_bank_prefiller, question_hash
 import logging
 
 logger = logging.getLogger(__name__)
@@ -72,8 +72,18 @@ class QuizSubmitResponse(BaseModel):
 
 # ===== Helper Functions =====
 
-def _create_fallback_questions(topic: Optional[str], level: str, size: int) -> List[Dict[str, Any]]:
-    """Create fallback questions when AI and cache are unavailable - mixed with all 7 types"""
+def _create_fallback_questions(
+    topic: Optional[str],
+    level: str,
+    size: int,
+    types: Optional[List[str]] = None,
+    exclude: Optional[List[Dict[str, Any]]] = None
+) -> List[Dict[str, Any]]:
+    """Create fallback questions when AI and cache are unavailable - mixed with all 7 types
+
+    `types` limits the pool to the requested question types and `exclude`
+    drops questions whose content matches one already in the quiz.
+    """
     fallback = [
         # MCQ
         {
@@ -347,6 +357,11 @@ def _create_fallback_questions(topic: Optional[str], level: str, size: int) -> L
             "skills": ["speaking", "pronunciation"]
         }
     ]
+    if types:
+        fallback = [q for q in fallback if q["type"] in types]
+    if exclude:
+        taken = {question_hash(q) for q in exclude}
+        fallback = [q for q in fallback if question_hash(q) not in taken]
     # Randomize the fallback questions to provide variety
     import random
     shuffled = fallback.copy()
@@ -362,81 +377,30 @@ async def start_quiz(
     user_id: Optional[str] = Depends(optional_auth_dep)
 ):
     """
-    Start a new quiz with AI-generated questions.
-    Questions are cached in DB for reuse.
+    Start a new quiz from the AI-generated question bank.
+    The bank is stocked in the background, so this never waits on the LLM.
     """
     try:
-        # Try to get cached questions first
-        cached_questions = []
-        if config.topic:
-            # Look for cached questions matching criteria
-            cache_query = {
-                "skills": config.topic,
-                "level": config.level,
-                "cached": True
-            }
-            cached = await db["quiz_questions"].aggregate([
-                {"$match": cache_query},
-                {"$sample": {"size": config.size}}
-            ]).to_list(config.size)
-            
-            for q in cached:
-                q.pop("_id", None)
-                q.pop("cached", None)
-                q.pop("created_at", None)
-                cached_questions.append(q)
-        
-        # Generate new questions if not enough cached
-        questions = []
+        topic = config.topic or "mixed"
+        level = config.level or "intermediate"
+        questions = await sample_questions(
+            db, topic, level, config.size, types=config.question_types
+        )
         source = "cache"
         
-        if len(cached_questions) < config.size:
-            # Generate missing questions with AI (with timeout protection)
-            needed = config.size - len(cached_questions)
-            try:
-                import asyncio
-                # Set 15 second timeout for AI generation
-                ai_questions = await asyncio.wait_for(
-                    generate_questions(
-                        track=config.topic,
-                        size=needed,
-                        level=config.level
-                    ),
-                    timeout=15.0
+        if len(questions) < config.size:
+            # Bucket under-stocked: top up with fallbacks and have it refilled
+            question_bank_prefiller.request(topic, level)
+            if questions:
+                needed = config.size - len(questions)
+                questions += _create_fallback_questions(
+                    config.topic, level, needed, types=config.question_types, exclude=questions
                 )
-                
-                # Cache the AI-generated questions for future use
-                if ai_questions:
-                    for q in ai_questions:
-                        q_copy = q.copy()
-                        q_copy["cached"] = True
-                        q_copy["level"] = config.level
-                        q_copy["created_at"] = datetime.now(timezone.utc)
-                        await db["quiz_questions"].insert_one(q_copy)
-                    
-                    questions = cached_questions + ai_questions
-                    source = "mixed" if cached_questions else "ai"
-                else:
-                    questions = cached_questions
-            except asyncio.TimeoutError:
-                logger.warning(f"AI generation timed out, using cached questions only")
-                questions = cached_questions
-            except Exception as e:
-                logger.error(f"AI generation failed: {e}")
-                questions = cached_questions
-        else:
-            questions = cached_questions
-        
-        # Filter by question types if specified
-        if config.question_types:
-            questions = [q for q in questions if q.get("type") in config.question_types]
-        
-        # Limit to requested size
-        questions = questions[:config.size]
+                source = "mixed"
         
         # If still no questions, create fallback questions
         if not questions:
-            logger.warning("No cached or AI questions available, using fallback questions")
+            logger.warning("No cached questions available, using fallback questions")
             questions = _create_fallback_questions(config.topic, config.level, config.size)
         
         # Create quiz session
@@ -8,6 +8,7 @@ from pydantic import BaseModel
 from datetime import datetime
 from ..db import get_db
 from .auth import get_current_user
+from ..services.xp_ledger import emit_xp, USER_STATS
 
 router = APIRouter(prefix="/reading", tags=["Reading Practice"])
 
@@ -245,16 +246,7 @@ async def submit_reading(
     })
     
     # Update user stats
-    await db["user_stats"].update_one(
-        {"user_id": user_id},
-        {
-            "$inc": {
-                "articles_read": 1,
-                "total_xp": xp_earned
-            }
-        },
-        upsert=True
-    )
+    await emit_xp(db, user_id, USER_STATS, {"articles_read": 1, "total_xp": xp_earned}, source="reading_submission")
     
     return ReadingResult(
         score=score,
@@ -7,6 +7,8 @@ from typing import List, Optional
 from datetime import datetime, timedelta
 from ..db import get_db
 from .auth import get_current_user
+from ..services.marketing_rollups import MarketingRollupService
+from ..services.user_context import invalidate_user_context
 from pydantic import BaseModel
 import secrets
 import hashlib
@@ -214,16 +216,14 @@ async def apply_referral_code(
             current_end = subscription.get("current_period_end", datetime.utcnow())
             new_end = current_end + timedelta(days=reward_value)
             
-            await db["subscriptions"].update_one(
-                {"user_id": user_id},
-                {
-                    "$set": {
-                        "tier": "premium",
-                        "current_period_end": new_end,
-                        "updated_at": datetime.utcnow()
-                    }
-                }
-            )
+            update = {
+                "tier": "premium",
+                "current_period_end": new_end,
+                "updated_at": datetime.utcnow()
+            }
+            await db["subscriptions"].update_one({"user_id": user_id}, {"$set": update})
+            await MarketingRollupService(db).record_subscription_change(subscription, {**subscription, **update})
+            await invalidate_user_context(user_id)
     
     # Increment code usage
     await db["referral_codes"].update_one(
@@ -304,16 +304,14 @@ async def claim_rewards(
             current_end = subscription.get("current_period_end", datetime.utcnow())
             new_end = current_end + timedelta(days=total_value)
             
-            await db["subscriptions"].update_one(
-                {"user_id": user_id},
-                {
-                    "$set": {
-                        "tier": "premium",
-                        "current_period_end": new_end,
-                        "updated_at": datetime.utcnow()
-                    }
-                }
-            )
+            update = {
+                "tier": "premium",
+                "current_period_end": new_end,
+                "updated_at": datetime.utcnow()
+            }
+            await db["subscriptions"].update_one({"user_id": user_id}, {"$set": update})
+            await MarketingRollupService(db).record_subscription_change(subscription, {**subscription, **update})
+            await invalidate_user_context(user_id)
     
     # Mark rewards as claimed
     await db["referral_rewards"].update_many(
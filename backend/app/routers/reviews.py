@@ -6,14 +6,17 @@ from pydantic import BaseModel
 from typing import List, Optional, Dict
 from datetime import datetime, timezone
 from ..db import get_db
+from ..redis_client import redis_client
 from ..security import auth_dep
 from ..services.spaced_repetition import (
-    ReviewCard, ReviewScheduler, SM2Algorithm,
-    create_vocabulary_card, create_grammar_card
+    ReviewCard, ReviewScheduler,
+    create_vocabulary_card, create_grammar_card, to_iso,
+    REVIEW_CACHE_TTL, review_cache_key, invalidate_review_cache
 )
 
 router = APIRouter(prefix="/reviews")
 
+
 class ReviewRequest(BaseModel):
     card_id: str
     quality: int  # 0-5
@@ -49,10 +52,45 @@ class WorkloadPrediction(BaseModel):
     date: str
     due_cards: int
 
+class BatchReviewItem(BaseModel):
+    card_id: str
+    quality: int  # 0-5
+    reviewed_at: Optional[datetime] = None  # client-side time of an offline review
+
+class BatchReviewRequest(BaseModel):
+    reviews: List[BatchReviewItem]
+
+class BatchReviewResponse(BaseModel):
+    results: List[ReviewResponse]
+    not_found: List[str]
+
 class AddCardRequest(BaseModel):
     card_type: str  # "vocabulary" or "grammar"
     content: Dict
 
+MAX_BATCH_REVIEWS = 500
+
+def _review_message(quality: int, interval: int) -> str:
+    if quality < 3:
+        return "Keep practicing! This card will be shown again soon."
+    elif interval == 1:
+        return "Good! You'll see this again tomorrow."
+    elif interval == 6:
+        return "Great! Next review in 6 days."
+    return f"Excellent! Next review in {interval} days."
+
+def _card_response(card: ReviewCard) -> CardResponse:
+    return CardResponse(
+        card_id=card.card_id,
+        card_type=card.card_type,
+        content=card.content,
+        repetitions=card.state.repetitions,
+        easiness_factor=card.state.easiness_factor,
+        interval=card.state.interval,
+        next_review_date=to_iso(card.state.due_at),
+        last_reviewed=to_iso(card.state.last_reviewed_at)
+    )
+
 @router.get('/due', response_model=List[CardResponse])
 async def get_due_cards(
     limit: int = 20,
@@ -65,47 +103,15 @@ async def get_due_cards(
     Supports filtering by card_type: vocabulary, grammar, quiz_mistake, scenario
     """
     
-    # Build query
-    query = {"user_id": user_id}
-    if card_type:
-        query["card_type"] = card_type
+    # Due filter, priority sort and limit all run in MongoDB
+    due_cards = await ReviewScheduler.fetch_due_cards(
+        db["review_cards"],
+        user_id,
+        limit=min(max(limit, 1), 1000),
+        card_type=card_type
+    )
     
-    # Fetch user's cards from database
-    cards_data = await db["review_cards"].find(query).to_list(length=1000)
-    
-    # Convert to ReviewCard objects
-    cards = [
-        ReviewCard(
-            card_id=c.get("card_id", str(c["_id"])),
-            card_type=c.get("card_type", "vocabulary"),
-            content=c.get("content", {}),
-            user_id=c.get("user_id", user_id),
-            repetitions=c.get("repetitions", 0),
-            easiness_factor=c.get("easiness_factor", SM2Algorithm.INITIAL_EF),
-            interval=c.get("interval", 0),
-            next_review_date=c.get("next_review_date"),
-            last_reviewed=c.get("last_reviewed"),
-            created_at=c.get("created_at")
-        )
-        for c in cards_data
-    ]
-    
-    # Get due cards
-    due_cards = ReviewScheduler.get_due_cards(cards, limit=limit)
-    
-    return [
-        CardResponse(
-            card_id=card.card_id,
-            card_type=card.card_type,
-            content=card.content,
-            repetitions=card.repetitions,
-            easiness_factor=card.easiness_factor,
-            interval=card.interval,
-            next_review_date=card.next_review_date,
-            last_reviewed=card.last_reviewed
-        )
-        for card in due_cards
-    ]
+    return [_card_response(card) for card in due_cards]
 
 @router.post('/submit', response_model=ReviewResponse)
 async def submit_review(
@@ -131,18 +137,7 @@ async def submit_review(
         raise HTTPException(status_code=404, detail="Card not found")
     
     # Create ReviewCard object
-    card = ReviewCard(
-        card_id=card_data.get("card_id", str(card_data["_id"])),
-        card_type=card_data.get("card_type", "vocabulary"),
-        content=card_data.get("content", {}),
-        user_id=card_data.get("user_id", user_id),
-        repetitions=card_data.get("repetitions", 0),
-        easiness_factor=card_data.get("easiness_factor", SM2Algorithm.INITIAL_EF),
-        interval=card_data.get("interval", 0),
-        next_review_date=card_data.get("next_review_date"),
-        last_reviewed=card_data.get("last_reviewed"),
-        created_at=card_data.get("created_at")
-    )
+    card = ReviewCard.from_document(card_data)
     
     # Process review
     result = card.review(review.quality)
@@ -152,24 +147,57 @@ async def submit_review(
         {"card_id": review.card_id, "user_id": user_id},
         {"$set": card.to_dict()}
     )
-    
-    # Generate message
-    if review.quality < 3:
-        message = "Keep practicing! This card will be shown again soon."
-    elif result["interval"] == 1:
-        message = "Good! You'll see this again tomorrow."
-    elif result["interval"] == 6:
-        message = "Great! Next review in 6 days."
-    else:
-        message = f"Excellent! Next review in {result['interval']} days."
+    await invalidate_review_cache(user_id)
     
     return ReviewResponse(
         card_id=card.card_id,
         repetitions=result["repetitions"],
         easiness_factor=result["easiness_factor"],
         interval=result["interval"],
-        next_review_date=result["next_review_date"],
-        message=message
+        next_review_date=to_iso(result["next_review_date"]),
+        message=_review_message(review.quality, result["interval"])
+    )
+
+@router.post('/submit-batch', response_model=BatchReviewResponse)
+async def submit_review_batch(
+    request: BatchReviewRequest,
+    user_id: str = Depends(auth_dep),
+    db = Depends(get_db)
+):
+    """
+    Submit many reviews at once (e.g. replayed from an offline mobile queue)
+    """
+    
+    if len(request.reviews) > MAX_BATCH_REVIEWS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {MAX_BATCH_REVIEWS} reviews per batch"
+        )
+    if any(not 0 <= r.quality <= 5 for r in request.reviews):
+        raise HTTPException(status_code=400, detail="Quality must be between 0 and 5")
+    
+    now = datetime.now(timezone.utc)
+    updated, not_found = await ReviewScheduler.submit_reviews(
+        db["review_cards"],
+        user_id,
+        [(r.card_id, r.quality, r.reviewed_at or now) for r in request.reviews]
+    )
+    if updated:
+        await invalidate_review_cache(user_id)
+    
+    return BatchReviewResponse(
+        results=[
+            ReviewResponse(
+                card_id=item["card_id"],
+                repetitions=item["state"].repetitions,
+                easiness_factor=item["state"].easiness_factor,
+                interval=item["state"].interval,
+                next_review_date=to_iso(item["state"].due_at),
+                message=_review_message(item["last_quality"], item["state"].interval)
+            )
+            for item in updated
+        ],
+        not_found=not_found
     )
 
 @router.get('/stats', response_model=DailyStatsResponse)
@@ -183,33 +211,16 @@ async def get_daily_stats(
     Supports filtering by card_type: vocabulary, grammar, quiz_mistake, scenario
     """
     
-    # Build query
-    query = {"user_id": user_id}
-    if card_type:
-        query["card_type"] = card_type
+    cache_field = f"stats:{card_type or 'all'}"
+    stats = await redis_client.hget_json(review_cache_key(user_id), cache_field)
     
-    # Fetch all user's cards
-    cards_data = await db["review_cards"].find(query).to_list(length=10000)
-    
-    # Convert to ReviewCard objects
-    cards = [
-        ReviewCard(
-            card_id=c.get("card_id", str(c["_id"])),
-            card_type=c.get("card_type", "vocabulary"),
-            content=c.get("content", {}),
-            user_id=c.get("user_id", user_id),
-            repetitions=c.get("repetitions", 0),
-            easiness_factor=c.get("easiness_factor", SM2Algorithm.INITIAL_EF),
-            interval=c.get("interval", 0),
-            next_review_date=c.get("next_review_date"),
-            last_reviewed=c.get("last_reviewed"),
-            created_at=c.get("created_at")
+    if stats is None:
+        stats = await ReviewScheduler.aggregate_daily_stats(
+            db["review_cards"], user_id, card_type=card_type
+        )
+        await redis_client.hset_json(
+            review_cache_key(user_id), cache_field, stats, expire=REVIEW_CACHE_TTL
         )
-        for c in cards_data
-    ]
-    
-    # Calculate stats
-    stats = ReviewScheduler.get_daily_stats(cards)
     
     return DailyStatsResponse(**stats)
 
@@ -223,30 +234,17 @@ async def get_workload_prediction(
     Predict review workload for upcoming days
     """
     
-    # Fetch all user's cards
-    cards_data = await db["review_cards"].find(
-        {"user_id": user_id}
-    ).to_list(length=10000)
-    
-    # Convert to ReviewCard objects
-    cards = [
-        ReviewCard(
-            card_id=c.get("card_id", str(c["_id"])),
-            card_type=c.get("card_type", "vocabulary"),
-            content=c.get("content", {}),
-            user_id=c.get("user_id", user_id),
-            repetitions=c.get("repetitions", 0),
-            easiness_factor=c.get("easiness_factor", SM2Algorithm.INITIAL_EF),
-            interval=c.get("interval", 0),
-            next_review_date=c.get("next_review_date"),
-            last_reviewed=c.get("last_reviewed"),
-            created_at=c.get("created_at")
-        )
-        for c in cards_data
-    ]
+    days = min(max(days, 1), 30)
+    cache_field = f"workload:{days}"
+    predictions = await redis_client.hget_json(review_cache_key(user_id), cache_field)
     
-    # Get predictions
-    predictions = ReviewScheduler.predict_workload(cards, days=min(days, 30))
+    if predictions is None:
+        predictions = await ReviewScheduler.aggregate_workload(
+            db["review_cards"], user_id, days=days
+        )
+        await redis_client.hset_json(
+            review_cache_key(user_id), cache_field, predictions, expire=REVIEW_CACHE_TTL
+        )
     
     return [WorkloadPrediction(**p) for p in predictions]
 
@@ -279,17 +277,9 @@ async def add_card(
     
     # Insert into database
     await db["review_cards"].insert_one(card.to_dict())
+    await invalidate_review_cache(user_id)
     
-    return CardResponse(
-        card_id=card.card_id,
-        card_type=card.card_type,
-        content=card.content,
-        repetitions=card.repetitions,
-        easiness_factor=card.easiness_factor,
-        interval=card.interval,
-        next_review_date=card.next_review_date,
-        last_reviewed=card.last_reviewed
-    )
+    return _card_response(card)
 
 @router.post('/bulk-add')
 async def bulk_add_cards(
@@ -337,6 +327,9 @@ async def bulk_add_cards(
     else:
         raise HTTPException(status_code=400, detail="Invalid card type")
     
+    if added_count:
+        await invalidate_review_cache(user_id)
+    
     return {
         "message": f"Added {added_count} {card_type} cards",
         "count": added_count
@@ -399,9 +392,6 @@ async def add_quiz_mistakes(
             if existing:
                 continue
             
-            # Create review card
-            from ..services.spaced_repetition import ReviewCard
-            
             # Get question text based on type
             question_text = question.get("question") or question.get("sentence") or question.get("english") or "Question"
             skills = question.get("skills", [])
@@ -423,6 +413,9 @@ async def add_quiz_mistakes(
             await db["review_cards"].insert_one(card.to_dict())
             added_count += 1
     
+    if added_count:
+        await invalidate_review_cache(user_id)
+    
     return {
         "message": f"Added {added_count} quiz mistake cards",
         "count": added_count
@@ -483,7 +476,6 @@ async def add_scenario_objectives(
                 continue
             
             # Create review card
-            from ..services.spaced_repetition import ReviewCard
             card = ReviewCard(
                 card_id=card_id,
                 card_type="scenario",
@@ -500,6 +492,9 @@ async def add_scenario_objectives(
             await db["review_cards"].insert_one(card.to_dict())
             added_count += 1
     
+    if added_count:
+        await invalidate_review_cache(user_id)
+    
     return {
         "message": f"Added {added_count} scenario objective cards",
         "count": added_count
@@ -522,6 +517,7 @@ async def delete_card(
     
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Card not found")
+    await invalidate_review_cache(user_id)
     
     return {"message": "Card deleted successfully"}
 
@@ -541,16 +537,4 @@ async def get_all_cards(
     
     cards_data = await db["review_cards"].find(query).to_list(length=10000)
     
-    return [
-        CardResponse(
-            card_id=c.get("card_id", str(c["_id"])),
-            card_type=c.get("card_type", "vocabulary"),
-            content=c.get("content", {}),
-            repetitions=c.get("repetitions", 0),
-            easiness_factor=c.get("easiness_factor", SM2Algorithm.INITIAL_EF),
-            interval=c.get("interval", 0),
-            next_review_date=c.get("next_review_date"),
-            last_reviewed=c.get("last_reviewed")
-        )
-        for c in cards_data
-    ]
+    return [_card_response(ReviewCard.from_document(c)) for c in cards_data]
@@ -529,7 +529,7 @@ async def create_checkpoint(
             for obj in conversation.get("objectives_progress", []) 
             if obj.get("completed")
         ],
-        messages_count=len(conversation.get("messages", [])),
+        messages_count=conversation.get("messages_archived", 0) + len(conversation.get("messages", [])),
         metadata={"total_duration": conversation.get("total_duration_seconds", 0)}
     )
     
@@ -578,7 +578,9 @@ async def restore_checkpoint(
         raise HTTPException(status_code=404, detail="Checkpoint not found")
     
     # Restore state
-    messages = conversation.get("messages", [])[:checkpoint["messages_count"]]
+    messages, messages_archived = await ScenarioService(db).restore_messages(
+        conversation, checkpoint["messages_count"]
+    )
     
     await db.conversation_states.update_one(
         {"_id": conversation["_id"]},
@@ -587,6 +589,7 @@ async def restore_checkpoint(
                 "current_step": checkpoint["step"],
                 "score": checkpoint["score"],
                 "messages": messages,
+                "messages_archived": messages_archived,
                 "status": "active",
                 "last_checkpoint_id": checkpoint_id
             }
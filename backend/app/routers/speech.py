@@ -2,6 +2,7 @@ from fastapi import APIRouter, Depends, UploadFile, File, HTTPException, Query,
 from pydantic import BaseModel
 from ..security import auth_dep
 from ..config import settings
+from ..openai_client import openai_client, OpenAIUnavailable
 from ..db import get_db
 from typing import List, Dict
 
@@ -94,21 +95,11 @@ async def speech_check(expected: str = Form(..., min_length=1), file: UploadFile
     # Fallback to OpenAI Whisper if available
     if settings.OPENAI_API_KEY:
         try:
+            data = await file.read()
             try:
-                from openai import OpenAI
-            except Exception:
+                text = await openai_client.transcribe(data, file.filename or 'audio.webm', language="de")
+            except OpenAIUnavailable:
                 raise HTTPException(status_code=503, detail="openai package not installed on server")
-            client = OpenAI(api_key=settings.OPENAI_API_KEY)
-            data = await file.read()
-            import io
-            audio_file = io.BytesIO(data)
-            audio_file.name = file.filename or 'audio.webm'
-            resp = client.audio.transcriptions.create(
-                model="whisper-1",
-                file=audio_file,
-                language="de"
-            )
-            text = (getattr(resp, 'text', None) or getattr(resp, 'text', '') or '').strip()
             if not text:
                 raise HTTPException(status_code=500, detail="Transcription failed")
             align = _alignment_score(expected, text)
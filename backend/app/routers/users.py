@@ -2,6 +2,7 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from pydantic import BaseModel, EmailStr, Field
 from ..db import get_db
 from ..security import auth_dep, hash_password, verify_password
+from ..services.leaderboard_service import LeaderboardService
 from bson import ObjectId
 from pymongo import ReturnDocument
 
@@ -44,6 +45,7 @@ async def update_me(payload: UpdateMeRequest, user_id: str = Depends(auth_dep),
     )
     if not res:
         raise HTTPException(status_code=404, detail="User not found")
+    await LeaderboardService(db).invalidate_profile(user_id)
     res["_id"] = str(res["_id"])  # serialize
     return res
 
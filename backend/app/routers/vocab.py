@@ -5,9 +5,13 @@ from typing import List, Optional, Any
 from ..db import get_db
 from ..security import auth_dep
 from ..services.vocab_ai_service import VocabAIService
+from ..services.vocab_search import get_vocab_search_index
+from ..services.spaced_repetition import (
+    ReviewScheduler, CardState, create_vocabulary_card, vocabulary_card_id, to_iso,
+    invalidate_review_cache
+)
 from ..utils.journey_utils import get_user_journey_level, get_level_range_for_content
 import datetime as dt
-import re
 
 router = APIRouter(prefix="/vocab")
 
@@ -16,23 +20,15 @@ def _iso_now() -> str:
     return dt.datetime.utcnow().isoformat()
 
 
-def _srs_update(ease: float, interval: int, reps: int, grade: int) -> tuple[float, int, int]:
-    # Simple SM-2 style adjustments
-    ease = max(1.3, ease + (0.1 - (5 - grade) * (0.08 + (5 - grade) * 0.02)))
-    if grade < 3:
-        return ease, 1, 0
-    reps += 1
-    if reps == 1:
-        interval = 1
-    elif reps == 2:
-        interval = 6
-    else:
-        interval = int(round(interval * ease))
-    return ease, interval, reps
-
-
-def _due_date_from(days: int) -> str:
-    return (dt.datetime.utcnow() + dt.timedelta(days=days)).isoformat()
+def _srs_view(state: Optional[CardState]) -> dict:
+    # Legacy "srs" shape of /vocab/list, now read from the shared review_cards queue
+    state = state or CardState()
+    return {
+        "ease": state.easiness_factor,
+        "interval": state.interval,
+        "repetitions": state.repetitions,
+        "due": to_iso(state.due_at),
+    }
 
 
 class SaveRequest(BaseModel):
@@ -169,28 +165,13 @@ async def vocab_search(
             level = journey_level
             print(f"[VOCAB SEARCH] Using journey level: {level}")
     
-    term = q.strip()
-    rx = re.compile(re.escape(term), re.IGNORECASE) if term else None
-    criteria: dict[str, Any] = {}
-    if rx:
-        criteria["$or"] = [{"word": rx}, {"translation": rx}, {"examples": rx}]
+    level_range = None
     if level:
         # Use level range for content variety
         level_range = get_level_range_for_content(level)
         print(f"[VOCAB SEARCH] Level range for {level}: {level_range}")
-        criteria["level"] = {"$in": level_range}
-    cur = db["seed_words"].find(criteria or {}).limit(int(limit))
-    items = await cur.to_list(length=limit)
-    out = []
-    for it in items:
-        out.append({
-            "_id": str(it.get("_id")),
-            "word": it.get("word"),
-            "level": it.get("level"),
-            "translation": it.get("translation"),
-            "example": ((it.get("examples") or [None])[0]),
-        })
-    return out
+    index = await get_vocab_search_index(db)
+    return index.search(q, levels=level_range, limit=int(limit))
 
 
 @router.get("/progress/today")
@@ -267,33 +248,41 @@ async def vocab_save(payload: SaveRequest, db=Depends(get_db), user_id: str = De
         "translation": (seed or {}).get("translation"),
         "example": ((seed or {}).get("examples") or [None])[0],
         "status": payload.status or "learning",
-        "srs": {
-            "ease": 2.5,
-            "interval": 0,
-            "repetitions": 0,
-            "due": _iso_now(),
-        },
         "ts": _iso_now(),
     }
     await db["user_vocab"].update_one(
         {"user_id": user_id, "word": doc["word"]}, {"$set": doc}, upsert=True
     )
+    # Scheduling lives in the shared review_cards due-queue
+    await ReviewScheduler.ensure_card(db["review_cards"], create_vocabulary_card(doc, user_id))
     return {"status": "ok"}
 
 
 @router.get("/list")
 async def vocab_list(status: Optional[str] = None, limit: int = 50, db=Depends(get_db), user_id: str = Depends(auth_dep)):
-    criteria: dict[str, Any] = {"user_id": user_id}
     if status == "due":
-        criteria["srs.due"] = {"$lte": _iso_now()}
-    elif status:
-        criteria["status"] = status
-    cur = db["user_vocab"].find(criteria).sort("srs.due", 1).limit(int(limit))
-    docs = await cur.to_list(length=limit)
+        due_cards = await ReviewScheduler.fetch_due_cards(
+            db["review_cards"], user_id, limit=int(limit), card_type="vocabulary"
+        )
+        states = {c.content.get("word"): c.state for c in due_cards}
+        docs = await db["user_vocab"].find(
+            {"user_id": user_id, "word": {"$in": list(states)}}
+        ).to_list(length=limit)
+        order = {word: i for i, word in enumerate(states)}
+        docs.sort(key=lambda it: order.get(it.get("word"), len(order)))
+    else:
+        criteria: dict[str, Any] = {"user_id": user_id}
+        if status:
+            criteria["status"] = status
+        docs = await db["user_vocab"].find(criteria).sort("ts", -1).limit(int(limit)).to_list(length=limit)
+        by_card = await ReviewScheduler.fetch_states(
+            db["review_cards"], user_id,
+            [vocabulary_card_id(it.get("word"), user_id) for it in docs if it.get("word")]
+        )
+        states = {it.get("word"): by_card.get(vocabulary_card_id(it.get("word"), user_id)) for it in docs}
     # Build a clean, JSON-serializable list
     result: list[dict] = []
     for it in docs:
-        srs = it.get("srs") or {}
         clean = {
             "_id": str(it.get("_id")) if it.get("_id") is not None else None,
             "user_id": str(it.get("user_id")) if it.get("user_id") is not None else None,
@@ -303,12 +292,7 @@ async def vocab_list(status: Optional[str] = None, limit: int = 50, db=Depends(g
             "translation": str(it.get("translation")) if it.get("translation") is not None else None,
             "example": str(it.get("example")) if it.get("example") is not None else None,
             "status": str(it.get("status")) if it.get("status") is not None else None,
-            "srs": {
-                "ease": float(srs.get("ease", 2.5)) if srs.get("ease") is not None else 2.5,
-                "interval": int(srs.get("interval", 0)) if srs.get("interval") is not None else 0,
-                "repetitions": int(srs.get("repetitions", 0)) if srs.get("repetitions") is not None else 0,
-                "due": str(srs.get("due")) if srs.get("due") is not None else None,
-            },
+            "srs": _srs_view(states.get(it.get("word"))),
             "ts": str(it.get("ts")) if it.get("ts") is not None else None,
         }
         result.append(clean)
@@ -322,12 +306,17 @@ class ReviewStartRequest(BaseModel):
 
 @router.post("/review/start")
 async def review_start(payload: ReviewStartRequest, db=Depends(get_db), user_id: str = Depends(auth_dep)):
-    now = _iso_now()
-    due = await db["user_vocab"].find({"user_id": user_id, "srs.due": {"$lte": now}}).sort("srs.due", 1).limit(int(payload.size)).to_list(length=payload.size)
+    due_cards = await ReviewScheduler.fetch_due_cards(
+        db["review_cards"], user_id, limit=int(payload.size), card_type="vocabulary"
+    )
+    due = [c.content for c in due_cards]
     if len(due) < payload.size:
         remain = payload.size - len(due)
-        learning = await db["user_vocab"].find({"user_id": user_id, "status": "learning"}).sort("ts", -1).limit(remain).to_list(length=remain)
-        pool = due + [w for w in learning if all(w.get("_id") != d.get("_id") for d in due)]
+        due_words = [d.get("word") for d in due]
+        learning = await db["user_vocab"].find(
+            {"user_id": user_id, "status": "learning", "word": {"$nin": due_words}}
+        ).sort("ts", -1).limit(remain).to_list(length=remain)
+        pool = due + learning
     else:
         pool = due
 
@@ -342,8 +331,9 @@ async def review_start(payload: ReviewStartRequest, db=Depends(get_db), user_id:
         # 2) mcq with distractors from translations
         return {"mode": "mcq", "prompt": word, "options": [translation, "food", "house", "time"], "answer": translation}
 
+    # Item ids are shared-queue card ids, submitted back to /vocab/review/submit
     items = [{
-        "id": str(it.get("_id")),
+        "id": vocabulary_card_id(it.get("word"), user_id),
         "word": it.get("word"),
         "translation": it.get("translation"),
         "example": it.get("example"),
@@ -364,26 +354,16 @@ class ReviewSubmitRequest(BaseModel):
 
 @router.post("/review/submit")
 async def review_submit(payload: ReviewSubmitRequest, db=Depends(get_db), user_id: str = Depends(auth_dep)):
-    total = 0
-    correct = 0
-    for r in payload.results:
-        doc = await db["user_vocab"].find_one({"_id": r.id, "user_id": user_id})
-        # If _id is ObjectId type, fallback to matching by string conversion
-        if not doc:
-            from bson import ObjectId
-            try:
-                doc = await db["user_vocab"].find_one({"_id": ObjectId(r.id), "user_id": user_id})
-            except Exception:
-                doc = None
-        if not doc:
-            continue
-        srs = doc.get("srs") or {"ease": 2.5, "interval": 0, "repetitions": 0}
-        ease, interval, reps = _srs_update(float(srs.get("ease", 2.5)), int(srs.get("interval", 0)), int(srs.get("repetitions", 0)), int(r.grade))
-        due = _due_date_from(interval)
-        await db["user_vocab"].update_one({"_id": doc["_id"]}, {"$set": {"srs": {"ease": ease, "interval": interval, "repetitions": reps, "due": due}}})
-        total += 1
-        if r.grade >= 3:
-            correct += 1
+    now = dt.datetime.now(dt.timezone.utc)
+    updated, _ = await ReviewScheduler.submit_reviews(
+        db["review_cards"], user_id, [(r.id, int(r.grade), now) for r in payload.results]
+    )
+    if updated:
+        await invalidate_review_cache(user_id)
+    found = {item["card_id"] for item in updated}
+    graded = [r for r in payload.results if r.id in found]
+    total = len(graded)
+    correct = sum(1 for r in graded if r.grade >= 3)
     return {"updated": total, "correct_rate": (correct / total if total else 0)}
 
 
@@ -456,18 +436,15 @@ async def mark_word_learned(
                 "word": word,
                 "status": "learning",
                 "vocab_set_id": vocab_set_id,
-                "srs": {
-                    "ease": 2.5,
-                    "interval": 0,
-                    "repetitions": 0,
-                    "due": _iso_now()
-                },
                 "updated_at": _iso_now()
             },
             "$setOnInsert": {"created_at": _iso_now()}
         },
         upsert=True
     )
+    await ReviewScheduler.ensure_card(
+        db["review_cards"], create_vocabulary_card({"word": word}, user_id)
+    )
     
     return {"success": True, "word": word}
 
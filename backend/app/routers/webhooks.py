@@ -7,12 +7,10 @@ from typing import List, Optional, Dict, Any
 from datetime import datetime, timedelta
 from ..db import get_db
 from ..routers.auth import get_current_user
-from ..models.organization import Webhook, WebhookCreate, WebhookDelivery
+from ..models.organization import Webhook, WebhookCreate
+from ..services.webhook_worker import enqueue_deliveries, sign_payload
+from bson import ObjectId
 import secrets
-import hashlib
-import hmac
-import httpx
-import asyncio
 
 router = APIRouter(prefix="/webhooks", tags=["Webhooks"])
 
@@ -33,6 +31,10 @@ WEBHOOK_EVENTS = [
 ]
 
 
+def _to_oid(value: str):
+    return ObjectId(value) if ObjectId.is_valid(value) else value
+
+
 def generate_webhook_secret() -> str:
     """Generate a secure webhook secret"""
     return secrets.token_urlsafe(32)
@@ -40,11 +42,7 @@ def generate_webhook_secret() -> str:
 
 def generate_webhook_signature(payload: str, secret: str) -> str:
     """Generate HMAC signature for webhook payload"""
-    return hmac.new(
-        secret.encode(),
-        payload.encode(),
-        hashlib.sha256
-    ).hexdigest()
+    return sign_payload(payload.encode(), secret)
 
 
 async def deliver_webhook(
@@ -53,110 +51,11 @@ async def deliver_webhook(
     payload: Dict[str, Any],
     db
 ):
-    """Deliver webhook with retry logic"""
-    # Get webhook configuration
-    webhook = await db["webhooks"].find_one({"_id": webhook_id})
+    """Queue a delivery to one webhook (sent by the webhook worker)"""
+    webhook = await db["webhooks"].find_one({"_id": _to_oid(webhook_id)})
     if not webhook or not webhook.get("active"):
         return
-    
-    # Create delivery record
-    delivery = WebhookDelivery(
-        webhook_id=webhook_id,
-        organization_id=webhook["organization_id"],
-        event_type=event_type,
-        payload=payload
-    )
-    
-    result = await db["webhook_deliveries"].insert_one(
-        delivery.dict(by_alias=True, exclude={"id"})
-    )
-    delivery_id = str(result.inserted_id)
-    
-    # Attempt delivery with retries
-    max_attempts = 3
-    for attempt in range(1, max_attempts + 1):
-        try:
-            # Generate signature
-            payload_str = str(payload)
-            signature = generate_webhook_signature(payload_str, webhook["secret"])
-            
-            # Send webhook
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.post(
-                    webhook["url"],
-                    json=payload,
-                    headers={
-                        "X-Webhook-Signature": signature,
-                        "X-Webhook-Event": event_type,
-                        "X-Webhook-Delivery": delivery_id,
-                        "Content-Type": "application/json"
-                    }
-                )
-            
-            # Update delivery record
-            await db["webhook_deliveries"].update_one(
-                {"_id": delivery_id},
-                {
-                    "$set": {
-                        "status": "delivered" if response.status_code < 400 else "failed",
-                        "attempts": attempt,
-                        "response_code": response.status_code,
-                        "response_body": response.text[:1000],  # Limit size
-                        "delivered_at": datetime.utcnow()
-                    }
-                }
-            )
-            
-            # Update webhook stats
-            if response.status_code < 400:
-                await db["webhooks"].update_one(
-                    {"_id": webhook_id},
-                    {
-                        "$inc": {
-                            "total_deliveries": 1,
-                            "successful_deliveries": 1
-                        },
-                        "$set": {"last_delivery_at": datetime.utcnow()}
-                    }
-                )
-                return  # Success, exit
-            else:
-                await db["webhooks"].update_one(
-                    {"_id": webhook_id},
-                    {
-                        "$inc": {
-                            "total_deliveries": 1,
-                            "failed_deliveries": 1
-                        }
-                    }
-                )
-        
-        except Exception as e:
-            # Update delivery record with error
-            await db["webhook_deliveries"].update_one(
-                {"_id": delivery_id},
-                {
-                    "$set": {
-                        "status": "failed",
-                        "attempts": attempt,
-                        "error_message": str(e)
-                    }
-                }
-            )
-            
-            await db["webhooks"].update_one(
-                {"_id": webhook_id},
-                {
-                    "$inc": {
-                        "total_deliveries": 1,
-                        "failed_deliveries": 1
-                    }
-                }
-            )
-        
-        # Wait before retry (exponential backoff)
-        if attempt < max_attempts:
-            await asyncio.sleep(2 ** attempt)
+    await enqueue_deliveries(db, [webhook], event_type, payload)
 
 
 async def trigger_webhook_event(
@@ -164,25 +63,17 @@ async def trigger_webhook_event(
     event_type: str,
     payload: Dict[str, Any],
     db,
-    background_tasks: BackgroundTasks
+    background_tasks: Optional[BackgroundTasks] = None
 ):
-    """Trigger webhook event for organization"""
+    """Queue webhook event for every subscribed webhook of the organization"""
     # Find webhooks subscribed to this event
     webhooks = await db["webhooks"].find({
         "organization_id": organization_id,
         "active": True,
         "events": event_type
-    }).to_list(length=100)
+    }, {"_id": 1, "organization_id": 1}).to_list(length=100)
     
-    # Deliver to each webhook in background
-    for webhook in webhooks:
-        background_tasks.add_task(
-            deliver_webhook,
-            str(webhook["_id"]),
-            event_type,
-            payload,
-            db
-        )
+    await enqueue_deliveries(db, webhooks, event_type, payload)
 
 
 # Webhook CRUD
@@ -490,12 +381,6 @@ async def test_webhook(
         }
     }
     
-    background_tasks.add_task(
-        deliver_webhook,
-        webhook_id,
-        "webhook.test",
-        test_payload,
-        db
-    )
+    await deliver_webhook(webhook_id, "webhook.test", test_payload, db)
     
     return {"message": "Test webhook queued for delivery"}
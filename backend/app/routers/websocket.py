@@ -7,11 +7,17 @@ import json
 import logging
 from ..websocket_manager import get_connection_manager, ConnectionManager
 from ..security import decode_jwt
+from ..db import get_db
+from ..ollama_client import ollama_client
+from ..services.voice_pipeline import run_voice_turn, VoiceTurnError
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/ws")
 
+# Upper bound on buffered audio for one voice turn (~5 min of 16 kHz WAV)
+MAX_VOICE_TURN_BYTES = 10 * 1024 * 1024
+
 @router.websocket("/connect")
 async def websocket_endpoint(
     websocket: WebSocket,
@@ -164,6 +170,12 @@ async def voice_websocket(
     
     Usage:
     ws://localhost:8000/api/v1/ws/voice?token=YOUR_JWT_TOKEN
+    
+    Scenario voice turns: send {"type": "start_recording", "scenario_id": ...},
+    the audio as binary frames, then {"type": "stop_recording"}. The reply
+    streams back as transcript, token and audio_chunk events (one WAV per
+    sentence, sent while the model is still generating) and ends with
+    turn_complete, which carries per-stage latency.
     """
     
     # Authenticate
@@ -187,15 +199,22 @@ async def voice_websocket(
             "message": "Voice WebSocket ready"
         })
         
+        scenario_id = None
+        audio_buffer = bytearray()
+        
         while True:
             # Receive audio data or control messages
             message = await websocket.receive()
+            if message.get("type") == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", 1000))
             
-            if "text" in message:
+            if message.get("text") is not None:
                 # Control message
                 data = json.loads(message["text"])
                 
                 if data.get("type") == "start_recording":
+                    scenario_id = data.get("scenario_id")
+                    audio_buffer.clear()
                     await websocket.send_json({
                         "type": "recording_started",
                         "status": "ready"
@@ -206,9 +225,46 @@ async def voice_websocket(
                         "type": "recording_stopped",
                         "status": "processing"
                     })
+                    
+                    if scenario_id and audio_buffer:
+                        if user_id == "anonymous":
+                            await websocket.send_json({
+                                "type": "error",
+                                "message": "Authentication required for scenario voice turns"
+                            })
+                        else:
+                            try:
+                                await run_voice_turn(
+                                    await get_db(),
+                                    ollama_client,
+                                    user_id,
+                                    scenario_id,
+                                    bytes(audio_buffer),
+                                    websocket.send_json
+                                )
+                            except VoiceTurnError as e:
+                                await websocket.send_json({"type": "error", "message": str(e)})
+                            except WebSocketDisconnect:
+                                raise
+                            except Exception as e:
+                                logger.error(f"Voice turn failed: {e}")
+                                await websocket.send_json({
+                                    "type": "error",
+                                    "message": "Voice turn failed"
+                                })
+                    audio_buffer.clear()
             
-            elif "bytes" in message:
+            elif message.get("bytes") is not None:
                 audio_data = message["bytes"]
+                if len(audio_buffer) + len(audio_data) > MAX_VOICE_TURN_BYTES:
+                    audio_buffer.clear()
+                    scenario_id = None
+                    await websocket.send_json({
+                        "type": "error",
+                        "message": "Recording too long"
+                    })
+                    continue
+                audio_buffer.extend(audio_data)
                 await websocket.send_json({
                     "type": "audio_received",
                     "size": len(audio_data)
@@ -8,6 +8,7 @@ from pydantic import BaseModel
 from datetime import datetime
 from ..db import get_db
 from .auth import get_current_user
+from ..services.xp_ledger import emit_xp, USER_STATS
 
 router = APIRouter(prefix="/writing", tags=["Writing Practice"])
 
@@ -230,16 +231,7 @@ async def submit_writing(
     })
     
     # Update user stats
-    await db["user_stats"].update_one(
-        {"user_id": user_id},
-        {
-            "$inc": {
-                "essays_written": 1,
-                "total_xp": score
-            }
-        },
-        upsert=True
-    )
+    await emit_xp(db, user_id, USER_STATS, {"essays_written": 1, "total_xp": score}, source="writing_submission")
     
     return feedback
 
@@ -196,8 +196,8 @@ async def seed_dummy_progress():
                 "easiness_factor": easiness_factor,
                 "interval": interval,
                 "repetitions": reviews_count,
-                "next_review": next_review,
-                "last_review": datetime.utcnow() - timedelta(days=interval),
+                "next_review_date": next_review,
+                "last_reviewed": datetime.utcnow() - timedelta(days=interval),
                 "created_at": datetime.utcnow() - timedelta(days=random.randint(1, 30))
             }
             
@@ -0,0 +1,69 @@
+"""
+In-process achievement index
+
+Achievement definitions are loaded once per process and indexed by stat type
+as sorted thresholds, so finding every achievement a stat value has reached is
+a bisect instead of a query per achievement.
+"""
+import asyncio
+from bisect import bisect_right
+from typing import Dict, List, Optional
+
+from app.models.achievement import Achievement, ACHIEVEMENT_DEFINITIONS
+
+
+class AchievementIndex:
+    """Achievements keyed by stat type and threshold"""
+
+    def __init__(self, definitions: List[Dict]):
+        self.achievements: Dict[str, Achievement] = {}
+        entries: Dict[str, List[tuple]] = {}
+
+        for definition in definitions:
+            achievement = Achievement(**definition)
+            self.achievements[achievement.code] = achievement
+
+            # Every condition of a stat type must be met, so the highest target wins
+            targets: Dict[str, int] = {}
+            for condition in achievement.conditions:
+                targets[condition.type] = max(targets.get(condition.type, 0), condition.target)
+            for stat_type, target in targets.items():
+                entries.setdefault(stat_type, []).append((target, achievement.code))
+
+        self._thresholds: Dict[str, List[int]] = {}
+        self._codes: Dict[str, List[str]] = {}
+        for stat_type, items in entries.items():
+            items.sort()
+            self._thresholds[stat_type] = [target for target, _ in items]
+            self._codes[stat_type] = [code for _, code in items]
+
+    def reached(self, stat_type: str, value: int) -> List[str]:
+        """Codes of every achievement whose threshold for stat_type is <= value"""
+        thresholds = self._thresholds.get(stat_type)
+        if not thresholds:
+            return []
+        return self._codes[stat_type][:bisect_right(thresholds, value)]
+
+    def stat_types(self) -> List[str]:
+        return list(self._thresholds)
+
+
+_index: Optional[AchievementIndex] = None
+_index_lock = asyncio.Lock()
+
+
+async def get_achievement_index(collection) -> AchievementIndex:
+    """Load the process-wide index on first use"""
+    global _index
+    if _index is None:
+        async with _index_lock:
+            if _index is None:
+                definitions = await collection.find({}).to_list(length=1000)
+                _index = AchievementIndex(definitions or ACHIEVEMENT_DEFINITIONS)
+    return _index
+
+
+def invalidate_achievement_index() -> None:
+    """Drop the index so the next evaluation reloads definitions"""
+    global _index
+    _index = None
@@ -5,6 +5,8 @@ Achievement service for managing user achievements and gamification
 from datetime import datetime, timedelta
 from typing import List, Optional, Dict, Any
 from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReturnDocument, UpdateOne
+import numpy as np
 
 from app.models.achievement import (
     Achievement,
@@ -12,8 +14,64 @@ from app.models.achievement import (
     UserStats,
     ACHIEVEMENT_DEFINITIONS,
     calculate_xp_for_level,
+    calculate_levels,
     get_level_from_xp
 )
+from app.services.achievement_engine import get_achievement_index, invalidate_achievement_index
+from app.services.leaderboard_service import LeaderboardService
+from app.services.xp_ledger import emit_xp, USER_STATS
+
+_STREAK_PROJECTION = {"current_streak": 1, "longest_streak": 1, "last_activity_date": 1}
+
+
+def _stat(field: str) -> Dict[str, Any]:
+    """Aggregation expression for a numeric stat that may be missing"""
+    return {"$ifNull": [f"${field}", 0]}
+
+
+def _next_streak(stats_dict: Dict[str, Any]) -> tuple[Optional[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Streak fields to $set for activity today (None if already counted today)
+    and the streak result returned to callers
+    """
+    now = datetime.utcnow()
+    current_streak = stats_dict.get("current_streak") or 0
+    longest_streak = stats_dict.get("longest_streak") or 0
+    last_activity = stats_dict.get("last_activity_date")
+    
+    if not last_activity:
+        # First activity
+        new_streak = 1
+        streak_continued = True
+    else:
+        days_diff = (now.date() - last_activity.date()).days
+        
+        if days_diff == 0:
+            # Same day, no change
+            return None, {
+                "streak_continued": True,
+                "current_streak": current_streak,
+                "longest_streak": longest_streak
+            }
+        elif days_diff == 1:
+            # Consecutive day
+            new_streak = current_streak + 1
+            streak_continued = True
+        else:
+            # Streak broken
+            new_streak = 1
+            streak_continued = False
+    
+    new_longest = max(new_streak, longest_streak)
+    return {
+        "current_streak": new_streak,
+        "longest_streak": new_longest,
+        "last_activity_date": now
+    }, {
+        "streak_continued": streak_continued,
+        "current_streak": new_streak,
+        "longest_streak": new_longest
+    }
 
 
 class AchievementService:
@@ -24,6 +82,7 @@ class AchievementService:
         self.achievements_collection = db.achievements
         self.user_achievements_collection = db.user_achievements
         self.user_stats_collection = db.user_stats
+        self.leaderboards = LeaderboardService(db)
     
     async def initialize_achievements(self):
         """Initialize achievement definitions in database"""
@@ -33,6 +92,7 @@ class AchievementService:
             )
             if not existing:
                 await self.achievements_collection.insert_one(achievement_def)
+        invalidate_achievement_index()
     
     async def get_user_stats(self, user_id: str) -> Optional[UserStats]:
         """Get user's statistics"""
@@ -46,6 +106,7 @@ class AchievementService:
         # Create new stats for user
         new_stats = UserStats(user_id=user_id)
         stats_data = new_stats.model_dump(by_alias=True, exclude={"id"})
+        stats_data["unlocked_achievements"] = []
         await self.user_stats_collection.insert_one(stats_data)
         return new_stats
     
@@ -53,103 +114,270 @@ class AchievementService:
         """Update user statistics"""
         updates["updated_at"] = datetime.utcnow()
         
-        await self.user_stats_collection.update_one(
+        stats_dict = await self.user_stats_collection.find_one_and_update(
             {"user_id": user_id},
             {"$set": updates},
-            upsert=True
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        stats_dict["_id"] = str(stats_dict["_id"])
+        return UserStats(**stats_dict)
+    
+    async def _load_unlocked(self, user_id: str) -> List[str]:
+        """Unlocked achievement codes from user_achievements (pre-denormalization docs)"""
+        return await self.user_achievements_collection.distinct(
+            "achievement_code",
+            {"user_id": user_id, "unlocked": True}
+        )
+    
+    async def _stats_doc(self, user_id: str) -> Dict[str, Any]:
+        """Raw user_stats document, created if missing"""
+        stats_dict = await self.user_stats_collection.find_one({"user_id": user_id})
+        if stats_dict:
+            return stats_dict
+        await self.get_user_stats(user_id)
+        return await self.user_stats_collection.find_one({"user_id": user_id})
+    
+    async def _apply(
+        self,
+        user_id: str,
+        xp: int = 0,
+        inc: Optional[Dict[str, int]] = None,
+        set_fields: Optional[Dict[str, Any]] = None,
+        computed: Optional[Dict[str, Any]] = None,
+        checks: tuple = ()
+    ) -> tuple[Dict[str, Any], Dict[str, Any]]:
+        """
+        Apply a stat change and evaluate achievements for the changed stats
+        
+        One pipeline find_one_and_update increments the counters, fills in
+        defaults for new users and returns the updated document, including the
+        denormalized unlocked_achievements set. Newly crossed thresholds come
+        from the in-process index; only unlocks or a level-up need a second
+        write (see _commit).
+        Returns: (updated stats document, xp result)
+        """
+        now = datetime.utcnow()
+        index = await get_achievement_index(self.achievements_collection)
+        
+        counters = dict(inc or {})
+        if xp:
+            counters["total_xp"] = counters.get("total_xp", 0) + xp
+        stage = {
+            field: {"$add": [_stat(field), amount]}
+            for field, amount in counters.items()
+        }
+        stage.update({field: {"$literal": value} for field, value in (set_fields or {}).items()})
+        stage.update(computed or {})
+        stage["updated_at"] = now
+        
+        defaults = UserStats(user_id=user_id).model_dump(exclude={"id"})
+        stats_dict = await self.user_stats_collection.find_one_and_update(
+            {"user_id": user_id},
+            [
+                {"$replaceWith": {"$mergeObjects": [{"$literal": defaults}, "$$ROOT"]}},
+                {"$set": stage}
+            ],
+            upsert=True,
+            return_document=ReturnDocument.AFTER
         )
         
-        return await self.get_user_stats(user_id)
+        unlocked = stats_dict.get("unlocked_achievements")
+        backfill = None
+        if unlocked is None:
+            backfill = unlocked = await self._load_unlocked(user_id)
+        unlocked = set(unlocked)
+        
+        new_codes: List[str] = []
+        for stat_type in checks:
+            for code in index.reached(stat_type, stats_dict.get(stat_type) or 0):
+                if code not in unlocked:
+                    unlocked.add(code)
+                    new_codes.append(code)
+        
+        xp_result = await self._commit(
+            user_id,
+            stats_dict,
+            xp,
+            [index.achievements[code] for code in new_codes],
+            backfill
+        )
+        return stats_dict, xp_result
     
-    async def add_xp(self, user_id: str, xp_amount: int, reason: str = "") -> Dict[str, Any]:
+    async def _commit(
+        self,
+        user_id: str,
+        stats_dict: Dict[str, Any],
+        xp_gained: int,
+        achievements: List[Achievement],
+        backfill: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
         """
-        Add XP to user and check for level up
-        Returns: {leveled_up: bool, new_level: int, xp_gained: int}
+        Persist unlocks and their XP rewards in one guarded
+        find_one_and_update, write any level change separately, then record
+        the unlocks in user_achievements
         """
-        stats = await self.get_user_stats(user_id)
-        old_level = stats.level
-        new_total_xp = stats.total_xp + xp_amount
-        
-        # Calculate new level
-        new_level, xp_in_level, xp_to_next = get_level_from_xp(new_total_xp)
-        
-        # Update stats
-        await self.update_user_stats(user_id, {
-            "total_xp": new_total_xp,
-            "level": new_level,
-            "xp_to_next_level": xp_to_next
-        })
-        
-        # Create level-up notification if leveled up
-        if new_level > old_level:
+        old_level = stats_dict.get("level", 1)
+        codes = [a.code for a in achievements]
+        reward = sum(a.xp_reward for a in achievements)
+        total_xp = stats_dict.get("total_xp") or 0
+        
+        update: Dict[str, Any] = {}
+        if reward:
+            update["$inc"] = {"total_xp": reward}
+        if backfill is not None:
+            update["$set"] = {"unlocked_achievements": backfill + codes}
+        elif codes:
+            update["$addToSet"] = {"unlocked_achievements": {"$each": codes}}
+        
+        if update:
+            query: Dict[str, Any] = {"user_id": user_id}
+            if codes:
+                # Another request unlocked the same achievement first
+                query["unlocked_achievements"] = {"$nin": codes}
+            updated = await self.user_stats_collection.find_one_and_update(
+                query,
+                update,
+                projection={"total_xp": 1},
+                return_document=ReturnDocument.AFTER
+            )
+            if updated:
+                total_xp = updated["total_xp"]
+            else:
+                achievements, codes, reward = [], [], 0
+        
+        new_level, _, xp_to_next = get_level_from_xp(total_xp)
+        if new_level != old_level:
+            # Not behind the unlock guard: losing that race must not drop a level-up.
+            # Skipped if the ledger moved total_xp meanwhile; its refresh recomputes
+            await self.user_stats_collection.update_one(
+                {"user_id": user_id, "total_xp": total_xp},
+                {"$set": {"level": new_level, "xp_to_next_level": xp_to_next}}
+            )
+        
+        if achievements:
+            now = datetime.utcnow()
+            await self.user_achievements_collection.bulk_write([
+                UpdateOne(
+                    {"user_id": user_id, "achievement_code": code},
+                    {
+                        "$set": {
+                            "unlocked": True,
+                            "progress": 100,
+                            "unlocked_at": now,
+                            "updated_at": now
+                        },
+                        "$setOnInsert": {
+                            "user_id": user_id,
+                            "achievement_code": code,
+                            "created_at": now
+                        }
+                    },
+                    upsert=True
+                )
+                for code in codes
+            ], ordered=False)
+        
+        if xp_gained or reward:
+            await self.leaderboards.record_xp(user_id, xp_gained + reward, total_xp)
+        
+        if achievements or new_level > old_level:
             try:
                 from ..services.notification_service import NotificationService
                 notification_service = NotificationService(self.db)
-                await notification_service.create_level_up_notification(
-                    user_id=user_id,
-                    new_level=new_level
-                )
+                for achievement in achievements:
+                    await notification_service.create_achievement_notification(
+                        user_id=user_id,
+                        achievement_code=achievement.code,
+                        achievement_name=achievement.name,
+                        achievement_tier=achievement.tier,
+                        xp_reward=achievement.xp_reward,
+                        icon=achievement.icon
+                    )
+                if new_level > old_level:
+                    await notification_service.create_level_up_notification(
+                        user_id=user_id,
+                        new_level=new_level
+                    )
             except Exception as e:
-                print(f"Failed to create level-up notification: {e}")
+                # Don't fail the update if notifications fail
+                print(f"Failed to create achievement notification: {e}")
         
         return {
             "leveled_up": new_level > old_level,
             "old_level": old_level,
             "new_level": new_level,
-            "xp_gained": xp_amount,
-            "total_xp": new_total_xp,
-            "xp_to_next_level": xp_to_next
+            "xp_gained": xp_gained,
+            "total_xp": total_xp,
+            "xp_to_next_level": xp_to_next,
+            "achievements_unlocked": codes
         }
     
+    async def add_xp(self, user_id: str, xp_amount: int, reason: str = "") -> Dict[str, Any]:
+        """
+        Queue XP for the user on the XP ledger; the ledger writer applies it
+        and handles the level-up
+        Returns: {queued: bool, xp_gained: int}
+        """
+        await emit_xp(self.db, user_id, USER_STATS, {"total_xp": xp_amount}, source=reason or "add_xp")
+        return {"queued": bool(xp_amount), "xp_gained": xp_amount}
+    
+    async def recompute_levels(self, batch_size: int = 5000) -> int:
+        """
+        Recompute level / xp_to_next_level for every user_stats document
+        
+        Intended for background jobs (e.g. after a level-curve change). Levels
+        are computed per batch with the vectorized table lookup and only
+        changed documents are written back.
+        Returns the number of documents updated.
+        """
+        updated = 0
+        cursor = self.user_stats_collection.find(
+            {}, {"total_xp": 1, "level": 1, "xp_to_next_level": 1}
+        ).batch_size(batch_size)
+        
+        batch: List[Dict[str, Any]] = []
+        
+        async def flush() -> int:
+            xp = np.array([doc.get("total_xp", 0) or 0 for doc in batch], dtype=np.int64)
+            levels = calculate_levels(xp)
+            ops = []
+            for doc, level in zip(batch, levels.tolist()):
+                xp_to_next = calculate_xp_for_level(level + 1) - calculate_xp_for_level(level)
+                if doc.get("level") != level or doc.get("xp_to_next_level") != xp_to_next:
+                    ops.append(UpdateOne(
+                        {"_id": doc["_id"]},
+                        {"$set": {"level": level, "xp_to_next_level": xp_to_next}}
+                    ))
+            if ops:
+                await self.user_stats_collection.bulk_write(ops, ordered=False)
+            return len(ops)
+        
+        async for doc in cursor:
+            batch.append(doc)
+            if len(batch) >= batch_size:
+                updated += await flush()
+                batch = []
+        if batch:
+            updated += await flush()
+        
+        return updated
+    
     async def update_streak(self, user_id: str) -> Dict[str, Any]:
         """
         Update user's daily streak
         Returns: {streak_continued: bool, current_streak: int, longest_streak: int}
         """
-        stats = await self.get_user_stats(user_id)
-        today = datetime.utcnow().date()
-        
-        if not stats.last_activity_date:
-            # First activity
-            new_streak = 1
-            streak_continued = True
-        else:
-            last_date = stats.last_activity_date.date()
-            days_diff = (today - last_date).days
-            
-            if days_diff == 0:
-                # Same day, no change
-                return {
-                    "streak_continued": True,
-                    "current_streak": stats.current_streak,
-                    "longest_streak": stats.longest_streak
-                }
-            elif days_diff == 1:
-                # Consecutive day
-                new_streak = stats.current_streak + 1
-                streak_continued = True
-            else:
-                # Streak broken
-                new_streak = 1
-                streak_continued = False
-        
-        # Update longest streak
-        new_longest = max(new_streak, stats.longest_streak)
-        
-        await self.update_user_stats(user_id, {
-            "current_streak": new_streak,
-            "longest_streak": new_longest,
-            "last_activity_date": datetime.utcnow()
-        })
+        stats_dict = await self.user_stats_collection.find_one(
+            {"user_id": user_id}, _STREAK_PROJECTION
+        )
+        streak_fields, streak_result = _next_streak(stats_dict or {})
         
-        # Check streak achievements
-        await self.check_achievements(user_id, "current_streak", new_streak)
+        if streak_fields:
+            await self._apply(user_id, set_fields=streak_fields, checks=("current_streak",))
+            await self.leaderboards.record_score("streak", user_id, streak_result["current_streak"])
         
-        return {
-            "streak_continued": streak_continued,
-            "current_streak": new_streak,
-            "longest_streak": new_longest
-        }
+        return streak_result
     
     async def record_scenario_completion(
         self,
@@ -158,28 +386,25 @@ class AchievementService:
         completion_time: int,
         perfect: bool = False
     ) -> Dict[str, Any]:
-        """Record scenario completion and award XP"""
-        stats = await self.get_user_stats(user_id)
-        
-        # Update stats
-        new_completed = stats.scenarios_completed + 1
-        new_total_time = stats.total_scenario_time + completion_time
-        
-        await self.update_user_stats(user_id, {
-            "scenarios_completed": new_completed,
-            "total_scenario_time": new_total_time
-        })
+        """Record scenario completion, award XP and update the streak"""
+        stats_dict = await self.user_stats_collection.find_one(
+            {"user_id": user_id}, _STREAK_PROJECTION
+        )
+        streak_fields, streak_result = _next_streak(stats_dict or {})
         
-        # Award XP
         base_xp = 100
         bonus_xp = 50 if perfect else 0
-        xp_result = await self.add_xp(user_id, base_xp + bonus_xp, f"Completed scenario {scenario_id}")
-        
-        # Check achievements
-        await self.check_achievements(user_id, "scenarios_completed", new_completed)
-        
-        # Update streak
-        streak_result = await self.update_streak(user_id)
+        stats_dict, xp_result = await self._apply(
+            user_id,
+            xp=base_xp + bonus_xp,
+            inc={"scenarios_completed": 1, "total_scenario_time": completion_time},
+            set_fields=streak_fields,
+            checks=("scenarios_completed", "current_streak")
+        )
+        new_completed = stats_dict["scenarios_completed"]
+        await self.leaderboards.record_score("scenarios", user_id, new_completed)
+        if streak_fields:
+            await self.leaderboards.record_score("streak", user_id, streak_result["current_streak"])
         
         return {
             **xp_result,
@@ -189,20 +414,13 @@ class AchievementService:
     
     async def record_vocabulary_learned(self, user_id: str, word_count: int = 1) -> Dict[str, Any]:
         """Record vocabulary learning"""
-        stats = await self.get_user_stats(user_id)
-        new_count = stats.words_learned + word_count
-        
-        await self.update_user_stats(user_id, {
-            "words_learned": new_count
-        })
-        
-        # Award XP
-        xp_result = await self.add_xp(user_id, 10 * word_count, f"Learned {word_count} words")
-        
-        # Check achievements
-        await self.check_achievements(user_id, "words_learned", new_count)
-        
-        return {**xp_result, "words_learned": new_count}
+        stats_dict, xp_result = await self._apply(
+            user_id,
+            xp=10 * word_count,
+            inc={"words_learned": word_count},
+            checks=("words_learned",)
+        )
+        return {**xp_result, "words_learned": stats_dict["words_learned"]}
     
     async def record_quiz_completion(
         self,
@@ -211,32 +429,25 @@ class AchievementService:
         perfect: bool = False
     ) -> Dict[str, Any]:
         """Record quiz completion"""
-        stats = await self.get_user_stats(user_id)
-        
-        new_completed = stats.quizzes_completed + 1
-        new_perfect = stats.perfect_quizzes + (1 if perfect else 0)
-        
-        # Calculate new average accuracy
-        total_score = stats.quiz_accuracy * stats.quizzes_completed + score
-        new_accuracy = total_score / new_completed
-        
-        await self.update_user_stats(user_id, {
-            "quizzes_completed": new_completed,
-            "quiz_accuracy": new_accuracy,
-            "perfect_quizzes": new_perfect
-        })
+        # Running average, computed from the pre-update values in the same write
+        completed = _stat("quizzes_completed")
+        new_accuracy = {
+            "$divide": [
+                {"$add": [{"$multiply": [_stat("quiz_accuracy"), completed]}, score]},
+                {"$add": [completed, 1]}
+            ]
+        }
         
-        # Award XP
         base_xp = 30
         bonus_xp = 70 if perfect else int(score * 0.5)
-        xp_result = await self.add_xp(user_id, base_xp + bonus_xp, "Completed quiz")
-        
-        # Check achievements
-        await self.check_achievements(user_id, "quizzes_completed", new_completed)
-        if perfect:
-            await self.check_achievements(user_id, "perfect_quizzes", new_perfect)
-        
-        return {**xp_result, "quizzes_completed": new_completed}
+        stats_dict, xp_result = await self._apply(
+            user_id,
+            xp=base_xp + bonus_xp,
+            inc={"quizzes_completed": 1, "perfect_quizzes": 1 if perfect else 0},
+            computed={"quiz_accuracy": new_accuracy},
+            checks=("quizzes_completed", "perfect_quizzes") if perfect else ("quizzes_completed",)
+        )
+        return {**xp_result, "quizzes_completed": stats_dict["quizzes_completed"]}
     
     async def record_grammar_check(
         self,
@@ -244,25 +455,13 @@ class AchievementService:
         errors_found: int = 0
     ) -> Dict[str, Any]:
         """Record grammar check"""
-        stats = await self.get_user_stats(user_id)
-        
-        new_checks = stats.grammar_checks + 1
-        new_errors_fixed = stats.grammar_errors_fixed + errors_found
-        
-        await self.update_user_stats(user_id, {
-            "grammar_checks": new_checks,
-            "grammar_errors_fixed": new_errors_fixed
-        })
-        
-        # Award XP
-        xp_amount = 5 + (errors_found * 10)
-        xp_result = await self.add_xp(user_id, xp_amount, "Grammar check")
-        
-        # Check achievements
-        await self.check_achievements(user_id, "grammar_checks", new_checks)
-        await self.check_achievements(user_id, "grammar_errors_fixed", new_errors_fixed)
-        
-        return {**xp_result, "grammar_checks": new_checks}
+        stats_dict, xp_result = await self._apply(
+            user_id,
+            xp=5 + (errors_found * 10),
+            inc={"grammar_checks": 1, "grammar_errors_fixed": errors_found},
+            checks=("grammar_checks", "grammar_errors_fixed")
+        )
+        return {**xp_result, "grammar_checks": stats_dict["grammar_checks"]}
     
     async def check_achievements(
         self,
@@ -274,91 +473,41 @@ class AchievementService:
         Check if user unlocked any achievements
         Returns list of newly unlocked achievements
         """
-        # Get all achievements for this stat type
-        achievements = await self.achievements_collection.find({
-            "conditions.type": stat_type
-        }).to_list(length=100)
+        index = await get_achievement_index(self.achievements_collection)
+        candidates = index.reached(stat_type, current_value)
+        if not candidates:
+            return []
         
-        newly_unlocked = []
+        stats_dict = await self._stats_doc(user_id)
+        unlocked = stats_dict.get("unlocked_achievements")
+        backfill = None
+        if unlocked is None:
+            backfill = unlocked = await self._load_unlocked(user_id)
         
-        for achievement_dict in achievements:
-            achievement = Achievement(**achievement_dict)
-            
-            # Check if already unlocked
-            existing = await self.user_achievements_collection.find_one({
-                "user_id": user_id,
-                "achievement_code": achievement.code,
-                "unlocked": True
-            })
-            
-            if existing:
-                continue
-            
-            # Check if conditions are met
-            conditions_met = True
-            for condition in achievement.conditions:
-                if condition.type == stat_type:
-                    if current_value < condition.target:
-                        conditions_met = False
-                        break
-            
-            if conditions_met:
-                # Unlock achievement
-                await self.unlock_achievement(user_id, achievement.code)
-                newly_unlocked.append(achievement)
+        unlocked = set(unlocked)
+        newly_unlocked = [index.achievements[code] for code in candidates if code not in unlocked]
+        if newly_unlocked or backfill is not None:
+            result = await self._commit(user_id, stats_dict, 0, newly_unlocked, backfill)
+            newly_unlocked = [a for a in newly_unlocked if a.code in result["achievements_unlocked"]]
         
         return newly_unlocked
     
     async def unlock_achievement(self, user_id: str, achievement_code: str) -> bool:
         """Unlock an achievement for user"""
-        # Get achievement
-        achievement_dict = await self.achievements_collection.find_one({"code": achievement_code})
-        if not achievement_dict:
+        index = await get_achievement_index(self.achievements_collection)
+        achievement = index.achievements.get(achievement_code)
+        if not achievement:
             return False
         
-        achievement = Achievement(**achievement_dict)
-        
-        # Create or update user achievement
-        await self.user_achievements_collection.update_one(
-            {
-                "user_id": user_id,
-                "achievement_code": achievement_code
-            },
-            {
-                "$set": {
-                    "unlocked": True,
-                    "progress": 100,
-                    "unlocked_at": datetime.utcnow(),
-                    "updated_at": datetime.utcnow()
-                },
-                "$setOnInsert": {
-                    "user_id": user_id,
-                    "achievement_code": achievement_code,
-                    "created_at": datetime.utcnow()
-                }
-            },
-            upsert=True
-        )
-        
-        # Award XP
-        await self.add_xp(user_id, achievement.xp_reward, f"Achievement: {achievement.name}")
-        
-        # Create notification
-        try:
-            from ..services.notification_service import NotificationService
-            notification_service = NotificationService(self.db)
-            await notification_service.create_achievement_notification(
-                user_id=user_id,
-                achievement_code=achievement.code,
-                achievement_name=achievement.name,
-                achievement_tier=achievement.tier,
-                xp_reward=achievement.xp_reward,
-                icon=achievement.icon
-            )
-        except Exception as e:
-            # Don't fail achievement unlock if notification fails
-            print(f"Failed to create achievement notification: {e}")
+        stats_dict = await self._stats_doc(user_id)
+        unlocked = stats_dict.get("unlocked_achievements")
+        backfill = None
+        if unlocked is None:
+            backfill = unlocked = await self._load_unlocked(user_id)
+        if achievement_code in unlocked:
+            return True
         
+        await self._commit(user_id, stats_dict, 0, [achievement], backfill)
         return True
     
     async def get_user_achievements(
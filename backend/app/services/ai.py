@@ -1,6 +1,7 @@
 from .typing_utils import SentenceResult
 from ..config import get_settings
-import re
+from .grammar_rule_engine import get_rule_set
+from ..openai_client import openai_client
 
 # AI-first; if AI unavailable, use DB-backed rules. If neither applies, raise for router to 503.
 
@@ -206,12 +207,6 @@ JSON:"""
     # Fallback to OpenAI if configured
     if settings.OPENAI_API_KEY:
         try:
-            try:
-                from openai import OpenAI
-            except Exception:
-                raise RuntimeError("openai package not installed in backend env")
-            client = OpenAI(api_key=settings.OPENAI_API_KEY)
-
             system = (
                 "You are a German grammar checker. Return strict JSON only with keys: "
                 "corrected (string), explanation (string), suggested_variation (string), "
@@ -229,15 +224,14 @@ JSON:"""
                     "highlights": [{"op": "ok|sub|del|ins", "before": "string?", "after": "string?"}],
                 },
             }
-            resp = client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
+            content = await openai_client.chat(
+                [
                     {"role": "system", "content": system},
                     {"role": "user", "content": __import__('json').dumps(user)},
                 ],
+                model="gpt-4o-mini",
                 temperature=0.2,
-            )
-            content = resp.choices[0].message.content or "{}"
+            ) or "{}"
             import json
             try:
                 data = json.loads(content)
@@ -275,76 +269,24 @@ JSON:"""
     # Supported schemas (backward-compatible):
     #  - { pattern, replacement, explanation?, suggestion?, ci?, word_boundary?, priority? }
     #  - { regex, flags?, replacement, explanation?, suggestion?, priority? }
-    rules = db["grammar_rules"]
-    all_rules = []
-    async for rr in (
-        rules
-        .find({"$or": [{"pattern": {"$exists": True}}, {"regex": {"$exists": True}}]}, {
-            "_id": 1, "pattern": 1, "replacement": 1, "explanation": 1, "suggestion": 1, "regex": 1, "flags": 1,
-            "priority": 1, "ci": 1, "word_boundary": 1,
-        })
-        .sort([("priority", -1)])
-        .limit(1000)
-    ):
-        all_rules.append(rr)
+    rule_set = await get_rule_set(db)
 
     current = sentence
     explanations: list[str] = []
     tips_acc: list[str] = []
     last_suggestion: str | None = None
     applied: list[str] = []
-
-    def apply_one(text: str) -> tuple[str, bool, dict | None]:
-        # returns (new_text, changed, rule)
-        for rule in all_rules:
-            if str(rule.get("_id")) in applied:
-                continue
-            replacement = rule.get("replacement", "")
-            explanation = rule.get("explanation", "Applied DB grammar rule.")
-            suggestion = rule.get("suggestion")
-            rx = rule.get("regex")
-            if isinstance(rx, str) and rx:
-                flags_str = (rule.get("flags") or "") if isinstance(rule.get("flags"), str) else ""
-                flags = 0
-                if "i" in flags_str: flags |= re.IGNORECASE
-                if "m" in flags_str: flags |= re.MULTILINE
-                if "s" in flags_str: flags |= re.DOTALL
-                try:
-                    pattern = re.compile(rx, flags)
-                    if pattern.search(text):
-                        new_text = pattern.sub(replacement or rx, text, count=1)
-                        return new_text, new_text != text, {"rule": rule, "explanation": explanation, "suggestion": suggestion, "source": "db.regex"}
-                except re.error:
-                    continue
-            pat = rule.get("pattern")
-            if isinstance(pat, str) and pat:
-                if bool(rule.get("ci")):
-                    idx = text.lower().find(pat.lower())
-                    if idx != -1:
-                        new_text = text[:idx] + (replacement or pat) + text[idx+len(pat):]
-                        return new_text, True, {"rule": rule, "explanation": explanation, "suggestion": suggestion, "source": "db.literal.ci"}
-                elif bool(rule.get("word_boundary")):
-                    try:
-                        wb_rx = re.compile(rf"\\b{re.escape(pat)}\\b")
-                        if wb_rx.search(text):
-                            new_text = wb_rx.sub(replacement or pat, text, count=1)
-                            return new_text, True, {"rule": rule, "explanation": explanation, "suggestion": suggestion, "source": "db.literal.wb"}
-                    except re.error:
-                        pass
-                else:
-                    if pat in text:
-                        new_text = text.replace(pat, replacement or pat, 1)
-                        return new_text, True, {"rule": rule, "explanation": explanation, "suggestion": suggestion, "source": "db.literal"}
-        return text, False, None
+    applied_ranks: set[int] = set()
 
     MAX_STEPS = 3
     for _ in range(MAX_STEPS):
-        new_text, changed, meta = apply_one(current)
+        new_text, changed, meta = rule_set.apply_one(current, applied_ranks)
         if not changed or not meta:
             break
         current = new_text
         r = meta["rule"]
         applied.append(str(r.get("_id")))
+        applied_ranks.add(meta["rank"])
         explanations.append(str(meta.get("explanation") or "Applied DB rule"))
         if meta.get("suggestion"):
             last_suggestion = meta["suggestion"]
@@ -7,7 +7,7 @@ import re
 from typing import List, Tuple, Optional
 from app.models.scenario import Scenario, Character, Objective
 from app.models.conversation_state import ConversationState
-from app.ollama_client import OllamaClient
+from app.ollama_client import OllamaClient, LLMPriority
 
 
 class ConversationEngine:
@@ -93,18 +93,18 @@ AKTUELLE ZIELE: {', '.join(uncompleted_objectives[:2]) if uncompleted_objectives
         messages.append({"role": "user", "content": user_message})
         
         # Use chat API with strict limits for short responses
-        response = await self.ollama.client.chat(
-            model=self.ollama.model,
-            messages=messages,
+        response = await self.ollama.chat(
+            messages,
+            temperature=0.7,
+            max_tokens=25,  # Strict limit for short responses
             options={
-                'temperature': 0.7,
-                'num_predict': 25,  # Strict limit for short responses
                 'top_p': 0.9,
                 'top_k': 40,
                 'repeat_penalty': 1.2,  # Higher to avoid repetition
                 'num_ctx': 1024,
                 'stop': ['\n', 'Gast:', 'User:', '\n\n'],  # Stop tokens to prevent format leaking
-            }
+            },
+            priority=LLMPriority.INTERACTIVE
         )
         
         ai_response = response.get('message', {}).get('content', '').strip()
@@ -155,19 +155,19 @@ AKTUELLE ZIELE: {', '.join(uncompleted_objectives[:2]) if uncompleted_objectives
         messages.append({"role": "user", "content": user_message})
         
         # Use chat API with streaming and strict limits
-        stream = await self.ollama.client.chat(
-            model=self.ollama.model,
-            messages=messages,
+        stream = await self.ollama.chat(
+            messages,
+            temperature=0.7,
+            max_tokens=25,  # Strict limit for short responses
             options={
-                'temperature': 0.7,
-                'num_predict': 25,  # Strict limit for short responses
                 'top_p': 0.9,
                 'top_k': 40,
                 'repeat_penalty': 1.2,  # Higher to avoid repetition
                 'num_ctx': 1024,
                 'stop': ['\n', 'Gast:', 'User:', '\n\n'],  # Stop tokens
             },
-            stream=True
+            stream=True,
+            priority=LLMPriority.INTERACTIVE
         )
         
         # Stream the response with format cleaning
@@ -230,7 +230,7 @@ AKTUELLE ZIELE: {', '.join(uncompleted_objectives[:2]) if uncompleted_objectives
             if any(word in obj_desc_lower for word in ['fragen', 'antwort', 'question']):
                 # Count how many other objectives are already completed
                 completed_count = sum(1 for op in state.objectives_progress if op.completed)
-                total_messages = len(state.messages)
+                total_messages = state.total_messages
                 
                 # If most objectives are done and user has been actively participating (5+ messages)
                 # mark this objective as complete
@@ -0,0 +1,146 @@
+"""
+Streaming GDPR data export
+
+Each collection cursor is read in batches and written as NDJSON straight
+into a deflated zip archive that is uploaded to GridFS chunk by chunk, so
+memory stays bounded by one batch regardless of account size.
+"""
+import io
+import json
+import zipfile
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase, AsyncIOMotorGridFSBucket
+
+EXPORT_BUCKET = "data_exports"
+EXPORT_BATCH_SIZE = 500
+
+# (request flag, archive entry name, collection)
+EXPORT_SECTIONS = [
+    ("include_scenarios", "scenarios", "conversation_states"),
+    ("include_scenarios", "scenario_message_archive", "conversation_message_archive"),
+    ("include_achievements", "achievements", "user_achievements"),
+    ("include_vocabulary", "vocabulary_progress", "vocabulary_progress"),
+    ("include_reviews", "review_cards", "review_cards"),
+    ("include_conversations", "conversations", "conversations"),
+]
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only, non-seekable buffer that the zip writer fills and we drain"""
+
+    def __init__(self):
+        self._buffer = bytearray()
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._buffer.extend(data)
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = bytes(self._buffer)
+        self._buffer.clear()
+        return data
+
+
+def _to_oid(value: Any) -> Any:
+    return ObjectId(value) if isinstance(value, str) and ObjectId.is_valid(value) else value
+
+
+def _dump(doc: Dict[str, Any]) -> bytes:
+    return (json.dumps(doc, default=str, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+def export_bucket(db: AsyncIOMotorDatabase) -> AsyncIOMotorGridFSBucket:
+    return AsyncIOMotorGridFSBucket(db, bucket_name=EXPORT_BUCKET)
+
+
+async def write_export_archive(
+    db: AsyncIOMotorDatabase,
+    export_id: str,
+    user_id: str,
+    options: Any
+) -> Dict[str, Any]:
+    """
+    Build the export zip in GridFS
+    Returns: {file_id, filename, size_bytes, counts}
+    """
+    filename = f"german-ai-export-{user_id}-{datetime.utcnow().strftime('%Y%m%d%H%M%S')}.zip"
+    grid_in = export_bucket(db).open_upload_stream(
+        filename,
+        metadata={"user_id": user_id, "export_id": export_id, "content_type": "application/zip"}
+    )
+    sink = _ChunkSink()
+    counts: Dict[str, int] = {}
+
+    async def flush():
+        data = sink.drain()
+        if data:
+            await grid_in.write(data)
+
+    try:
+        with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+            user = await db["users"].find_one({"_id": _to_oid(user_id)}, {"password_hash": 0})
+            if user:
+                archive.writestr("profile.json", json.dumps(user, default=str, indent=2))
+            stats = await db["user_stats"].find_one({"user_id": user_id})
+            if stats:
+                archive.writestr("statistics.json", json.dumps(stats, default=str, indent=2))
+            await flush()
+
+            for flag, name, collection in EXPORT_SECTIONS:
+                if not getattr(options, flag, True):
+                    continue
+                count = 0
+                with archive.open(f"{name}.ndjson", "w", force_zip64=True) as entry:
+                    cursor = db[collection].find({"user_id": user_id}).batch_size(EXPORT_BATCH_SIZE)
+                    async for doc in cursor:
+                        entry.write(_dump(doc))
+                        count += 1
+                        if count % EXPORT_BATCH_SIZE == 0:
+                            await flush()
+                counts[name] = count
+                await flush()
+
+            archive.writestr("manifest.json", json.dumps({
+                "user_id": user_id,
+                "generated_at": datetime.utcnow().isoformat(),
+                "format": "ndjson",
+                "counts": counts
+            }, indent=2))
+        await flush()
+        await grid_in.close()
+    except BaseException:
+        await grid_in.abort()
+        raise
+
+    return {
+        "file_id": grid_in._id,
+        "filename": filename,
+        "size_bytes": grid_in.length,
+        "counts": counts
+    }
+
+
+async def stream_export_file(db: AsyncIOMotorDatabase, file_id: ObjectId) -> AsyncIterator[bytes]:
+    """Yield a stored export one GridFS chunk at a time"""
+    grid_out = await export_bucket(db).open_download_stream(file_id)
+    while True:
+        chunk = await grid_out.readchunk()
+        if not chunk:
+            break
+        yield chunk
+
+
+async def delete_user_exports(db: AsyncIOMotorDatabase, user_id: str) -> int:
+    """Remove every stored export file for a user"""
+    bucket = export_bucket(db)
+    deleted = 0
+    async for grid_out in bucket.find({"metadata.user_id": user_id}):
+        await bucket.delete(grid_out._id)
+        deleted += 1
+    return deleted
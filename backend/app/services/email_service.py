@@ -5,11 +5,15 @@ Email campaigns, newsletters, and automated sequences
 from typing import List, Dict, Any, Optional
 from datetime import datetime, timedelta
 from pydantic import BaseModel, EmailStr
-import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 import os
 
+from app.services.mail_queue import CompiledTemplate, mail_queue
+
+# (subject, text, html) per template name, compiled on first use
+_COMPILED_TEMPLATES: Dict[str, tuple] = {}
+
 
 class EmailTemplate(BaseModel):
     """Email template model"""
@@ -35,10 +39,6 @@ class EmailService:
     
     def __init__(self, db):
         self.db = db
-        self.smtp_host = os.getenv("SMTP_HOST", "smtp.gmail.com")
-        self.smtp_port = int(os.getenv("SMTP_PORT", "587"))
-        self.smtp_user = os.getenv("SMTP_USER", "")
-        self.smtp_password = os.getenv("SMTP_PASSWORD", "")
         self.from_email = os.getenv("FROM_EMAIL", "noreply@german-ai.com")
         self.from_name = os.getenv("FROM_NAME", "German AI")
         
@@ -227,60 +227,48 @@ class EmailService:
         </html>
         """
     
+    def _compiled(self, template: EmailTemplate) -> tuple:
+        compiled = _COMPILED_TEMPLATES.get(template.name)
+        if compiled is None:
+            compiled = (
+                CompiledTemplate(template.subject),
+                CompiledTemplate(template.text_content),
+                CompiledTemplate(template.html_content)
+            )
+            _COMPILED_TEMPLATES[template.name] = compiled
+        return compiled
+    
+    def render(self, to_email: str, template_name: str, variables: Dict[str, Any]) -> MIMEMultipart:
+        """Build the message for a template"""
+        template = self.templates.get(template_name)
+        if not template:
+            raise Exception(f"Template {template_name} not found")
+        
+        subject_t, text_t, html_t = self._compiled(template)
+        
+        # Create message
+        msg = MIMEMultipart("alternative")
+        msg["Subject"] = subject_t.render(variables)
+        msg["From"] = f"{self.from_name} <{self.from_email}>"
+        msg["To"] = to_email
+        
+        # Attach parts
+        msg.attach(MIMEText(text_t.render(variables), "plain"))
+        msg.attach(MIMEText(html_t.render(variables), "html"))
+        return msg
+    
     async def send_email(
         self,
         to_email: str,
         template_name: str,
         variables: Dict[str, Any]
     ) -> bool:
-        """Send an email using a template"""
+        """Queue an email using a template; delivery and logging happen in the mail queue"""
         try:
-            template = self.templates.get(template_name)
-            if not template:
-                raise Exception(f"Template {template_name} not found")
-            
-            # Replace variables in content
-            html_content = template.html_content
-            text_content = template.text_content
-            subject = template.subject
-            
-            for key, value in variables.items():
-                placeholder = f"{{{{{key}}}}}"
-                html_content = html_content.replace(placeholder, str(value))
-                text_content = text_content.replace(placeholder, str(value))
-                subject = subject.replace(placeholder, str(value))
-            
-            # Create message
-            msg = MIMEMultipart("alternative")
-            msg["Subject"] = subject
-            msg["From"] = f"{self.from_name} <{self.from_email}>"
-            msg["To"] = to_email
-            
-            # Attach parts
-            part1 = MIMEText(text_content, "plain")
-            part2 = MIMEText(html_content, "html")
-            msg.attach(part1)
-            msg.attach(part2)
-            
-            # Send email (mock in development)
-            if os.getenv("ENVIRONMENT") == "production" and self.smtp_user:
-                with smtplib.SMTP(self.smtp_host, self.smtp_port) as server:
-                    server.starttls()
-                    server.login(self.smtp_user, self.smtp_password)
-                    server.send_message(msg)
-            else:
-                # Log email in development
-                print(f"[EMAIL] To: {to_email}, Subject: {subject}")
-            
-            # Log email sent
-            await self.db["email_logs"].insert_one({
-                "to_email": to_email,
-                "template_name": template_name,
-                "subject": subject,
-                "sent_at": datetime.utcnow(),
-                "status": "sent"
-            })
-            
+            msg = self.render(to_email, template_name, variables)
+            if not mail_queue.running:
+                await mail_queue.start(self.db)
+            await mail_queue.enqueue(msg, template_name)
             return True
         
         except Exception as e:
@@ -343,15 +331,16 @@ class EmailService:
             "last_active": {"$lt": seven_days_ago}
         }).to_list(length=1000)
         
+        # One query for everyone we already re-engaged recently
+        recently_emailed = set(await self.db["email_logs"].distinct("to_email", {
+            "to_email": {"$in": [user["email"] for user in inactive_users]},
+            "template_name": "re_engagement",
+            "status": "sent",
+            "sent_at": {"$gte": datetime.utcnow() - timedelta(days=14)}
+        }))
+        
         for user in inactive_users:
-            # Check if we already sent re-engagement email recently
-            recent_email = await self.db["email_logs"].find_one({
-                "to_email": user["email"],
-                "template_name": "re_engagement",
-                "sent_at": {"$gte": datetime.utcnow() - timedelta(days=14)}
-            })
-            
-            if not recent_email:
+            if user["email"] not in recently_emailed:
                 await self.send_email(
                     to_email=user["email"],
                     template_name="re_engagement",
@@ -368,9 +357,16 @@ class EmailService:
             "last_active": {"$gte": datetime.utcnow() - timedelta(days=7)}
         }).to_list(length=10000)
         
+        # Get all their stats in one query
+        stats_by_user = {}
+        async for stats in self.db["user_stats"].find(
+            {"user_id": {"$in": [str(user["_id"]) for user in users]}},
+            {"user_id": 1, "scenarios_completed": 1, "words_learned": 1, "current_streak": 1}
+        ):
+            stats_by_user[stats["user_id"]] = stats
+        
         for user in users:
-            # Get user stats
-            stats = await self.db["user_stats"].find_one({"user_id": str(user["_id"])})
+            stats = stats_by_user.get(str(user["_id"]))
             if stats:
                 await self.send_email(
                     to_email=user["email"],
@@ -4,10 +4,24 @@ Gamification service for XP, levels, streaks, and rewards
 from datetime import datetime, date, timedelta
 from typing import Optional, List, Dict, Any
 from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReturnDocument
 from ..models.gamification import (
     UserLevel, XPEvent, DailyStreak, WeeklyChallenge, UserChallenge,
     Leaderboard, XP_REWARDS, calculate_xp_for_level, calculate_level_from_xp
 )
+from .xp_ledger import emit_xp, USER_LEVELS
+
+# user_levels counter bumped alongside total_xp for each event type
+EVENT_COUNTERS = {
+    "lesson_complete": "total_lessons_completed",
+    "quiz_complete": "total_quizzes_completed",
+    "quiz_perfect": "total_quizzes_completed",
+    "scenario_complete": "total_scenarios_completed",
+    "scenario_perfect": "total_scenarios_completed",
+    "review_correct": "total_reviews_completed",
+    "review_session": "total_reviews_completed",
+    "word_learned": "total_words_learned",
+}
 
 
 class GamificationService:
@@ -21,15 +35,14 @@ class GamificationService:
     
     async def get_or_create_user_level(self, user_id: str) -> UserLevel:
         """Get or create user level data"""
-        user_level = await self.user_levels.find_one({"user_id": user_id})
-        
-        if not user_level:
-            user_level = UserLevel(user_id=user_id)
-            await self.user_levels.insert_one(user_level.dict())
-        else:
-            user_level = UserLevel(**user_level)
-        
-        return user_level
+        # Upsert so concurrent first requests cannot create duplicates
+        user_level = await self.user_levels.find_one_and_update(
+            {"user_id": user_id},
+            {"$setOnInsert": UserLevel(user_id=user_id).dict()},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        return UserLevel(**user_level)
     
     async def award_xp(
         self,
@@ -39,7 +52,12 @@ class GamificationService:
         description: Optional[str] = None,
         metadata: Dict[str, Any] = {}
     ) -> Dict[str, Any]:
-        """Award XP to user and handle level ups"""
+        """Award XP to user and handle level ups
+
+        The XP is applied asynchronously through the ledger, so total_xp and
+        level in the response are projected from the stored totals plus this
+        award; other awards still pending in the ledger are not included.
+        """
         
         # Get XP amount
         xp_earned = custom_xp if custom_xp else XP_REWARDS.get(event_type, 0)
@@ -47,7 +65,7 @@ class GamificationService:
         if xp_earned == 0:
             return {"success": False, "message": "Invalid event type"}
         
-        # Get user level
+        # Get user level (snapshot for the response; the ledger applies the $inc)
         user_level = await self.get_or_create_user_level(user_id)
         
         # Calculate new XP and level
@@ -61,31 +79,12 @@ class GamificationService:
         current_xp = new_total_xp - xp_for_current_level
         next_level_xp = xp_for_next_level - xp_for_current_level
         
-        # Update user level
-        update_data = {
-            "total_xp": new_total_xp,
-            "level": new_level,
-            "current_xp": current_xp,
-            "next_level_xp": next_level_xp,
-            "updated_at": datetime.utcnow()
-        }
-        
         # Update statistics based on event type
-        if event_type == "lesson_complete":
-            update_data["total_lessons_completed"] = user_level.total_lessons_completed + 1
-        elif event_type in ["quiz_complete", "quiz_perfect"]:
-            update_data["total_quizzes_completed"] = user_level.total_quizzes_completed + 1
-        elif event_type in ["scenario_complete", "scenario_perfect"]:
-            update_data["total_scenarios_completed"] = user_level.total_scenarios_completed + 1
-        elif event_type in ["review_correct", "review_session"]:
-            update_data["total_reviews_completed"] = user_level.total_reviews_completed + 1
-        elif event_type == "word_learned":
-            update_data["total_words_learned"] = user_level.total_words_learned + 1
-        
-        await self.user_levels.update_one(
-            {"user_id": user_id},
-            {"$set": update_data}
-        )
+        inc = {"total_xp": xp_earned}
+        counter = EVENT_COUNTERS.get(event_type)
+        if counter:
+            inc[counter] = 1
+        await emit_xp(self.db, user_id, USER_LEVELS, inc, source=event_type)
         
         # Log XP event
         xp_event = XPEvent(
@@ -387,14 +386,12 @@ class GamificationService:
         )
         
         # Award coins and gems
-        await self.user_levels.update_one(
-            {"user_id": user_id},
-            {
-                "$inc": {
-                    "coins": challenge["coin_reward"],
-                    "gems": challenge.get("gem_reward", 0)
-                }
-            }
+        await emit_xp(
+            self.db,
+            user_id,
+            USER_LEVELS,
+            {"coins": challenge["coin_reward"], "gems": challenge.get("gem_reward", 0)},
+            source="challenge_reward"
         )
         
         # Mark as claimed
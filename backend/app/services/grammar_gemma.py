@@ -2,11 +2,14 @@
 Grammar checking using Gemma 2 model
 Clean implementation without rule-based dependencies
 """
-import ollama
+import hashlib
 import json
 from typing import Optional
 from .typing_utils import SentenceResult
 from ..config import get_settings
+from ..ollama_client import LLMPriority, ollama_client
+from ..redis_client import redis_client
+from .metrics import metrics
 
 def _tokenize_words(s: str) -> list[str]:
     import re as _re
@@ -40,23 +43,9 @@ def _align_words(a: str, b: str) -> list[dict]:
     out.reverse()
     return out
 
-async def check_grammar_with_gemma(sentence: str) -> SentenceResult:
-    """
-    Check German grammar using Gemma 2 model
-    Returns SentenceResult with corrections and explanations
-    """
-    settings = get_settings()
-    
-    print(f"[GEMMA GRAMMAR] Checking: '{sentence}'")
-    
-    try:
-        # Use Gemma 2 for German grammar checking
-        client = ollama.AsyncClient(host=settings.OLLAMA_HOST)
-        model = settings.OLLAMA_MODEL_GRAMMAR
-        
-        prompt = f"""You are a German grammar expert. Analyze this sentence step by step:
-
-"{sentence}"
+# Static instructions, sent as an identical system message on every call so
+# Ollama can reuse the evaluated prompt prefix; only the sentence varies
+GRAMMAR_SYSTEM_PROMPT = """You are a German grammar expert. Analyze the sentence you are given step by step.
 
 ═══════════════════════════════════════════════════════════════
 STEP 1: SUBJECT-VERB AGREEMENT (CRITICAL!)
@@ -121,20 +110,52 @@ FINAL RULES:
 - Fix ONLY actual grammar errors, not style
 
 Return ONLY this JSON:
-{{
+{
   "is_correct": true/false,
   "corrected": "corrected sentence",
   "explanation": "what was wrong",
   "suggested_variation": "alternative phrasing",
   "tips": ["grammar tip"]
-}}
+}"""
+GRAMMAR_SYSTEM_MESSAGE = {"role": "system", "content": GRAMMAR_SYSTEM_PROMPT}
+
+# Cached results are keyed by prompt version so editing the prompt invalidates them
+_PROMPT_VERSION = hashlib.sha256(GRAMMAR_SYSTEM_PROMPT.encode()).hexdigest()[:12]
+
+def _normalize_sentence(sentence: str) -> str:
+    return " ".join((sentence or "").split())
 
-JSON:"""
+def _cache_key(sentence: str, model: str) -> str:
+    digest = hashlib.sha256(f"{model}:{sentence}".encode()).hexdigest()
+    return f"grammar:gemma:{_PROMPT_VERSION}:{digest}"
+
+async def check_grammar_with_gemma(sentence: str) -> SentenceResult:
+    """
+    Check German grammar using Gemma 2 model
+    Returns SentenceResult with corrections and explanations
+    """
+    settings = get_settings()
+    
+    print(f"[GEMMA GRAMMAR] Checking: '{sentence}'")
+    
+    try:
+        # Use Gemma 2 for German grammar checking
+        model = settings.OLLAMA_MODEL_GRAMMAR
+        normalized = _normalize_sentence(sentence)
+        cache_key = _cache_key(normalized, model)
+        cached = await redis_client.get_json(cache_key)
+        if cached:
+            print("[GEMMA GRAMMAR] Cache hit")
+            metrics.inc("ai_cache_hits_total", source="grammar")
+            return SentenceResult(**{**cached, "original": sentence})
+        
+        messages = [
+            GRAMMAR_SYSTEM_MESSAGE,
+            {"role": "user", "content": f'Sentence: "{normalized}"\n\nJSON:'}
+        ]
         
-        response = await client.chat(
-            model=model,
-            messages=[{"role": "user", "content": prompt}],
-            options={"temperature": 0.0}
+        response = await ollama_client.chat(
+            messages, temperature=0.0, model=model, priority=LLMPriority.GRAMMAR
         )
         
         content = response.get('message', {}).get('content', '').strip()
@@ -177,25 +198,25 @@ JSON:"""
         
         # Extract and validate data
         is_correct = bool(data.get('is_correct', False))
-        corrected = str(data.get('corrected') or sentence).strip()
+        corrected = str(data.get('corrected') or normalized).strip()
         explanation = str(data.get('explanation') or "Grammar check completed").strip()
         suggested_variation = str(data.get('suggested_variation') or corrected).strip()
         tips = [str(t).strip() for t in (data.get('tips') or []) if isinstance(t, (str, int, float))][:3]
         
         # Validate: if corrected differs from original, mark as incorrect
-        if corrected.lower().strip() != sentence.lower().strip():
+        if corrected.lower().strip() != normalized.lower():
             is_correct = False
         
         # Validate: if AI says correct but made changes, override
-        if is_correct and corrected != sentence:
+        if is_correct and corrected != normalized:
             is_correct = False
         
-        highlights = _align_words(sentence, corrected)
+        highlights = _align_words(normalized, corrected)
         result_source = "ok" if is_correct else "ai_gemma2"
         
         print(f"[GEMMA GRAMMAR] Result: is_correct={is_correct}, corrected='{corrected}'")
         
-        return SentenceResult(
+        result = SentenceResult(
             original=sentence,
             corrected=corrected,
             explanation=explanation,
@@ -205,6 +226,8 @@ JSON:"""
             tips=tips or None,
             rule_source="gemma2_9b",
         )
+        await redis_client.set_json(cache_key, result.model_dump(), expire=settings.GRAMMAR_CACHE_TTL)
+        return result
         
     except Exception as e:
         print(f"[GEMMA GRAMMAR] Error: {e}")
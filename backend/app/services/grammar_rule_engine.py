@@ -0,0 +1,245 @@
+"""
+Compiled DB grammar rules
+
+grammar_rules documents are loaded once per process and compiled into an
+Aho–Corasick automaton over the literal patterns plus precompiled regexes,
+so each correction pass is one scan of the sentence instead of a find/
+re.compile per rule. The compiled set is reloaded when the rules version
+stamp in cache_versions changes; anything that writes grammar_rules calls
+bump_rules_version().
+"""
+import asyncio
+import re
+import time
+from collections import deque
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+RULES_QUERY = {"$or": [{"pattern": {"$exists": True}}, {"regex": {"$exists": True}}]}
+RULES_PROJECTION = {
+    "_id": 1, "pattern": 1, "replacement": 1, "explanation": 1, "suggestion": 1, "regex": 1, "flags": 1,
+    "priority": 1, "ci": 1, "word_boundary": 1,
+}
+MAX_RULES = 1000
+
+VERSION_COLLECTION = "cache_versions"
+VERSION_KEY = "grammar_rules"
+# How often a process re-reads the version stamp
+VERSION_CHECK_SECONDS = 5.0
+
+# Literal kinds
+LITERAL = "db.literal"
+LITERAL_CI = "db.literal.ci"
+LITERAL_WB = "db.literal.wb"
+
+
+def _regex_flags(flags_str: Any) -> int:
+    flags = 0
+    if not isinstance(flags_str, str):
+        return flags
+    if "i" in flags_str: flags |= re.IGNORECASE
+    if "m" in flags_str: flags |= re.MULTILINE
+    if "s" in flags_str: flags |= re.DOTALL
+    return flags
+
+
+class LiteralAutomaton:
+    """Aho–Corasick automaton reporting the first start offset of every key"""
+
+    def __init__(self, keys: Iterable[Tuple[str, int]]):
+        # Node 0 is the root; outputs[node] = [(key id, key length), ...]
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[Tuple[int, int]]] = [[]]
+        for text, key_id in keys:
+            node = 0
+            for ch in text:
+                nxt = self._goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[node][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                node = nxt
+            self._out[node].append((key_id, len(text)))
+
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(ch, 0)
+                self._fail[child] = target if target != child else 0
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+    def __bool__(self) -> bool:
+        return len(self._goto) > 1
+
+    def scan(self, text: str) -> Dict[int, List[int]]:
+        """key id -> start offsets of every occurrence, in order"""
+        hits: Dict[int, List[int]] = {}
+        goto, fail, out = self._goto, self._fail, self._out
+        node = 0
+        for i, ch in enumerate(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            for key_id, length in out[node]:
+                hits.setdefault(key_id, []).append(i - length + 1)
+        return hits
+
+
+class CompiledRule:
+    """One grammar_rules document, precompiled"""
+
+    __slots__ = ("rank", "id", "rule", "regex", "regex_replacement", "pattern", "kind",
+                 "replacement", "word_regex")
+
+    def __init__(self, rank: int, rule: Dict[str, Any]):
+        self.rank = rank
+        self.id = str(rule.get("_id"))
+        self.rule = rule
+        self.regex = None
+        self.regex_replacement = None
+        self.pattern = None
+        self.kind = None
+        self.replacement = None
+        self.word_regex = None
+
+        rx = rule.get("regex")
+        if isinstance(rx, str) and rx:
+            # Invalid regexes raise re.error and the rule is skipped, as before
+            self.regex = re.compile(rx, _regex_flags(rule.get("flags")))
+            self.regex_replacement = rule.get("replacement", "") or rx
+
+        pat = rule.get("pattern")
+        if isinstance(pat, str) and pat:
+            self.pattern = pat
+            self.replacement = rule.get("replacement", "") or pat
+            if bool(rule.get("ci")):
+                self.kind = LITERAL_CI
+            elif bool(rule.get("word_boundary")):
+                self.kind = LITERAL_WB
+                self.word_regex = re.compile(rf"\b{re.escape(pat)}\b")
+            else:
+                self.kind = LITERAL
+
+    def meta(self, source: str) -> Dict[str, Any]:
+        return {
+            "rule": self.rule,
+            "explanation": self.rule.get("explanation", "Applied DB grammar rule."),
+            "suggestion": self.rule.get("suggestion"),
+            "source": source,
+            "rank": self.rank,
+        }
+
+
+class CompiledRuleSet:
+    """Priority-ordered rules with one literal scan per pass"""
+
+    def __init__(self, rules: List[Dict[str, Any]], version: int = 0):
+        self.version = version
+        self.rules: List[CompiledRule] = []
+        for rule in rules:
+            try:
+                self.rules.append(CompiledRule(len(self.rules), rule))
+            except re.error:
+                continue
+        self._regex_rules = [r for r in self.rules if r.regex is not None]
+        self._exact = LiteralAutomaton((r.pattern, r.rank) for r in self.rules if r.kind in (LITERAL, LITERAL_WB))
+        self._folded = LiteralAutomaton((r.pattern.lower(), r.rank) for r in self.rules if r.kind == LITERAL_CI)
+
+    def __len__(self) -> int:
+        return len(self.rules)
+
+    def _literal_hits(self, text: str) -> Dict[int, int]:
+        """rank -> start offset of the first applicable literal occurrence"""
+        hits: Dict[int, int] = {}
+        if self._exact:
+            for rank, starts in self._exact.scan(text).items():
+                rule = self.rules[rank]
+                if rule.kind == LITERAL_WB:
+                    found = rule.word_regex.search(text)
+                    if found:
+                        hits[rank] = found.start()
+                else:
+                    hits[rank] = starts[0]
+        if self._folded:
+            for rank, starts in self._folded.scan(text.lower()).items():
+                hits[rank] = starts[0]
+        return hits
+
+    def apply_one(self, text: str, applied: Set[int]) -> Tuple[str, bool, Optional[Dict[str, Any]]]:
+        """
+        Apply the highest-priority rule (not in `applied`) that matches.
+        Returns (new_text, changed, meta) like the former per-rule loop.
+        """
+        hits = self._literal_hits(text)
+        skip = set(applied)
+        end = len(self.rules)
+        while True:
+            best = min((rank for rank in hits if rank not in skip), default=end)
+            retry = False
+            # A rule's regex is tried before its literal, so regex rules up to and including `best`
+            for rule in self._regex_rules:
+                if rule.rank > best:
+                    break
+                if rule.rank in skip or not rule.regex.search(text):
+                    continue
+                try:
+                    new_text = rule.regex.sub(rule.regex_replacement, text, count=1)
+                except re.error:
+                    skip.add(rule.rank)
+                    retry = True
+                    break
+                return new_text, new_text != text, rule.meta("db.regex")
+            if retry:
+                continue
+            if best == end:
+                return text, False, None
+
+            rule = self.rules[best]
+            idx = hits[best]
+            if rule.kind == LITERAL_WB:
+                new_text = rule.word_regex.sub(rule.replacement, text, count=1)
+            else:
+                new_text = text[:idx] + rule.replacement + text[idx + len(rule.pattern):]
+            return new_text, True, rule.meta(rule.kind)
+
+
+_rule_set: Optional[CompiledRuleSet] = None
+_checked_at = 0.0
+_lock = asyncio.Lock()
+
+
+async def _current_version(db) -> int:
+    doc = await db[VERSION_COLLECTION].find_one({"_id": VERSION_KEY}, {"version": 1})
+    return int(doc.get("version", 0)) if doc else 0
+
+
+async def get_rule_set(db) -> CompiledRuleSet:
+    """Process-wide compiled rules, reloaded when the version stamp moves"""
+    global _rule_set, _checked_at
+    if _rule_set is not None and time.monotonic() - _checked_at < VERSION_CHECK_SECONDS:
+        return _rule_set
+    async with _lock:
+        if _rule_set is not None and time.monotonic() - _checked_at < VERSION_CHECK_SECONDS:
+            return _rule_set
+        version = await _current_version(db)
+        if _rule_set is None or _rule_set.version != version:
+            rules = await db["grammar_rules"].find(RULES_QUERY, RULES_PROJECTION).sort(
+                [("priority", -1)]
+            ).limit(MAX_RULES).to_list(length=MAX_RULES)
+            _rule_set = CompiledRuleSet(rules, version)
+        _checked_at = time.monotonic()
+    return _rule_set
+
+
+async def bump_rules_version(db) -> None:
+    """Mark grammar_rules as changed so every process recompiles"""
+    global _rule_set
+    await db[VERSION_COLLECTION].update_one({"_id": VERSION_KEY}, {"$inc": {"version": 1}}, upsert=True)
+    _rule_set = None
@@ -7,6 +7,8 @@ from typing import List, Dict, Any, Optional
 from datetime import datetime
 from bson import ObjectId
 
+from .grammar_rule_engine import bump_rules_version
+
 
 class GrammarService:
     """Service for managing grammar rules"""
@@ -31,6 +33,7 @@ class GrammarService:
         # Insert rules
         rules_data = [rule.dict(by_alias=True, exclude={"id"}) for rule in rules]
         result = await self.rules_collection.insert_many(rules_data)
+        await bump_rules_version(self.db)
         
         return {
             "message": "Grammar rules initialized successfully",
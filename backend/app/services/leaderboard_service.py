@@ -0,0 +1,258 @@
+"""
+Leaderboard service backed by Redis sorted sets
+
+Boards are kept up to date by AchievementService as XP, streaks and scenario
+completions change, so ranking is ZREVRANGE / ZREVRANK instead of sorting and
+counting user_stats on every request. Weekly and monthly boards are rolling
+unions of per-day XP buckets. When Redis is unavailable every read falls back
+to MongoDB.
+"""
+import json
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from ..redis_client import redis_client
+
+logger = logging.getLogger(__name__)
+
+# Board name -> user_stats field it mirrors
+BOARD_FIELDS = {
+    "xp": "total_xp",
+    "streak": "current_streak",
+    "scenarios": "scenarios_completed",
+}
+PERIOD_DAYS = {"weekly": 7, "monthly": 30}
+
+DAY_BUCKET_TTL = 32 * 86400
+PERIOD_BOARD_TTL = 60
+PROFILE_CACHE_KEY = "lb:profiles"
+PROFILE_CACHE_TTL = 3600
+
+
+def _board_key(board: str) -> str:
+    return f"lb:{board}"
+
+
+def _day_key(day: datetime) -> str:
+    return f"lb:xp:day:{day.strftime('%Y%m%d')}"
+
+
+def _period_key(period: str) -> str:
+    return f"lb:xp:{period}"
+
+
+def _user_oid(user_id: str) -> Any:
+    return ObjectId(user_id) if ObjectId.is_valid(user_id) else user_id
+
+
+class LeaderboardService:
+    """Service for reading and updating leaderboards"""
+
+    def __init__(self, db: AsyncIOMotorDatabase):
+        self.db = db
+        self.user_stats_collection = db.user_stats
+
+    @property
+    def redis(self):
+        return redis_client.client
+
+    # ------------------------------------------------------------------
+    # Writes (called by AchievementService)
+    # ------------------------------------------------------------------
+
+    async def record_xp(self, user_id: str, xp_gained: int, total_xp: int) -> None:
+        """Set the all-time XP score and add the gain to today's bucket"""
+        if not self.redis:
+            return
+        day_key = _day_key(datetime.utcnow())
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.zadd(_board_key("xp"), {user_id: total_xp})
+                if xp_gained:
+                    pipe.zincrby(day_key, xp_gained, user_id)
+                    pipe.expire(day_key, DAY_BUCKET_TTL)
+                await pipe.execute()
+        except Exception as e:
+            logger.error(f"Leaderboard XP update failed: {e}")
+
+    async def record_score(self, board: str, user_id: str, score: float) -> None:
+        """Set a user's score on one of the stat-mirroring boards"""
+        if not self.redis:
+            return
+        try:
+            await self.redis.zadd(_board_key(board), {user_id: score})
+        except Exception as e:
+            logger.error(f"Leaderboard {board} update failed: {e}")
+
+    async def invalidate_profile(self, user_id: str) -> None:
+        """Drop a cached name/avatar after a profile change"""
+        if not self.redis:
+            return
+        try:
+            await self.redis.hdel(PROFILE_CACHE_KEY, user_id)
+        except Exception as e:
+            logger.error(f"Leaderboard profile invalidation failed: {e}")
+
+    async def rebuild(self) -> int:
+        """Backfill the stat-mirroring boards from user_stats"""
+        if not self.redis:
+            return 0
+        projection = {"user_id": 1, **{field: 1 for field in BOARD_FIELDS.values()}}
+        count = 0
+        batch: List[Dict[str, Any]] = []
+
+        async def flush():
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for board, field in BOARD_FIELDS.items():
+                    pipe.zadd(_board_key(board), {s["user_id"]: s.get(field, 0) or 0 for s in batch})
+                await pipe.execute()
+
+        async for stat in self.user_stats_collection.find({}, projection):
+            if not stat.get("user_id"):
+                continue
+            batch.append(stat)
+            count += 1
+            if len(batch) >= 1000:
+                await flush()
+                batch = []
+        if batch:
+            await flush()
+        return count
+
+    async def ensure_boards(self) -> None:
+        """Populate the boards once if Redis starts empty"""
+        if not self.redis:
+            return
+        try:
+            if await self.redis.zcard(_board_key("xp")) == 0:
+                count = await self.rebuild()
+                logger.info(f"Leaderboards rebuilt from user_stats ({count} users)")
+        except Exception as e:
+            logger.warning(f"Leaderboard rebuild skipped: {e}")
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    async def _period_board(self, period: str) -> str:
+        """Union the per-day XP buckets into a short-lived rolling board"""
+        key = _period_key(period)
+        if not await self.redis.exists(key):
+            today = datetime.utcnow()
+            day_keys = [_day_key(today - timedelta(days=d)) for d in range(PERIOD_DAYS[period])]
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.zunionstore(key, day_keys)
+                pipe.expire(key, PERIOD_BOARD_TTL)
+                await pipe.execute()
+        return key
+
+    async def _redis_ranking(
+        self,
+        board: str,
+        user_id: str,
+        limit: int
+    ) -> Tuple[List[Tuple[str, float]], Optional[Tuple[int, float]], int]:
+        key = await self._period_board(board) if board in PERIOD_DAYS else _board_key(board)
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.zrevrange(key, 0, limit - 1, withscores=True)
+            pipe.zrevrank(key, user_id)
+            pipe.zscore(key, user_id)
+            pipe.zcard(key)
+            top, rank, score, total = await pipe.execute()
+        current = (rank + 1, score) if rank is not None else None
+        return [(member, s) for member, s in top], current, total
+
+    async def _mongo_ranking(
+        self,
+        board: str,
+        user_id: str,
+        limit: int
+    ) -> Tuple[List[Tuple[str, float]], Optional[Tuple[int, float]], int]:
+        # Period boards need the day buckets; without Redis they degrade to all-time XP
+        field = BOARD_FIELDS.get(board, "total_xp")
+        stats = await self.user_stats_collection.find(
+            {}, {"user_id": 1, field: 1}
+        ).sort([(field, -1), ("total_xp", -1)]).limit(limit).to_list(length=limit)
+        top = [(s["user_id"], s.get(field, 0) or 0) for s in stats]
+
+        current = None
+        own = await self.user_stats_collection.find_one({"user_id": user_id}, {field: 1})
+        if own:
+            score = own.get(field, 0) or 0
+            higher = await self.user_stats_collection.count_documents({field: {"$gt": score}})
+            current = (higher + 1, score)
+        total = await self.user_stats_collection.estimated_document_count()
+        return top, current, total
+
+    async def get_ranking(
+        self,
+        board: str,
+        user_id: str,
+        limit: int = 100
+    ) -> Tuple[List[Tuple[str, float]], Optional[Tuple[int, float]], int]:
+        """
+        Top entries, the caller's (rank, score) and the board size
+
+        board: xp, streak, scenarios, weekly or monthly
+        """
+        if self.redis:
+            try:
+                return await self._redis_ranking(board, user_id, limit)
+            except Exception as e:
+                logger.error(f"Leaderboard read failed, falling back to MongoDB: {e}")
+        return await self._mongo_ranking(board, user_id, limit)
+
+    async def get_stats(self, user_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """user_stats for many users in one query"""
+        stats = await self.user_stats_collection.find(
+            {"user_id": {"$in": user_ids}},
+            {"user_id": 1, "total_xp": 1, "level": 1, "current_streak": 1, "scenarios_completed": 1}
+        ).to_list(length=len(user_ids))
+        return {s["user_id"]: s for s in stats}
+
+    async def get_profiles(self, user_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Names and avatars for many users: one HMGET against the profile hash,
+        then a single $in query for any misses
+        """
+        profiles: Dict[str, Dict[str, Any]] = {}
+        if not user_ids:
+            return profiles
+
+        if self.redis:
+            try:
+                cached = await self.redis.hmget(PROFILE_CACHE_KEY, user_ids)
+                for uid, raw in zip(user_ids, cached):
+                    if raw:
+                        profiles[uid] = json.loads(raw)
+            except Exception as e:
+                logger.error(f"Leaderboard profile cache read failed: {e}")
+
+        missing = [uid for uid in user_ids if uid not in profiles]
+        if missing:
+            users = await self.db.users.find(
+                {"_id": {"$in": [_user_oid(uid) for uid in missing]}},
+                {"name": 1, "avatar": 1}
+            ).to_list(length=len(missing))
+            fetched = {
+                str(u["_id"]): {"name": u.get("name"), "avatar": u.get("avatar")}
+                for u in users
+            }
+            profiles.update(fetched)
+
+            if fetched and self.redis:
+                try:
+                    async with self.redis.pipeline(transaction=False) as pipe:
+                        pipe.hset(PROFILE_CACHE_KEY, mapping={
+                            uid: json.dumps(p) for uid, p in fetched.items()
+                        })
+                        pipe.expire(PROFILE_CACHE_KEY, PROFILE_CACHE_TTL)
+                        await pipe.execute()
+                except Exception as e:
+                    logger.error(f"Leaderboard profile cache write failed: {e}")
+
+        return profiles
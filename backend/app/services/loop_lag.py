@@ -0,0 +1,80 @@
+"""
+Event-loop lag probe
+
+A background task sleeps for a fixed interval and measures how late it
+wakes up. Any overshoot is time the loop spent running something that did
+not yield (a sync client call, heavy CPU work), so the recent maximum is a
+direct check that nothing blocks the worker.
+"""
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Deque, Dict, Optional
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INTERVAL = 0.05
+DEFAULT_WINDOW = 1200  # Samples kept (one minute at the default interval)
+
+
+class LoopLagProbe:
+    """Samples scheduling delay of the running event loop"""
+
+    def __init__(
+        self,
+        interval: float = DEFAULT_INTERVAL,
+        window: int = DEFAULT_WINDOW,
+        warn_ms: float = settings.LOOP_LAG_WARN_MS
+    ):
+        self.interval = interval
+        self.warn_ms = warn_ms
+        self.samples: Deque[float] = deque(maxlen=window)
+        self.max_ms = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task:
+            return
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def reset(self) -> None:
+        self.samples.clear()
+        self.max_ms = 0.0
+
+    async def _run(self) -> None:
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            lag_ms = max(0.0, (time.perf_counter() - start - self.interval) * 1000)
+            self.samples.append(lag_ms)
+            self.max_ms = max(self.max_ms, lag_ms)
+            if lag_ms > self.warn_ms:
+                logger.warning(f"🐢 Event loop blocked for {lag_ms:.0f} ms")
+
+    def stats(self) -> Dict[str, float]:
+        """Lag over the recent window, in ms"""
+        if not self.samples:
+            return {"samples": 0, "p50_ms": 0.0, "p99_ms": 0.0, "max_ms": 0.0}
+        ordered = sorted(self.samples)
+        return {
+            "samples": len(ordered),
+            "p50_ms": round(ordered[len(ordered) // 2], 2),
+            "p99_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))], 2),
+            "max_ms": round(ordered[-1], 2),
+        }
+
+
+# Global probe instance
+loop_lag_probe = LoopLagProbe()
@@ -0,0 +1,272 @@
+"""
+Outbound mail queue
+
+Rendered messages are queued in process and sent by a few sender tasks,
+each holding one persistent SMTP session (connect + STARTTLS + login once,
+then many messages per session). Sends are throttled to the provider's
+rate limit and the email_logs entries are buffered and written with
+insert_many instead of one insert per message.
+
+smtplib blocks, so every session runs its commands on its own executor
+thread; the event loop only awaits the results.
+"""
+import asyncio
+import logging
+import os
+import re
+import smtplib
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from email.message import Message
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+PLACEHOLDER = re.compile(r"\{\{(\w+)\}\}")
+
+DEFAULT_POOL_SIZE = 4
+DEFAULT_MESSAGES_PER_SESSION = 100  # Most providers cap messages per connection
+SESSION_IDLE_SECONDS = 60  # Reconnect instead of reusing a session the server may have dropped
+QUEUE_MAX = 5000
+LOG_BATCH_SIZE = 200
+LOG_FLUSH_INTERVAL = 1.0
+
+
+class CompiledTemplate:
+    """A {{variable}} template split into literal and variable parts once"""
+
+    def __init__(self, text: str):
+        parts = PLACEHOLDER.split(text)
+        # Even indexes are literals, odd indexes are variable names
+        self._literals = parts[0::2]
+        self._names = parts[1::2]
+
+    def render(self, variables: Dict[str, Any]) -> str:
+        out = [self._literals[0]]
+        for name, literal in zip(self._names, self._literals[1:]):
+            # Unknown variables are left in place, as str.replace did
+            out.append(str(variables[name]) if name in variables else f"{{{{{name}}}}}")
+            out.append(literal)
+        return "".join(out)
+
+
+class SendThrottle:
+    """Spaces sends evenly to stay under `rate` messages per second (0 = off)"""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next = 0.0
+
+    async def wait(self) -> None:
+        if not self.interval:
+            return
+        now = time.monotonic()
+        slot = max(now, self._next)
+        self._next = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+class SMTPSession:
+    """One reusable SMTP connection; only touched from its own thread"""
+
+    def __init__(self, pool: "SMTPSessionPool"):
+        self.pool = pool
+        self.server: Optional[smtplib.SMTP] = None
+        self.sent = 0
+        self.last_used = 0.0
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="smtp")
+
+    def _connect(self) -> None:
+        self.close()
+        server = smtplib.SMTP(self.pool.host, self.pool.port, timeout=self.pool.timeout)
+        if self.pool.starttls:
+            server.starttls()
+        if self.pool.user:
+            server.login(self.pool.user, self.pool.password)
+        self.server = server
+        self.sent = 0
+
+    def send(self, msg: Message) -> None:
+        stale = time.monotonic() - self.last_used > SESSION_IDLE_SECONDS
+        if self.server is None or stale or self.sent >= self.pool.messages_per_session:
+            self._connect()
+        try:
+            self.server.send_message(msg)
+        except smtplib.SMTPServerDisconnected:
+            # Dropped between messages; retry once on a fresh connection
+            self._connect()
+            self.server.send_message(msg)
+        except (smtplib.SMTPRecipientsRefused, smtplib.SMTPResponseException):
+            # The server rejected this message; the session is still usable
+            try:
+                self.server.rset()
+            except smtplib.SMTPException:
+                self.close()
+            raise
+        except Exception:
+            self.close()
+            raise
+        self.sent += 1
+        self.last_used = time.monotonic()
+
+    def close(self) -> None:
+        if self.server is not None:
+            try:
+                self.server.quit()
+            except Exception:
+                pass
+            self.server = None
+
+
+class SMTPSessionPool:
+    """A fixed set of persistent SMTP sessions shared by the sender tasks"""
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        user: str = "",
+        password: str = "",
+        size: int = DEFAULT_POOL_SIZE,
+        starttls: bool = True,
+        messages_per_session: int = DEFAULT_MESSAGES_PER_SESSION,
+        timeout: float = 30
+    ):
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.starttls = starttls
+        self.messages_per_session = messages_per_session
+        self.timeout = timeout
+        self._sessions = [SMTPSession(self) for _ in range(size)]
+        self._idle: asyncio.Queue = asyncio.Queue()
+        for session in self._sessions:
+            self._idle.put_nowait(session)
+
+    @classmethod
+    def from_env(cls) -> "SMTPSessionPool":
+        return cls(
+            host=os.getenv("SMTP_HOST", "smtp.gmail.com"),
+            port=int(os.getenv("SMTP_PORT", "587")),
+            user=os.getenv("SMTP_USER", ""),
+            password=os.getenv("SMTP_PASSWORD", ""),
+            size=int(os.getenv("SMTP_MAX_CONCURRENCY", str(DEFAULT_POOL_SIZE))),
+            starttls=os.getenv("SMTP_STARTTLS", "true").lower() != "false",
+            messages_per_session=int(os.getenv("SMTP_MESSAGES_PER_SESSION", str(DEFAULT_MESSAGES_PER_SESSION)))
+        )
+
+    @property
+    def size(self) -> int:
+        return len(self._sessions)
+
+    async def send(self, msg: Message) -> None:
+        session = await self._idle.get()
+        try:
+            await asyncio.get_running_loop().run_in_executor(session.executor, session.send, msg)
+        finally:
+            self._idle.put_nowait(session)
+
+    async def close(self) -> None:
+        loop = asyncio.get_running_loop()
+        for session in self._sessions:
+            await loop.run_in_executor(session.executor, session.close)
+            session.executor.shutdown(wait=False)
+
+
+class MailQueue:
+    """Queues rendered messages and sends them over pooled SMTP sessions"""
+
+    def __init__(self, pool: Optional[SMTPSessionPool] = None, rate: Optional[float] = None):
+        self.pool = pool
+        self.throttle = SendThrottle(rate if rate is not None else float(os.getenv("SMTP_RATE_LIMIT", "10")))
+        self.db = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._senders: List[asyncio.Task] = []
+        self._flusher: Optional[asyncio.Task] = None
+        self._logs: List[Dict[str, Any]] = []
+
+    @property
+    def running(self) -> bool:
+        return bool(self._senders)
+
+    async def start(self, db) -> None:
+        if self.running:
+            return
+        self.db = db
+        if self.pool is None and os.getenv("ENVIRONMENT") == "production" and os.getenv("SMTP_USER"):
+            self.pool = SMTPSessionPool.from_env()
+        self._queue = asyncio.Queue(maxsize=QUEUE_MAX)
+        senders = self.pool.size if self.pool else 1
+        self._senders = [asyncio.create_task(self._send_loop()) for _ in range(senders)]
+        self._flusher = asyncio.create_task(self._flush_loop())
+        logger.info(f"✉️  Mail queue started ({senders} sender(s), {'SMTP' if self.pool else 'log only'})")
+
+    async def stop(self) -> None:
+        if not self.running:
+            return
+        # Send whatever is already queued before shutting down
+        await self._queue.join()
+        for task in self._senders + [self._flusher]:
+            task.cancel()
+        await asyncio.gather(*self._senders, self._flusher, return_exceptions=True)
+        self._senders = []
+        self._flusher = None
+        await self.flush_logs()
+        if self.pool:
+            await self.pool.close()
+
+    async def enqueue(self, msg: Message, template_name: str) -> None:
+        """Queue one message; waits only if the queue is full"""
+        await self._queue.put((msg, template_name))
+
+    async def join(self) -> None:
+        """Wait until everything queued so far has been sent"""
+        await self._queue.join()
+
+    async def _send_loop(self) -> None:
+        while True:
+            msg, template_name = await self._queue.get()
+            log = {
+                "to_email": msg["To"],
+                "template_name": template_name,
+                "subject": msg["Subject"]
+            }
+            try:
+                await self.throttle.wait()
+                if self.pool:
+                    await self.pool.send(msg)
+                else:
+                    # Log email in development
+                    print(f"[EMAIL] To: {msg['To']}, Subject: {msg['Subject']}")
+                log["status"] = "sent"
+            except Exception as e:
+                log["status"] = "failed"
+                log["error"] = str(e)
+                logger.warning(f"Email to {msg['To']} failed: {e}")
+            finally:
+                log["sent_at"] = datetime.utcnow()
+                self._logs.append(log)
+                self._queue.task_done()
+            if len(self._logs) >= LOG_BATCH_SIZE:
+                await self.flush_logs()
+
+    async def _flush_loop(self) -> None:
+        while True:
+            await asyncio.sleep(LOG_FLUSH_INTERVAL)
+            await self.flush_logs()
+
+    async def flush_logs(self) -> None:
+        if not self._logs or self.db is None:
+            return
+        logs, self._logs = self._logs, []
+        try:
+            await self.db["email_logs"].insert_many(logs, ordered=False)
+        except Exception as e:
+            logger.error(f"Failed to write {len(logs)} email logs: {e}")
+
+
+# Global mail queue instance
+mail_queue = MailQueue()
@@ -0,0 +1,245 @@
+"""
+Incremental marketing analytics rollups
+
+Every tracked event bumps one hourly and one daily bucket document in
+marketing_rollups with a single $inc upsert, keyed by metric plus its
+dimensions (event type, source, tier, A/B test and variant). Point-in-time
+figures such as active subscriptions per tier are kept as "total" gauges
+and moved on each subscription state change. Dashboards sum a handful of
+buckets instead of scanning the raw collections; rebuild() recomputes
+everything from the raw collections for backfills and repairs.
+"""
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional
+
+from pymongo import IndexModel, UpdateOne
+
+ROLLUP_COLLECTION = "marketing_rollups"
+
+HOUR = "hour"
+DAY = "day"
+TOTAL = "total"
+
+# Metrics
+CONVERSION = "conversion"
+INVOICE_PAID = "invoice_paid"
+SUBSCRIPTION_CANCELED = "subscription_canceled"
+ACTIVE_SUBSCRIPTIONS = "active_subscriptions"
+PAID_SUBSCRIPTIONS = "paid_subscriptions"
+AB_ASSIGNMENT = "ab_assignment"
+AB_CONVERSION = "ab_conversion"
+
+DIMENSIONS = ("event_type", "source", "tier", "test_id", "variant")
+
+ROLLUP_INDEXES = [
+    IndexModel(
+        [("granularity", 1), ("bucket", 1), ("metric", 1)] + [(d, 1) for d in DIMENSIONS],
+        unique=True
+    ),
+    IndexModel([("metric", 1), ("granularity", 1), ("bucket", 1)]),
+]
+
+
+def hour_bucket(when: datetime) -> datetime:
+    return when.replace(minute=0, second=0, microsecond=0)
+
+
+def day_bucket(when: datetime) -> datetime:
+    return when.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _key(granularity: str, bucket: Optional[datetime], metric: str, **dims) -> Dict[str, Any]:
+    key = {"granularity": granularity, "bucket": bucket, "metric": metric}
+    for dim in DIMENSIONS:
+        key[dim] = dims.get(dim)
+    return key
+
+
+def _window_match(start: datetime) -> Dict[str, Any]:
+    """
+    Hourly buckets for the partial first day, daily buckets after that,
+    so a N-day window touches at most 24 + N buckets per key
+    """
+    first_midnight = day_bucket(start) + timedelta(days=1)
+    return {"$or": [
+        {"granularity": HOUR, "bucket": {"$gte": hour_bucket(start), "$lt": first_midnight}},
+        {"granularity": DAY, "bucket": {"$gte": first_midnight}},
+    ]}
+
+
+def _counts_tier(subscription: Optional[Dict[str, Any]]) -> Dict[str, Optional[str]]:
+    """Which gauges a subscription document contributes to"""
+    if not subscription:
+        return {"paid": None, "active": None}
+    tier = subscription.get("tier", "free")
+    if tier == "free":
+        return {"paid": None, "active": None}
+    return {"paid": tier, "active": tier if subscription.get("status") == "active" else None}
+
+
+class MarketingRollupService:
+    """Writes and reads pre-aggregated marketing metrics"""
+
+    def __init__(self, db):
+        self.db = db
+        self.collection = db[ROLLUP_COLLECTION]
+
+    # Writes
+
+    def _bucket_ops(self, when: datetime, metric: str, value: float = 0, **dims) -> List[UpdateOne]:
+        inc = {"count": 1, "value": value}
+        return [
+            UpdateOne(_key(HOUR, hour_bucket(when), metric, **dims), {"$inc": inc}, upsert=True),
+            UpdateOne(_key(DAY, day_bucket(when), metric, **dims), {"$inc": inc}, upsert=True),
+        ]
+
+    def _gauge_op(self, metric: str, delta: int, **dims) -> UpdateOne:
+        return UpdateOne(_key(TOTAL, None, metric, **dims), {"$inc": {"count": delta}}, upsert=True)
+
+    async def _write(self, ops: List[UpdateOne]) -> None:
+        if ops:
+            await self.collection.bulk_write(ops, ordered=False)
+
+    async def record_conversion(
+        self,
+        event_type: str,
+        source: Optional[str] = None,
+        when: Optional[datetime] = None
+    ) -> None:
+        await self._write(self._bucket_ops(
+            when or datetime.utcnow(), CONVERSION, event_type=event_type, source=source
+        ))
+
+    async def record_ab_event(
+        self,
+        test_id: str,
+        variant: str,
+        assignment: bool
+    ) -> None:
+        metric = AB_ASSIGNMENT if assignment else AB_CONVERSION
+        await self._write([self._gauge_op(metric, 1, test_id=test_id, variant=variant)])
+
+    async def record_invoice_paid(self, amount_cents: int, when: Optional[datetime] = None) -> None:
+        await self._write(self._bucket_ops(when or datetime.utcnow(), INVOICE_PAID, value=amount_cents))
+
+    async def record_subscription_change(
+        self,
+        before: Optional[Dict[str, Any]],
+        after: Optional[Dict[str, Any]],
+        when: Optional[datetime] = None
+    ) -> None:
+        """Move the tier gauges and count churn for one subscription update"""
+        old, new = _counts_tier(before), _counts_tier(after)
+        ops = []
+        for metric, field in ((PAID_SUBSCRIPTIONS, "paid"), (ACTIVE_SUBSCRIPTIONS, "active")):
+            if old[field] == new[field]:
+                continue
+            if old[field]:
+                ops.append(self._gauge_op(metric, -1, tier=old[field]))
+            if new[field]:
+                ops.append(self._gauge_op(metric, 1, tier=new[field]))
+
+        was_canceled = bool(before) and before.get("status") == "canceled"
+        if after and after.get("status") == "canceled" and not was_canceled:
+            ops.extend(self._bucket_ops(
+                when or datetime.utcnow(), SUBSCRIPTION_CANCELED, tier=(before or {}).get("tier")
+            ))
+        await self._write(ops)
+
+    # Reads
+
+    async def window_totals(
+        self,
+        metrics: Iterable[str],
+        days: int,
+        group_by: Iterable[str] = ()
+    ) -> List[Dict[str, Any]]:
+        """Sum count/value per metric (and dimensions) over the last `days` days"""
+        start = datetime.utcnow() - timedelta(days=days)
+        group_id = {"metric": "$metric", **{dim: f"${dim}" for dim in group_by}}
+        pipeline = [
+            {"$match": {"metric": {"$in": list(metrics)}, **_window_match(start)}},
+            {"$group": {"_id": group_id, "count": {"$sum": "$count"}, "value": {"$sum": "$value"}}},
+        ]
+        return [
+            {**row["_id"], "count": row["count"], "value": row["value"]}
+            async for row in self.collection.aggregate(pipeline)
+        ]
+
+    async def gauges(self, metrics: Iterable[str], **dims) -> List[Dict[str, Any]]:
+        query = {"granularity": TOTAL, "metric": {"$in": list(metrics)}, **dims}
+        return await self.collection.find(query, {"_id": 0}).to_list(length=None)
+
+    # Backfill
+
+    async def rebuild(self, batch_size: int = 1000) -> Dict[str, int]:
+        """
+        Recompute every rollup from the raw collections into a scratch
+        collection and swap it in. Events tracked while the rebuild runs
+        land in the old collection and are lost, so run it off-peak.
+        """
+        scratch = self.db[f"{ROLLUP_COLLECTION}_rebuild"]
+        await scratch.drop()
+        await scratch.create_indexes(ROLLUP_INDEXES)
+        written: Dict[str, int] = {}
+
+        async def load(metric: str, collection: str, match: Dict[str, Any], date_field: str,
+                       dims: Dict[str, str], value: Optional[str] = None) -> None:
+            docs = []
+            for granularity in (HOUR, DAY):
+                pipeline = [
+                    {"$match": {**match, date_field: {"$type": "date"}}},
+                    {"$group": {
+                        "_id": {
+                            "bucket": {"$dateTrunc": {"date": f"${date_field}", "unit": granularity}},
+                            **{dim: f"${field}" for dim, field in dims.items()}
+                        },
+                        "count": {"$sum": 1},
+                        "value": {"$sum": f"${value}" if value else 0}
+                    }},
+                ]
+                async for row in self.db[collection].aggregate(pipeline, allowDiskUse=True):
+                    group = row.pop("_id")
+                    docs.append({
+                        **_key(granularity, group.pop("bucket"), metric, **group),
+                        "count": row["count"],
+                        "value": row["value"]
+                    })
+                    if len(docs) >= batch_size:
+                        await scratch.insert_many(docs, ordered=False)
+                        written[metric] = written.get(metric, 0) + len(docs)
+                        docs = []
+            if docs:
+                await scratch.insert_many(docs, ordered=False)
+                written[metric] = written.get(metric, 0) + len(docs)
+
+        await load(CONVERSION, "conversion_events", {}, "created_at",
+                   {"event_type": "event_type", "source": "source"})
+        await load(INVOICE_PAID, "invoices", {"status": "paid"}, "created_at", {}, value="amount")
+        await load(SUBSCRIPTION_CANCELED, "subscriptions", {"status": "canceled"}, "updated_at", {})
+
+        gauges = []
+        async for row in self.db["subscriptions"].aggregate([
+            {"$match": {"tier": {"$nin": [None, "free"]}}},
+            {"$group": {"_id": {"tier": "$tier", "status": "$status"}, "count": {"$sum": 1}}},
+        ]):
+            gauges.append((PAID_SUBSCRIPTIONS, {"tier": row["_id"]["tier"]}, row["count"]))
+            if row["_id"]["status"] == "active":
+                gauges.append((ACTIVE_SUBSCRIPTIONS, {"tier": row["_id"]["tier"]}, row["count"]))
+        for metric, collection in ((AB_ASSIGNMENT, "ab_test_assignments"), (AB_CONVERSION, "ab_test_conversions")):
+            async for row in self.db[collection].aggregate([
+                {"$group": {"_id": {"test_id": "$test_id", "variant": "$variant"}, "count": {"$sum": 1}}},
+            ]):
+                gauges.append((metric, row["_id"], row["count"]))
+
+        if gauges:
+            # Paid gauges come from several (tier, status) groups: merge with $inc
+            await scratch.bulk_write([
+                UpdateOne(_key(TOTAL, None, metric, **dims), {"$inc": {"count": count}}, upsert=True)
+                for metric, dims, count in gauges
+            ], ordered=False)
+            for metric, _, _ in gauges:
+                written[metric] = written.get(metric, 0) + 1
+
+        await scratch.rename(ROLLUP_COLLECTION, dropTarget=True)
+        return written
@@ -0,0 +1,456 @@
+"""
+In-process metrics registry
+
+Counters and latency histograms are updated in memory (a dict update per
+event, no I/O on the request path). A background task flushes the deltas
+accumulated since the last flush to Redis in one pipeline of
+HINCRBY / HINCRBYFLOAT commands, so every worker adds into the same
+cluster-wide totals. Exposition (JSON for the dashboards, Prometheus text
+for scrapers) reads those hashes back in one more pipeline.
+
+Redis layout: one hash per metric, metrics:counter:<name> and
+metrics:histogram:<name>, with the label set encoded in the field name
+("feature=grammar,status=success"). Histogram fields are "<labels>|<le>"
+for per-bucket counts plus "<labels>|sum" and "<labels>|count".
+
+System and GPU figures are sampled by SystemSampler in the background, so
+/metrics serves a cached snapshot instead of blocking on psutil or
+shelling out to nvidia-smi per request.
+"""
+import asyncio
+import logging
+import platform
+import subprocess
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+import psutil
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+FLUSH_INTERVAL = 5.0
+SYSTEM_SAMPLE_INTERVAL = 10.0
+GPU_SAMPLE_INTERVAL = 60.0
+KEY_PREFIX = "metrics"
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _label_field(key: LabelKey) -> str:
+    return ",".join(f"{k}={v}" for k, v in key)
+
+
+def _parse_field(field: str) -> Dict[str, str]:
+    if not field:
+        return {}
+    return dict(part.split("=", 1) for part in field.split(","))
+
+
+def _le(bound: float) -> str:
+    return "+Inf" if bound == float("inf") else repr(bound)
+
+
+class _Histogram:
+    """Per-bucket (non-cumulative) counts plus sum and count"""
+
+    __slots__ = ("buckets", "sum", "count")
+
+    def __init__(self, size: int):
+        self.buckets = [0] * size
+        self.sum = 0.0
+        self.count = 0
+
+
+class MetricsRegistry:
+    """Counters and histograms, flushed to Redis as pipelined deltas"""
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS, key_prefix: str = KEY_PREFIX):
+        self.bounds = tuple(buckets) + (float("inf"),)
+        self.key_prefix = key_prefix
+        # Set of metric hashes, so exposition knows what to read
+        self.index_key = f"{key_prefix}:index"
+        self.redis = None
+        self._counters: Dict[Tuple[str, LabelKey], float] = defaultdict(float)
+        self._histograms: Dict[Tuple[str, LabelKey], _Histogram] = {}
+        self._pending_counters: Dict[Tuple[str, LabelKey], float] = defaultdict(float)
+        self._pending_histograms: Dict[Tuple[str, LabelKey], _Histogram] = {}
+        self._indexed: set = set()
+        self._task: Optional[asyncio.Task] = None
+
+    def inc(self, name: str, amount: float = 1, **labels) -> None:
+        key = (name, _label_key(labels))
+        self._counters[key] += amount
+        self._pending_counters[key] += amount
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        key = (name, _label_key(labels))
+        index = self._bucket_index(value)
+        for store in (self._histograms, self._pending_histograms):
+            histogram = store.get(key)
+            if histogram is None:
+                histogram = store[key] = _Histogram(len(self.bounds))
+            histogram.buckets[index] += 1
+            histogram.sum += value
+            histogram.count += 1
+
+    def _bucket_index(self, value: float) -> int:
+        for index, bound in enumerate(self.bounds):
+            if value <= bound:
+                return index
+        return len(self.bounds) - 1
+
+    async def start(self, redis) -> None:
+        if self._task:
+            return
+        self.redis = redis
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(FLUSH_INTERVAL)
+            await self.flush()
+
+    async def flush(self) -> int:
+        """Push pending deltas in one pipeline; returns the number of commands sent"""
+        client = self.redis.client if self.redis else None
+        if client is None or not (self._pending_counters or self._pending_histograms):
+            return 0
+        counters, self._pending_counters = self._pending_counters, defaultdict(float)
+        histograms, self._pending_histograms = self._pending_histograms, {}
+
+        pipe = client.pipeline(transaction=False)
+        new_keys = set()
+        for (name, labels), amount in counters.items():
+            key = f"{self.key_prefix}:counter:{name}"
+            new_keys.add(key)
+            if float(amount).is_integer():
+                pipe.hincrby(key, _label_field(labels), int(amount))
+            else:
+                pipe.hincrbyfloat(key, _label_field(labels), amount)
+        for (name, labels), histogram in histograms.items():
+            key = f"{self.key_prefix}:histogram:{name}"
+            new_keys.add(key)
+            field = _label_field(labels)
+            for bound, count in zip(self.bounds, histogram.buckets):
+                if count:
+                    pipe.hincrby(key, f"{field}|{_le(bound)}", count)
+            pipe.hincrbyfloat(key, f"{field}|sum", histogram.sum)
+            pipe.hincrby(key, f"{field}|count", histogram.count)
+        new_keys -= self._indexed
+        if new_keys:
+            pipe.sadd(self.index_key, *new_keys)
+
+        commands = len(pipe)
+        try:
+            await pipe.execute()
+            self._indexed |= new_keys
+        except Exception as e:
+            logger.warning(f"Metrics flush failed, keeping deltas for the next one: {e}")
+            self._merge_back(counters, histograms)
+            return 0
+        return commands
+
+    def _merge_back(self, counters, histograms) -> None:
+        for key, amount in counters.items():
+            self._pending_counters[key] += amount
+        for key, histogram in histograms.items():
+            pending = self._pending_histograms.get(key)
+            if pending is None:
+                self._pending_histograms[key] = histogram
+                continue
+            pending.buckets = [a + b for a, b in zip(pending.buckets, histogram.buckets)]
+            pending.sum += histogram.sum
+            pending.count += histogram.count
+
+    async def collect(self) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """
+        Cluster-wide values from Redis (this process only if Redis is down):
+        {"counters": {name: {labels: value}}, "histograms": {name: {labels: {...}}}}
+        """
+        client = self.redis.client if self.redis else None
+        if client is not None:
+            try:
+                await self.flush()
+                keys = sorted(await client.smembers(self.index_key))
+                pipe = client.pipeline(transaction=False)
+                for key in keys:
+                    pipe.hgetall(key)
+                return self._from_hashes(zip(keys, await pipe.execute()))
+            except Exception as e:
+                logger.warning(f"Metrics read from Redis failed, serving local values: {e}")
+        return self._local()
+
+    def _from_hashes(self, hashes) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        result = {"counters": {}, "histograms": {}}
+        bound_index = {_le(bound): i for i, bound in enumerate(self.bounds)}
+        for key, fields in hashes:
+            kind, name = key[len(self.key_prefix) + 1:].split(":", 1)
+            if kind == "counter":
+                result["counters"][name] = {field: float(value) for field, value in fields.items()}
+                continue
+            series: Dict[str, Dict[str, Any]] = {}
+            for field, value in fields.items():
+                labels, part = field.rsplit("|", 1)
+                entry = series.setdefault(labels, {"buckets": [0] * len(self.bounds), "sum": 0.0, "count": 0})
+                if part == "sum":
+                    entry["sum"] = float(value)
+                elif part == "count":
+                    entry["count"] = int(float(value))
+                elif part in bound_index:
+                    entry["buckets"][bound_index[part]] = int(float(value))
+            result["histograms"][name] = series
+        return result
+
+    def _local(self) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        result = {"counters": defaultdict(dict), "histograms": defaultdict(dict)}
+        for (name, labels), value in self._counters.items():
+            result["counters"][name][_label_field(labels)] = value
+        for (name, labels), histogram in self._histograms.items():
+            result["histograms"][name][_label_field(labels)] = {
+                "buckets": list(histogram.buckets), "sum": histogram.sum, "count": histogram.count
+            }
+        return {kind: dict(values) for kind, values in result.items()}
+
+    def render_prometheus(self, snapshot: Dict[str, Any], gauges: Optional[Dict[str, float]] = None) -> str:
+        """Prometheus text exposition format (version 0.0.4)"""
+        lines: List[str] = []
+        for name, series in sorted(snapshot["counters"].items()):
+            lines.append(f"# TYPE {name} counter")
+            for field, value in sorted(series.items()):
+                lines.append(f"{name}{_prom_labels(_parse_field(field))} {_prom_value(value)}")
+        for name, series in sorted(snapshot["histograms"].items()):
+            lines.append(f"# TYPE {name} histogram")
+            for field, entry in sorted(series.items()):
+                labels = _parse_field(field)
+                cumulative = 0
+                for bound, count in zip(self.bounds, entry["buckets"]):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{_prom_labels({**labels, 'le': _le(bound)})} {cumulative}")
+                lines.append(f"{name}_sum{_prom_labels(labels)} {_prom_value(entry['sum'])}")
+                lines.append(f"{name}_count{_prom_labels(labels)} {entry['count']}")
+        for name, value in sorted((gauges or {}).items()):
+            if value is None:
+                continue
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {_prom_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def _prom_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    escaped = (
+        k + '="' + v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+        for k, v in labels.items()
+    )
+    return "{" + ",".join(escaped) + "}"
+
+
+def _prom_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class GPUMetrics(BaseModel):
+    available: bool
+    name: Optional[str] = None
+    memory_used_mb: Optional[float] = None
+    memory_total_mb: Optional[float] = None
+    memory_percent: Optional[float] = None
+    utilization_percent: Optional[float] = None
+    temperature: Optional[float] = None
+
+
+def get_gpu_metrics() -> Optional[GPUMetrics]:
+    """
+    Get GPU metrics for macOS (Metal) or NVIDIA GPUs
+    """
+    try:
+        system = platform.system()
+
+        if system == "Darwin":  # macOS
+            # Try to get Metal GPU info
+            try:
+                # Get GPU info using system_profiler
+                result = subprocess.run(
+                    ["system_profiler", "SPDisplaysDataType"],
+                    capture_output=True,
+                    text=True,
+                    timeout=2
+                )
+
+                if result.returncode == 0:
+                    output = result.stdout
+                    gpu_name = None
+                    vram_mb = None
+
+                    # Parse GPU name
+                    for line in output.split('\n'):
+                        if 'Chipset Model:' in line:
+                            gpu_name = line.split(':')[1].strip()
+                        elif 'VRAM' in line or 'Metal' in line:
+                            # Try to extract VRAM size
+                            parts = line.split(':')
+                            if len(parts) > 1:
+                                vram_str = parts[1].strip()
+                                if 'GB' in vram_str:
+                                    try:
+                                        vram_gb = float(vram_str.split()[0])
+                                        vram_mb = vram_gb * 1024
+                                    except:
+                                        pass
+
+                    # For macOS, we can't easily get real-time GPU utilization
+                    # But we can provide basic info
+                    return GPUMetrics(
+                        available=True,
+                        name=gpu_name or "Apple GPU",
+                        memory_total_mb=vram_mb,
+                        memory_used_mb=None,  # Not available on macOS without additional tools
+                        memory_percent=None,
+                        utilization_percent=None,  # Not easily available on macOS
+                        temperature=None
+                    )
+            except Exception as e:
+                print(f"macOS GPU detection error: {e}")
+                return GPUMetrics(available=False)
+
+        else:  # Linux/Windows - try nvidia-smi
+            try:
+                result = subprocess.run(
+                    [
+                        "nvidia-smi",
+                        "--query-gpu=name,memory.used,memory.total,utilization.gpu,temperature.gpu",
+                        "--format=csv,noheader,nounits"
+                    ],
+                    capture_output=True,
+                    text=True,
+                    timeout=2
+                )
+
+                if result.returncode == 0:
+                    parts = result.stdout.strip().split(',')
+                    if len(parts) >= 5:
+                        name = parts[0].strip()
+                        memory_used = float(parts[1].strip())
+                        memory_total = float(parts[2].strip())
+                        utilization = float(parts[3].strip())
+                        temperature = float(parts[4].strip())
+
+                        return GPUMetrics(
+                            available=True,
+                            name=name,
+                            memory_used_mb=memory_used,
+                            memory_total_mb=memory_total,
+                            memory_percent=round((memory_used / memory_total) * 100, 1),
+                            utilization_percent=utilization,
+                            temperature=temperature
+                        )
+            except Exception as e:
+                print(f"NVIDIA GPU detection error: {e}")
+                return GPUMetrics(available=False)
+
+        return GPUMetrics(available=False)
+
+    except Exception as e:
+        print(f"GPU metrics error: {e}")
+        return GPUMetrics(available=False)
+
+
+class SystemSampler:
+    """Samples host and GPU figures in the background; serves the latest snapshot"""
+
+    def __init__(self, interval: float = SYSTEM_SAMPLE_INTERVAL, gpu_interval: float = GPU_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.gpu_interval = gpu_interval
+        self.snapshot: Optional[Dict[str, Any]] = None
+        self.gpu: Optional[GPUMetrics] = None
+        self._gpu_sampled_at = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task:
+            return
+        # Prime cpu_percent: with interval=None it reports usage since the previous call
+        psutil.cpu_percent(interval=None)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.sample()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"System metrics sample failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    async def sample(self) -> Dict[str, Any]:
+        memory = psutil.virtual_memory()
+        disk = psutil.disk_usage('/')
+        if time.monotonic() - self._gpu_sampled_at >= self.gpu_interval or self.gpu is None:
+            # Subprocess with a 2 s timeout; keep it off the event loop
+            self.gpu = await asyncio.to_thread(get_gpu_metrics)
+            self._gpu_sampled_at = time.monotonic()
+        self.snapshot = {
+            "cpu_percent": psutil.cpu_percent(interval=None),
+            "memory_percent": memory.percent,
+            "memory_used_gb": round(memory.used / (1024**3), 2),
+            "memory_total_gb": round(memory.total / (1024**3), 2),
+            "memory_available_gb": round(memory.available / (1024**3), 2),
+            "disk_percent": disk.percent,
+            "uptime_seconds": time.time() - psutil.boot_time(),
+            "gpu": self.gpu,
+            "sampled_at": time.time()
+        }
+        return self.snapshot
+
+    async def latest(self) -> Dict[str, Any]:
+        """Cached snapshot; samples once if the sampler has not run yet"""
+        return self.snapshot or await self.sample()
+
+    def gauges(self) -> Dict[str, Optional[float]]:
+        """The snapshot as Prometheus gauge values"""
+        if not self.snapshot:
+            return {}
+        gpu = self.snapshot["gpu"]
+        return {
+            "system_cpu_percent": self.snapshot["cpu_percent"],
+            "system_memory_percent": self.snapshot["memory_percent"],
+            "system_memory_used_bytes": self.snapshot["memory_used_gb"] * 1024**3,
+            "system_disk_percent": self.snapshot["disk_percent"],
+            "system_uptime_seconds": self.snapshot["uptime_seconds"],
+            "gpu_utilization_percent": gpu.utilization_percent if gpu else None,
+            "gpu_memory_percent": gpu.memory_percent if gpu else None,
+            "gpu_temperature_celsius": gpu.temperature if gpu else None,
+        }
+
+
+# Global instances
+metrics = MetricsRegistry()
+system_sampler = SystemSampler()
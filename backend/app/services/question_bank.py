@@ -0,0 +1,246 @@
+"""
+Quiz question bank
+
+AI-generated questions are normalized and content-hashed, then upserted in
+one bulk_write keyed by (level, type, hash) so regenerating the same item
+only merges its skills. Each question carries a random_key drawn at insert
+time; samples are an indexed range scan from a random point instead of
+$sample. A background prefiller keeps every topic/level bucket stocked so
+/quiz-v2/start can serve from the bank without waiting on the LLM.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import random
+import re
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from pymongo import UpdateOne
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+BANK_COLLECTION = "quiz_questions"
+
+PREFILL_TOPICS = [
+    "articles", "verbs", "cases", "vocabulary", "prepositions",
+    "pluralization", "word_order", "adjectives", "pronouns", "mixed",
+]
+PREFILL_LEVELS = ["beginner", "intermediate", "advanced"]
+
+# Fields that define what a question asks; ids, hints and explanations do not
+_CONTENT_FIELDS = ("question", "sentence", "english", "audio_text", "passage", "prompt", "expected_text", "answer")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def _norm(text: Any) -> str:
+    return _WHITESPACE.sub(" ", str(text)).strip().lower()
+
+
+def question_hash(question: Dict[str, Any]) -> str:
+    """Stable content hash, insensitive to case, spacing and option order"""
+    content = {"type": question.get("type")}
+    for field in _CONTENT_FIELDS:
+        if question.get(field):
+            content[field] = _norm(question[field])
+    for field in ("options", "scrambled_words"):
+        if question.get(field):
+            content[field] = sorted(_norm(v) for v in question[field])
+    return hashlib.sha256(json.dumps(content, sort_keys=True, ensure_ascii=False).encode()).hexdigest()
+
+
+def _strip_text(question: Dict[str, Any]) -> Dict[str, Any]:
+    cleaned = {}
+    for key, value in question.items():
+        if isinstance(value, str):
+            value = _WHITESPACE.sub(" ", value).strip()
+        cleaned[key] = value
+    return cleaned
+
+
+async def store_questions(
+    db,
+    questions: Iterable[Dict[str, Any]],
+    level: Optional[str],
+    topic: Optional[str] = None
+) -> int:
+    """Upsert generated questions into the bank; returns how many were new"""
+    now = datetime.now(timezone.utc)
+    ops = []
+    seen: Set[str] = set()
+    for question in questions:
+        if not question.get("type") or not question.get("answer"):
+            continue
+        q = _strip_text(question)
+        digest = question_hash(q)
+        if digest in seen:
+            continue
+        seen.add(digest)
+        skills = list(dict.fromkeys((q.pop("skills", None) or []) + ([topic] if topic else [])))
+        q.pop("id", None)
+        q.pop("_id", None)
+        ops.append(UpdateOne(
+            {"level": level, "type": q["type"], "hash": digest},
+            {
+                "$setOnInsert": {**q, "cached": True, "random_key": random.random(), "created_at": now},
+                "$addToSet": {"skills": {"$each": skills}}
+            },
+            upsert=True
+        ))
+    if not ops:
+        return 0
+    result = await db[BANK_COLLECTION].bulk_write(ops, ordered=False)
+    return result.upserted_count
+
+
+def _bank_query(topic: Optional[str], level: Optional[str], types: Optional[List[str]]) -> Dict[str, Any]:
+    query: Dict[str, Any] = {"level": level, "cached": True}
+    if topic:
+        query["skills"] = topic
+    if types:
+        query["type"] = {"$in": types}
+    return query
+
+
+async def sample_questions(
+    db,
+    topic: Optional[str],
+    level: Optional[str],
+    size: int,
+    types: Optional[List[str]] = None
+) -> List[Dict[str, Any]]:
+    """Up to `size` random bank questions via the (skills, level, random_key) index"""
+    query = _bank_query(topic, level, types)
+    pivot = random.random()
+    collection = db[BANK_COLLECTION]
+    docs = await collection.find({**query, "random_key": {"$gte": pivot}}).sort("random_key", 1).limit(size).to_list(size)
+    if len(docs) < size:
+        # Wrap around to the start of the key space
+        more = size - len(docs)
+        docs += await collection.find({**query, "random_key": {"$lt": pivot}}).sort("random_key", 1).limit(more).to_list(more)
+
+    questions = []
+    for doc in docs:
+        # Bank ids are unique, unlike the per-generation q1..qN ids
+        doc["id"] = str(doc.pop("_id"))
+        for field in ("cached", "created_at", "hash", "random_key", "level"):
+            doc.pop(field, None)
+        questions.append(doc)
+    random.shuffle(questions)
+    return questions
+
+
+async def bucket_size(db, topic: str, level: str, limit: int) -> int:
+    return await db[BANK_COLLECTION].count_documents(_bank_query(topic, level, None), limit=limit)
+
+
+async def assign_missing_random_keys(db) -> int:
+    """Give legacy bank documents a random_key so they can be sampled"""
+    result = await db[BANK_COLLECTION].update_many(
+        {"random_key": {"$exists": False}},
+        [{"$set": {"random_key": {"$rand": {}}}}]
+    )
+    return result.modified_count
+
+
+class QuestionBankPrefiller:
+    """Background job that tops up under-stocked topic/level buckets"""
+
+    def __init__(
+        self,
+        target: int = settings.QUIZ_BANK_TARGET,
+        batch: int = settings.QUIZ_PREFILL_BATCH,
+        interval: float = settings.QUIZ_PREFILL_INTERVAL
+    ):
+        self.target = target
+        self.batch = batch
+        self.interval = interval
+        self.db = None
+        self._requested: List[Tuple[str, str]] = []
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def request(self, topic: Optional[str], level: Optional[str]) -> None:
+        """Ask for a bucket to be filled ahead of the next sweep"""
+        bucket = (topic or "mixed", level or "intermediate")
+        if bucket not in self._requested:
+            self._requested.append(bucket)
+        self._wake.set()
+
+    async def start(self, db) -> None:
+        if self._task:
+            return
+        self.db = db
+        await assign_missing_random_keys(db)
+        self._task = asyncio.create_task(self._run())
+        logger.info("🧠 Question bank prefiller started")
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def fill(self, topic: str, level: str) -> int:
+        """Generate into one bucket until it reaches target; returns questions added"""
+        from app.ai import generate_questions
+
+        added = 0
+        for _ in range(max(1, self.target // self.batch) * 2):
+            have = await bucket_size(self.db, topic, level, self.target)
+            if have >= self.target:
+                break
+            questions = await generate_questions(track=topic, size=self.batch, level=level)
+            new = await store_questions(self.db, questions, level, topic)
+            added += new
+            if not new:
+                # Model keeps repeating itself (or is down); try again next sweep
+                break
+        return added
+
+    async def run_once(self) -> int:
+        """Sweep every bucket, serving requested buckets as soon as they arrive"""
+        added = 0
+        sweep = [(topic, level) for topic in PREFILL_TOPICS for level in PREFILL_LEVELS]
+        done: Set[Tuple[str, str]] = set()
+        while self._requested or sweep:
+            if self._requested:
+                bucket = self._requested.pop(0)
+            else:
+                bucket = sweep.pop(0)
+                if bucket in done:
+                    continue
+            done.add(bucket)
+            try:
+                added += await self.fill(*bucket)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Question bank prefill failed for {bucket[0]}/{bucket[1]}: {e}")
+        return added
+
+    async def _run(self) -> None:
+        while True:
+            self._wake.clear()
+            try:
+                added = await self.run_once()
+                if added:
+                    logger.info(f"🧠 Question bank prefilled {added} questions")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Question bank prefill sweep failed: {e}")
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+
+
+# Global prefiller instance
+question_bank_prefiller = QuestionBankPrefiller()
@@ -2,11 +2,12 @@
 Scenario service for managing life simulation scenarios
 """
 
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 from datetime import datetime
 from bson import ObjectId
 from motor.motor_asyncio import AsyncIOMotorDatabase
 
+from app.config import settings
 from app.models.scenario import Scenario, Character, Objective
 from app.models.conversation_state import ConversationState, ObjectiveProgress, Message
 from app.utils.journey_utils import get_level_range_for_content
@@ -19,6 +20,7 @@ class ScenarioService:
         self.db = db
         self.scenarios_collection = db.scenarios
         self.conversation_states_collection = db.conversation_states
+        self.message_archive_collection = db.conversation_message_archive
     
     async def get_all_scenarios(self, difficulty: Optional[str] = None) -> List[Scenario]:
         """Get all scenarios, optionally filtered by difficulty/level"""
@@ -142,6 +144,7 @@ class ScenarioService:
         state_dict = state.dict(by_alias=True, exclude={"id"})
         result = await self.conversation_states_collection.insert_one(state_dict)
         state.id = result.inserted_id
+        state.mark_persisted()
         
         return state
     
@@ -158,23 +161,99 @@ class ScenarioService:
         })
         
         if state:
-            return ConversationState(**state)
+            state = ConversationState(**state)
+            state.mark_persisted()
+            return state
         return None
     
     async def update_conversation_state(self, state: ConversationState) -> bool:
-        """Update conversation state"""
+        """
+        Persist the changes since the state was loaded as one delta update
+        ($push new messages, $inc counters, $set changed fields). Once the
+        document holds CONVERSATION_ARCHIVE_AFTER messages, the oldest ones
+        move to conversation_message_archive in the same turn.
+        """
         if not state.id:
             return False
         
         state.last_activity = datetime.utcnow()
-        state_dict = state.dict(by_alias=True, exclude={"id"})
+        update = state.build_update()
+        
+        to_archive = len(state.messages) - settings.CONVERSATION_MESSAGES_KEPT
+        if "$push" in update and "messages" in update["$push"] and len(state.messages) >= settings.CONVERSATION_ARCHIVE_AFTER:
+            if await self._archive_and_update(state, update, to_archive):
+                return True
         
         result = await self.conversation_states_collection.update_one(
             {"_id": state.id},
-            {"$set": state_dict}
+            update
         )
+        state.mark_persisted()
         return result.modified_count > 0
     
+    async def _archive_and_update(self, state: ConversationState, update: Dict[str, Any], count: int) -> bool:
+        """Copy the oldest `count` messages to the archive, then trim them in the same delta update"""
+        start = state.messages_archived
+        chunk_key = {"conversation_id": state.id, "start": start}
+        # Keyed by start: a chunk left behind by a failed turn is overwritten, not duplicated
+        chunk = await self.message_archive_collection.update_one(
+            chunk_key,
+            {"$set": {
+                "user_id": state.user_id,
+                "scenario_id": state.scenario_id,
+                "end": start + count,
+                "messages": [m.dict() for m in state.messages[:count]],
+                "archived_at": datetime.utcnow()
+            }},
+            upsert=True
+        )
+        
+        update["$push"]["messages"]["$slice"] = -(len(state.messages) - count)
+        update.setdefault("$inc", {})["messages_archived"] = count
+        persisted = len(state.messages) - len(state.new_messages)
+        # Only trim if nobody else appended or archived since we loaded the state
+        result = await self.conversation_states_collection.update_one(
+            {
+                "_id": state.id,
+                "messages_archived": start if start else {"$in": [0, None]},
+                f"messages.{persisted}": {"$exists": False}
+            },
+            update
+        )
+        if result.matched_count == 0:
+            if chunk.upserted_id is not None:
+                await self.message_archive_collection.delete_one({"_id": chunk.upserted_id})
+            del update["$push"]["messages"]["$slice"]
+            del update["$inc"]["messages_archived"]
+            if not update["$inc"]:
+                del update["$inc"]
+            return False
+        
+        state.messages = state.messages[count:]
+        state.messages_archived += count
+        state.mark_persisted()
+        return True
+    
+    async def restore_messages(self, conversation: Dict[str, Any], count: int) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        (messages, messages_archived) for rewinding a conversation to its
+        first `count` messages; archive chunks past that point are moved
+        back into the document
+        """
+        archived = conversation.get("messages_archived", 0)
+        if count >= archived:
+            return conversation.get("messages", [])[:count - archived], archived
+        
+        chunks = await self.message_archive_collection.find(
+            {"conversation_id": conversation["_id"], "end": {"$gt": count}}
+        ).sort("start", 1).to_list(length=None)
+        boundary = chunks[0]["start"] if chunks else count
+        messages = [message for chunk in chunks for message in chunk["messages"]][:count - boundary]
+        await self.message_archive_collection.delete_many(
+            {"conversation_id": conversation["_id"], "start": {"$gte": boundary}}
+        )
+        return messages, boundary
+    
     async def complete_objective(
         self,
         state: ConversationState,
@@ -3,8 +3,57 @@ Spaced Repetition System using SM-2 Algorithm
 Optimizes learning retention through intelligent review scheduling
 """
 from datetime import datetime, timezone, timedelta
-from typing import Dict, Optional, List
+from typing import Dict, Optional, List, Union, Sequence, Tuple
+from collections import defaultdict
 from enum import Enum
+import time
+import numpy as np
+from pymongo import UpdateOne
+from ..redis_client import redis_client
+
+# Sort order for the due queue: new/struggling cards first, then the most overdue.
+# Backed by the (user_id, repetitions, next_review_date) index on review_cards, whose
+# equality-sort-range order returns this order while bounding next_review_date.
+DUE_SORT = [("repetitions", 1), ("next_review_date", 1)]
+
+# Per-user cache of stats/workload aggregations, dropped whenever cards change
+REVIEW_CACHE_TTL = 60
+
+def review_cache_key(user_id: str) -> str:
+    return f"reviews:overview:{user_id}"
+
+async def invalidate_review_cache(user_id: str) -> None:
+    await redis_client.delete(review_cache_key(user_id))
+
+def to_utc_datetime(value: Union[str, datetime, None]) -> Optional[datetime]:
+    """
+    Normalize a stored date (legacy ISO string or BSON date) to an aware UTC datetime.
+    Motor returns naive datetimes that are implicitly UTC.
+    """
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+def to_iso(value: Union[str, datetime, int, None]) -> Optional[str]:
+    """Format a stored date or epoch seconds as an ISO string for API responses"""
+    dt = from_epoch(value) if isinstance(value, int) else to_utc_datetime(value)
+    return dt.isoformat() if dt else None
+
+def to_epoch(value: Union[str, datetime, None]) -> Optional[int]:
+    """Convert a stored date to epoch seconds"""
+    dt = to_utc_datetime(value)
+    return int(dt.timestamp()) if dt else None
+
+def from_epoch(ts: Optional[int]) -> Optional[datetime]:
+    """Convert epoch seconds to an aware UTC datetime for storage"""
+    return datetime.fromtimestamp(ts, timezone.utc) if ts is not None else None
+
+def _now_epoch() -> int:
+    return int(time.time())
 
 class ReviewQuality(Enum):
     """User's self-assessment of recall quality (0-5)"""
@@ -38,23 +87,17 @@ class SM2Algorithm:
     INITIAL_EF = 2.5
     
     @staticmethod
-    def calculate_next_review(
+    def step(
         quality: int,
         repetitions: int,
         easiness_factor: float,
         interval: int
-    ) -> Dict[str, any]:
+    ) -> Tuple[int, float, int]:
         """
-        Calculate next review parameters based on recall quality
+        Apply one review to the scheduling parameters
         
-        Args:
-            quality: 0-5 (ReviewQuality enum value)
-            repetitions: Current repetition count
-            easiness_factor: Current EF (1.3-2.5)
-            interval: Current interval in days
-            
         Returns:
-            Dict with: repetitions, easiness_factor, interval, next_review_date
+            (repetitions, easiness_factor rounded to 2 places, interval in days)
         """
         # Ensure quality is in valid range
         quality = max(0, min(5, quality))
@@ -65,58 +108,218 @@ class SM2Algorithm:
         
         # If quality < 3, reset progress
         if quality < 3:
-            new_repetitions = 0
+            return 0, round(new_ef, 2), 1
+        
+        new_repetitions = repetitions + 1
+        
+        # Calculate new interval
+        if new_repetitions == 1:
             new_interval = 1
+        elif new_repetitions == 2:
+            new_interval = 6
         else:
-            new_repetitions = repetitions + 1
+            new_interval = round(interval * new_ef)
+        
+        return new_repetitions, round(new_ef, 2), new_interval
+    
+    @staticmethod
+    def calculate_next_review(
+        quality: int,
+        repetitions: int,
+        easiness_factor: float,
+        interval: int
+    ) -> Dict[str, any]:
+        """
+        Calculate next review parameters based on recall quality
+        
+        Args:
+            quality: 0-5 (ReviewQuality enum value)
+            repetitions: Current repetition count
+            easiness_factor: Current EF (1.3-2.5)
+            interval: Current interval in days
             
-            # Calculate new interval
-            if new_repetitions == 1:
-                new_interval = 1
-            elif new_repetitions == 2:
-                new_interval = 6
-            else:
-                new_interval = round(interval * new_ef)
+        Returns:
+            Dict with: repetitions, easiness_factor, interval, next_review_date (UTC datetime)
+        """
+        new_repetitions, new_ef, new_interval = SM2Algorithm.step(
+            quality, repetitions, easiness_factor, interval
+        )
         
         # Calculate next review date
-        next_review = datetime.now(timezone.utc) + timedelta(days=new_interval)
+        now = datetime.now(timezone.utc)
+        next_review = now + timedelta(days=new_interval)
         
         return {
             "repetitions": new_repetitions,
-            "easiness_factor": round(new_ef, 2),
+            "easiness_factor": new_ef,
             "interval": new_interval,
-            "next_review_date": next_review.isoformat(),
-            "last_reviewed": datetime.now(timezone.utc).isoformat()
+            "next_review_date": next_review,
+            "last_reviewed": now
+        }
+
+    @staticmethod
+    def calculate_next_review_batch(
+        quality: Sequence[int],
+        repetitions: Sequence[int],
+        easiness_factor: Sequence[float],
+        interval: Sequence[int],
+        reviewed_at: Sequence[float]
+    ) -> Dict[str, np.ndarray]:
+        """
+        Vectorized calculate_next_review for many independent cards at once
+        
+        Args:
+            quality: 0-5 ratings
+            repetitions: Current repetition counts
+            easiness_factor: Current EFs
+            interval: Current intervals in days
+            reviewed_at: Review times as epoch seconds
+            
+        Returns:
+            Dict of arrays: repetitions, easiness_factor, interval, next_review_at (epoch seconds)
+        """
+        q = np.clip(np.asarray(quality, dtype=np.int64), 0, 5)
+        reps = np.asarray(repetitions, dtype=np.int64)
+        ef = np.asarray(easiness_factor, dtype=np.float64)
+        ivl = np.asarray(interval, dtype=np.float64)
+        
+        miss = 5 - q
+        new_ef = np.clip(
+            ef + (0.1 - miss * (0.08 + miss * 0.02)),
+            SM2Algorithm.MIN_EF,
+            SM2Algorithm.MAX_EF
+        )
+        
+        passed = q >= 3
+        new_reps = np.where(passed, reps + 1, 0)
+        new_interval = np.select(
+            [~passed | (new_reps == 1), new_reps == 2],
+            [1, 6],
+            default=np.round(ivl * new_ef)
+        ).astype(np.int64)
+        
+        reviewed = np.asarray(reviewed_at, dtype=np.float64)
+        
+        return {
+            "repetitions": new_reps,
+            "easiness_factor": np.round(new_ef, 2),
+            "interval": new_interval,
+            "next_review_at": reviewed + new_interval * 86400.0
+        }
+
+class CardState:
+    """
+    SM-2 scheduling state of one card, shared by review cards and saved vocabulary
+    
+    Dates are epoch seconds (UTC); they are converted to BSON dates only at the
+    storage boundary.
+    """
+    
+    __slots__ = ("repetitions", "easiness_factor", "interval", "due_at", "last_reviewed_at")
+    
+    def __init__(
+        self,
+        repetitions: int = 0,
+        easiness_factor: float = SM2Algorithm.INITIAL_EF,
+        interval: int = 0,
+        due_at: Optional[int] = None,
+        last_reviewed_at: Optional[int] = None
+    ):
+        self.repetitions = repetitions
+        self.easiness_factor = easiness_factor
+        self.interval = interval
+        self.due_at = _now_epoch() if due_at is None else due_at
+        self.last_reviewed_at = last_reviewed_at
+    
+    @classmethod
+    def from_document(cls, doc: Dict) -> "CardState":
+        """Read the scheduling fields of a review_cards document"""
+        return cls(
+            repetitions=doc.get("repetitions", 0),
+            easiness_factor=doc.get("easiness_factor", SM2Algorithm.INITIAL_EF),
+            interval=doc.get("interval", 0),
+            due_at=to_epoch(doc.get("next_review_date")),
+            last_reviewed_at=to_epoch(doc.get("last_reviewed"))
+        )
+    
+    def to_document(self) -> Dict:
+        """Scheduling fields for review_cards storage"""
+        return {
+            "repetitions": self.repetitions,
+            "easiness_factor": self.easiness_factor,
+            "interval": self.interval,
+            "next_review_date": from_epoch(self.due_at),
+            "last_reviewed": from_epoch(self.last_reviewed_at)
         }
+    
+    def is_due(self, now: Optional[int] = None) -> bool:
+        return self.due_at <= (_now_epoch() if now is None else now)
+    
+    def review(self, quality: int, reviewed_at: Optional[int] = None) -> "CardState":
+        """Apply one review in place"""
+        reviewed_at = _now_epoch() if reviewed_at is None else reviewed_at
+        self.repetitions, self.easiness_factor, self.interval = SM2Algorithm.step(
+            quality, self.repetitions, self.easiness_factor, self.interval
+        )
+        self.due_at = reviewed_at + self.interval * 86400
+        self.last_reviewed_at = reviewed_at
+        return self
+    
+    @staticmethod
+    def review_batch(
+        states: List["CardState"],
+        qualities: Sequence[int],
+        reviewed_at: Sequence[int]
+    ) -> None:
+        """Apply one review to each of many independent states in a single vectorized pass"""
+        result = SM2Algorithm.calculate_next_review_batch(
+            quality=qualities,
+            repetitions=[st.repetitions for st in states],
+            easiness_factor=[st.easiness_factor for st in states],
+            interval=[st.interval for st in states],
+            reviewed_at=reviewed_at
+        )
+        for i, st in enumerate(states):
+            st.repetitions = int(result["repetitions"][i])
+            st.easiness_factor = float(result["easiness_factor"][i])
+            st.interval = int(result["interval"][i])
+            st.due_at = int(result["next_review_at"][i])
+            st.last_reviewed_at = int(reviewed_at[i])
 
 class ReviewCard:
     """
     Represents a single item to be reviewed (word, grammar rule, etc.)
     """
     
+    __slots__ = ("card_id", "card_type", "content", "user_id", "created_at", "state")
+    
     def __init__(
         self,
         card_id: str,
-        card_type: str,  # "vocabulary", "grammar", "sentence"
+        card_type: str,  # "vocabulary", "grammar", "quiz_mistake", "scenario"
         content: Dict,
         user_id: str,
-        repetitions: int = 0,
-        easiness_factor: float = SM2Algorithm.INITIAL_EF,
-        interval: int = 0,
-        next_review_date: Optional[str] = None,
-        last_reviewed: Optional[str] = None,
-        created_at: Optional[str] = None
+        state: Optional[CardState] = None,
+        created_at: Optional[int] = None
     ):
         self.card_id = card_id
         self.card_type = card_type
         self.content = content
         self.user_id = user_id
-        self.repetitions = repetitions
-        self.easiness_factor = easiness_factor
-        self.interval = interval
-        self.next_review_date = next_review_date or datetime.now(timezone.utc).isoformat()
-        self.last_reviewed = last_reviewed
-        self.created_at = created_at or datetime.now(timezone.utc).isoformat()
+        self.state = state or CardState()
+        self.created_at = _now_epoch() if created_at is None else created_at
+    
+    @classmethod
+    def from_document(cls, doc: Dict) -> "ReviewCard":
+        """Build a card from a review_cards document"""
+        return cls(
+            card_id=doc.get("card_id", str(doc.get("_id"))),
+            card_type=doc.get("card_type", "vocabulary"),
+            content=doc.get("content", {}),
+            user_id=doc.get("user_id"),
+            state=CardState.from_document(doc),
+            created_at=to_epoch(doc.get("created_at"))
+        )
     
     def to_dict(self) -> Dict:
         """Convert to dictionary for database storage"""
@@ -125,12 +328,8 @@ class ReviewCard:
             "card_type": self.card_type,
             "content": self.content,
             "user_id": self.user_id,
-            "repetitions": self.repetitions,
-            "easiness_factor": self.easiness_factor,
-            "interval": self.interval,
-            "next_review_date": self.next_review_date,
-            "last_reviewed": self.last_reviewed,
-            "created_at": self.created_at
+            **self.state.to_document(),
+            "created_at": from_epoch(self.created_at)
         }
     
     def review(self, quality: int) -> Dict:
@@ -143,31 +342,175 @@ class ReviewCard:
         Returns:
             Updated card parameters
         """
-        result = SM2Algorithm.calculate_next_review(
-            quality=quality,
-            repetitions=self.repetitions,
-            easiness_factor=self.easiness_factor,
-            interval=self.interval
-        )
-        
-        # Update card state
-        self.repetitions = result["repetitions"]
-        self.easiness_factor = result["easiness_factor"]
-        self.interval = result["interval"]
-        self.next_review_date = result["next_review_date"]
-        self.last_reviewed = result["last_reviewed"]
-        
-        return result
+        state = self.state.review(quality)
+        return {
+            "repetitions": state.repetitions,
+            "easiness_factor": state.easiness_factor,
+            "interval": state.interval,
+            "next_review_date": from_epoch(state.due_at),
+            "last_reviewed": from_epoch(state.last_reviewed_at)
+        }
 
 class ReviewScheduler:
     """
     Manages review scheduling and card selection
     """
     
+    @staticmethod
+    def due_query(
+        user_id: str,
+        card_type: Optional[str] = None,
+        now: Optional[datetime] = None
+    ) -> Dict:
+        """
+        Build the MongoDB filter for a user's due cards
+        
+        Served with DUE_SORT by the (user_id, repetitions, next_review_date)
+        index: next_review_date is bounded per repetitions value, so only due
+        cards are scanned and no in-memory sort is needed.
+        """
+        query = {
+            "user_id": user_id,
+            "next_review_date": {"$lte": now or datetime.now(timezone.utc)}
+        }
+        if card_type:
+            query["card_type"] = card_type
+        return query
+    
+    @staticmethod
+    async def fetch_due_cards(
+        collection,
+        user_id: str,
+        limit: int = 20,
+        card_type: Optional[str] = None
+    ) -> List[ReviewCard]:
+        """
+        Get cards that are due for review, filtered, sorted and limited in MongoDB
+        
+        Args:
+            collection: review_cards collection
+            user_id: User ID
+            limit: Maximum number of cards to return
+            card_type: Optional card type filter
+            
+        Returns:
+            List of cards due for review, sorted by priority
+        """
+        cursor = collection.find(
+            ReviewScheduler.due_query(user_id, card_type)
+        ).sort(DUE_SORT).limit(limit)
+        
+        return [ReviewCard.from_document(doc) async for doc in cursor]
+    
+    @staticmethod
+    async def ensure_card(collection, card: ReviewCard) -> None:
+        """
+        Insert a card unless the user already has it; existing scheduling
+        progress is never reset
+        """
+        await collection.update_one(
+            {"user_id": card.user_id, "card_id": card.card_id},
+            {"$setOnInsert": card.to_dict()},
+            upsert=True
+        )
+    
+    @staticmethod
+    async def fetch_states(
+        collection,
+        user_id: str,
+        card_ids: List[str]
+    ) -> Dict[str, CardState]:
+        """Load the scheduling state of several cards in one query"""
+        cursor = collection.find(
+            {"user_id": user_id, "card_id": {"$in": card_ids}},
+            {"card_id": 1, "repetitions": 1, "easiness_factor": 1, "interval": 1,
+             "next_review_date": 1, "last_reviewed": 1}
+        )
+        return {doc["card_id"]: CardState.from_document(doc) async for doc in cursor}
+    
+    @staticmethod
+    async def submit_reviews(
+        collection,
+        user_id: str,
+        reviews: List[Tuple[str, int, datetime]]
+    ) -> Tuple[List[Dict], List[str]]:
+        """
+        Apply many reviews with one read, one vectorized SM-2 pass per round
+        and one unordered bulk_write
+        
+        A card reviewed several times in the batch (offline replay) is applied
+        in reviewed_at order: round k holds each card's k-th review, so every
+        round is a set of independent cards.
+        
+        Args:
+            collection: review_cards collection
+            user_id: User ID
+            reviews: (card_id, quality, reviewed_at) tuples
+            
+        Returns:
+            (updated {card_id, state, last_quality} items, card_ids that were not found)
+        """
+        card_ids = list({card_id for card_id, _, _ in reviews})
+        states = await ReviewScheduler.fetch_states(collection, user_id, card_ids)
+        missing = [card_id for card_id in card_ids if card_id not in states]
+        
+        # Future timestamps from skewed client clocks are clamped to now
+        now = _now_epoch()
+        pending = sorted(
+            (
+                (card_id, quality, min(to_epoch(reviewed_at), now))
+                for card_id, quality, reviewed_at in reviews
+                if card_id in states
+            ),
+            key=lambda r: r[2]
+        )
+        rounds: List[List[Tuple[str, int, int]]] = []
+        seen = defaultdict(int)
+        last_quality: Dict[str, int] = {}
+        for review in pending:
+            k = seen[review[0]]
+            seen[review[0]] += 1
+            if k == len(rounds):
+                rounds.append([])
+            rounds[k].append(review)
+            last_quality[review[0]] = review[1]
+        
+        for batch in rounds:
+            CardState.review_batch(
+                [states[card_id] for card_id, _, _ in batch],
+                [quality for _, quality, _ in batch],
+                [ts for _, _, ts in batch]
+            )
+        
+        updated = [
+            {
+                "card_id": card_id,
+                "state": states[card_id],
+                "last_quality": quality
+            }
+            for card_id, quality in last_quality.items()
+        ]
+        if updated:
+            await collection.bulk_write(
+                [
+                    UpdateOne(
+                        {"user_id": user_id, "card_id": item["card_id"]},
+                        {"$set": item["state"].to_document()}
+                    )
+                    for item in updated
+                ],
+                ordered=False
+            )
+        
+        return updated, missing
+    
     @staticmethod
     def get_due_cards(cards: List[ReviewCard], limit: int = 20) -> List[ReviewCard]:
         """
-        Get cards that are due for review
+        Get cards that are due for review from an in-memory list
+        
+        Prefer fetch_due_cards for stored cards; this is kept for callers
+        that already hold the cards.
         
         Args:
             cards: List of all user's cards
@@ -176,28 +519,26 @@ class ReviewScheduler:
         Returns:
             List of cards due for review, sorted by priority
         """
-        now = datetime.now(timezone.utc)
+        now = _now_epoch()
         
         # Filter due cards
-        due_cards = [
-            card for card in cards
-            if datetime.fromisoformat(card.next_review_date.replace('Z', '+00:00')) <= now
-        ]
+        due_cards = [card for card in cards if card.state.is_due(now)]
         
         # Sort by priority:
         # 1. Cards with lower repetitions (new/struggling items)
         # 2. Cards overdue the longest
-        due_cards.sort(key=lambda c: (
-            c.repetitions,
-            datetime.fromisoformat(c.next_review_date.replace('Z', '+00:00'))
-        ))
+        due_cards.sort(key=lambda c: (c.state.repetitions, c.state.due_at))
         
         return due_cards[:limit]
     
     @staticmethod
-    def get_daily_stats(cards: List[ReviewCard]) -> Dict:
+    async def aggregate_daily_stats(
+        collection,
+        user_id: str,
+        card_type: Optional[str] = None
+    ) -> Dict:
         """
-        Calculate daily review statistics
+        Calculate daily review statistics in a single aggregation
         
         Returns:
             Dict with review stats
@@ -205,67 +546,103 @@ class ReviewScheduler:
         now = datetime.now(timezone.utc)
         today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
         
-        # Count cards by status
-        new_cards = sum(1 for c in cards if c.repetitions == 0)
-        learning_cards = sum(1 for c in cards if 0 < c.repetitions < 3)
-        mature_cards = sum(1 for c in cards if c.repetitions >= 3)
+        match = {"user_id": user_id}
+        if card_type:
+            match["card_type"] = card_type
         
-        # Count due cards
-        due_today = sum(
-            1 for c in cards
-            if datetime.fromisoformat(c.next_review_date.replace('Z', '+00:00')) <= now
-        )
+        pipeline = [
+            {"$match": match},
+            {"$facet": {
+                # new: 0 repetitions, learning: 1-2, mature: 3+ (default bucket)
+                "bands": [
+                    {"$bucket": {
+                        "groupBy": {"$ifNull": ["$repetitions", 0]},
+                        "boundaries": [0, 1, 3],
+                        "default": "mature",
+                        "output": {"count": {"$sum": 1}}
+                    }}
+                ],
+                "counts": [
+                    {"$group": {
+                        "_id": None,
+                        "total": {"$sum": 1},
+                        "due_today": {"$sum": {
+                            "$cond": [{"$lte": ["$next_review_date", now]}, 1, 0]
+                        }},
+                        "reviewed_today": {"$sum": {
+                            "$cond": [{"$gte": ["$last_reviewed", today_start]}, 1, 0]
+                        }}
+                    }}
+                ]
+            }}
+        ]
         
-        # Count reviewed today
-        reviewed_today = sum(
-            1 for c in cards
-            if c.last_reviewed and 
-            datetime.fromisoformat(c.last_reviewed.replace('Z', '+00:00')) >= today_start
-        )
+        result = await collection.aggregate(pipeline).to_list(length=1)
+        facets = result[0] if result else {}
+        bands = {b["_id"]: b["count"] for b in facets.get("bands", [])}
+        counts = (facets.get("counts") or [{}])[0]
+        
+        total = counts.get("total", 0)
+        mature_cards = bands.get("mature", 0)
         
         return {
-            "total_cards": len(cards),
-            "new_cards": new_cards,
-            "learning_cards": learning_cards,
+            "total_cards": total,
+            "new_cards": bands.get(0, 0),
+            "learning_cards": bands.get(1, 0),
             "mature_cards": mature_cards,
-            "due_today": due_today,
-            "reviewed_today": reviewed_today,
+            "due_today": counts.get("due_today", 0),
+            "reviewed_today": counts.get("reviewed_today", 0),
             "retention_rate": round(
-                (mature_cards / max(len(cards), 1)) * 100, 1
+                (mature_cards / max(total, 1)) * 100, 1
             )
         }
     
     @staticmethod
-    def predict_workload(cards: List[ReviewCard], days: int = 7) -> List[Dict]:
+    async def aggregate_workload(
+        collection,
+        user_id: str,
+        days: int = 7
+    ) -> List[Dict]:
         """
-        Predict review workload for upcoming days
+        Predict review workload for upcoming days in a single aggregation
         
         Args:
-            cards: List of all cards
+            collection: review_cards collection
+            user_id: User ID
             days: Number of days to predict
             
         Returns:
             List of daily workload predictions
         """
-        now = datetime.now(timezone.utc)
-        predictions = []
+        today_start = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+        day_starts = [today_start + timedelta(days=day) for day in range(days + 1)]
         
-        for day in range(days):
-            target_date = now + timedelta(days=day)
-            target_start = target_date.replace(hour=0, minute=0, second=0, microsecond=0)
-            target_end = target_start + timedelta(days=1)
-            
-            due_count = sum(
-                1 for c in cards
-                if target_start <= datetime.fromisoformat(c.next_review_date.replace('Z', '+00:00')) < target_end
-            )
-            
-            predictions.append({
-                "date": target_date.date().isoformat(),
-                "due_cards": due_count
-            })
+        pipeline = [
+            {"$match": {
+                "user_id": user_id,
+                "next_review_date": {"$gte": day_starts[0], "$lt": day_starts[-1]}
+            }},
+            {"$bucket": {
+                "groupBy": "$next_review_date",
+                "boundaries": day_starts,
+                "output": {"count": {"$sum": 1}}
+            }}
+        ]
+        
+        buckets = await collection.aggregate(pipeline).to_list(length=days)
+        counts = {to_utc_datetime(b["_id"]): b["count"] for b in buckets}
         
-        return predictions
+        return [
+            {
+                "date": day_start.date().isoformat(),
+                "due_cards": counts.get(day_start, 0)
+            }
+            for day_start in day_starts[:-1]
+        ]
+
+def vocabulary_card_id(word: str, user_id: str) -> str:
+    """Card id of a saved word; vocab SRS and review cards share this queue entry"""
+    return f"vocab_{word}_{user_id}"
 
 def create_vocabulary_card(word: Dict, user_id: str) -> ReviewCard:
     """
@@ -278,7 +655,7 @@ def create_vocabulary_card(word: Dict, user_id: str) -> ReviewCard:
     Returns:
         ReviewCard instance
     """
-    card_id = f"vocab_{word.get('word', 'unknown')}_{user_id}"
+    card_id = vocabulary_card_id(word.get('word', 'unknown'), user_id)
     
     return ReviewCard(
         card_id=card_id,
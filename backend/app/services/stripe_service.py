@@ -6,6 +6,7 @@ import os
 from typing import Optional, List, Dict, Any
 from datetime import datetime
 from bson import ObjectId
+from pymongo import ReturnDocument
 
 from ..models.subscription import (
     Subscription,
@@ -16,6 +17,8 @@ from ..models.subscription import (
     UsageTracking,
     get_tier_features
 )
+from .marketing_rollups import MarketingRollupService
+from .user_context import invalidate_user_context
 
 
 class StripeService:
@@ -26,6 +29,18 @@ class StripeService:
         stripe.api_key = os.getenv("STRIPE_SECRET_KEY")
         self.premium_price_id = os.getenv("STRIPE_PREMIUM_PRICE_ID")
         self.plus_price_id = os.getenv("STRIPE_PLUS_PRICE_ID")
+        self.rollups = MarketingRollupService(db)
+    
+    async def _update_subscription(self, query: Dict[str, Any], fields: Dict[str, Any]):
+        """Apply a $set to one subscription and move the marketing rollup gauges"""
+        before = await self.db["subscriptions"].find_one_and_update(
+            query,
+            {"$set": fields},
+            return_document=ReturnDocument.BEFORE
+        )
+        if before:
+            await self.rollups.record_subscription_change(before, {**before, **fields})
+            await invalidate_user_context(before.get("user_id"))
     
     async def create_customer(self, user_id: str, email: str, name: str) -> str:
         """Create a Stripe customer"""
@@ -46,6 +61,7 @@ class StripeService:
                 "updated_at": datetime.utcnow()
             }
             await self.db["subscriptions"].insert_one(subscription_doc)
+            await invalidate_user_context(user_id)
             
             return customer.id
         except stripe.error.StripeError as e:
@@ -131,19 +147,17 @@ class StripeService:
         stripe_subscription = stripe.Subscription.retrieve(subscription_id)
         
         # Update subscription in database
-        await self.db["subscriptions"].update_one(
+        await self._update_subscription(
             {"user_id": user_id},
             {
-                "$set": {
-                    "stripe_subscription_id": subscription_id,
-                    "tier": tier,
-                    "status": stripe_subscription.status,
-                    "current_period_start": datetime.fromtimestamp(stripe_subscription.current_period_start),
-                    "current_period_end": datetime.fromtimestamp(stripe_subscription.current_period_end),
-                    "cancel_at_period_end": stripe_subscription.cancel_at_period_end,
-                    "trial_end": datetime.fromtimestamp(stripe_subscription.trial_end) if stripe_subscription.trial_end else None,
-                    "updated_at": datetime.utcnow()
-                }
+                "stripe_subscription_id": subscription_id,
+                "tier": tier,
+                "status": stripe_subscription.status,
+                "current_period_start": datetime.fromtimestamp(stripe_subscription.current_period_start),
+                "current_period_end": datetime.fromtimestamp(stripe_subscription.current_period_end),
+                "cancel_at_period_end": stripe_subscription.cancel_at_period_end,
+                "trial_end": datetime.fromtimestamp(stripe_subscription.trial_end) if stripe_subscription.trial_end else None,
+                "updated_at": datetime.utcnow()
             }
         )
     
@@ -151,22 +165,15 @@ class StripeService:
         """Handle subscription update webhook"""
         customer_id = subscription["customer"]
         
-        # Find user by customer ID
-        db_subscription = await self.db["subscriptions"].find_one({"stripe_customer_id": customer_id})
-        if not db_subscription:
-            return
-        
-        # Update subscription
-        await self.db["subscriptions"].update_one(
-            {"_id": db_subscription["_id"]},
+        # Update subscription (found by customer ID)
+        await self._update_subscription(
+            {"stripe_customer_id": customer_id},
             {
-                "$set": {
-                    "status": subscription["status"],
-                    "current_period_start": datetime.fromtimestamp(subscription["current_period_start"]),
-                    "current_period_end": datetime.fromtimestamp(subscription["current_period_end"]),
-                    "cancel_at_period_end": subscription["cancel_at_period_end"],
-                    "updated_at": datetime.utcnow()
-                }
+                "status": subscription["status"],
+                "current_period_start": datetime.fromtimestamp(subscription["current_period_start"]),
+                "current_period_end": datetime.fromtimestamp(subscription["current_period_end"]),
+                "cancel_at_period_end": subscription["cancel_at_period_end"],
+                "updated_at": datetime.utcnow()
             }
         )
     
@@ -174,21 +181,14 @@ class StripeService:
         """Handle subscription cancellation"""
         customer_id = subscription["customer"]
         
-        # Find user by customer ID
-        db_subscription = await self.db["subscriptions"].find_one({"stripe_customer_id": customer_id})
-        if not db_subscription:
-            return
-        
-        # Downgrade to free tier
-        await self.db["subscriptions"].update_one(
-            {"_id": db_subscription["_id"]},
+        # Downgrade to free tier (found by customer ID)
+        await self._update_subscription(
+            {"stripe_customer_id": customer_id},
             {
-                "$set": {
-                    "tier": SubscriptionTier.FREE.value,
-                    "status": SubscriptionStatus.CANCELED.value,
-                    "stripe_subscription_id": None,
-                    "updated_at": datetime.utcnow()
-                }
+                "tier": SubscriptionTier.FREE.value,
+                "status": SubscriptionStatus.CANCELED.value,
+                "stripe_subscription_id": None,
+                "updated_at": datetime.utcnow()
             }
         )
     
@@ -216,6 +216,8 @@ class StripeService:
             "created_at": datetime.utcnow()
         }
         await self.db["invoices"].insert_one(invoice_doc)
+        if invoice_doc["status"] == "paid":
+            await self.rollups.record_invoice_paid(invoice_doc["amount"], when=invoice_doc["created_at"])
     
     async def cancel_subscription(self, user_id: str, immediate: bool = False) -> bool:
         """Cancel a user's subscription"""
@@ -243,10 +245,7 @@ class StripeService:
                 update_data["status"] = SubscriptionStatus.CANCELED.value
                 update_data["stripe_subscription_id"] = None
             
-            await self.db["subscriptions"].update_one(
-                {"user_id": user_id},
-                {"$set": update_data}
-            )
+            await self._update_subscription({"user_id": user_id}, update_data)
             
             return True
         except stripe.error.StripeError as e:
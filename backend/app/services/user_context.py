@@ -0,0 +1,118 @@
+"""
+Cached per-user request context
+
+Most gated or level-aware requests only need three facts about the caller:
+the active journey, the subscription tier and the role. They are resolved
+with projection-only reads of users/subscriptions and cached at three
+layers: the current request (a ContextVar), a short-TTL process map and
+Redis. Journey switches, subscription changes and role changes call
+invalidate_user_context().
+"""
+import time
+from contextvars import ContextVar
+from typing import Any, Dict, Optional
+
+from bson import ObjectId
+
+from ..config import settings
+from ..redis_client import redis_client
+
+USER_PROJECTION = {
+    "role": 1,
+    "learning_journeys.active_journey_id": 1,
+    "learning_journeys.journeys.id": 1,
+    "learning_journeys.journeys.level": 1,
+    "learning_journeys.journeys.type": 1,
+    "learning_journeys.journeys.is_primary": 1,
+}
+EMPTY_JOURNEY = {"level": None, "type": None, "id": None}
+LOCAL_CACHE_MAX = 10000
+
+_request_cache: ContextVar[Optional[Dict[str, Dict[str, Any]]]] = ContextVar("user_context", default=None)
+_local_cache: Dict[str, tuple] = {}
+
+
+def user_context_key(user_id: str) -> str:
+    return f"user:context:{user_id}"
+
+
+def _active_journey(user: Dict[str, Any]) -> Dict[str, Any]:
+    journeys_data = user.get("learning_journeys") or {}
+    active_id = journeys_data.get("active_journey_id")
+    if not active_id:
+        return dict(EMPTY_JOURNEY)
+    for journey in journeys_data.get("journeys", []):
+        if journey.get("id") == active_id:
+            return {
+                "level": journey.get("level"),
+                "type": journey.get("type"),
+                "id": journey.get("id"),
+                "is_primary": journey.get("is_primary", False)
+            }
+    return dict(EMPTY_JOURNEY)
+
+
+async def _load(db, user_id: str) -> Optional[Dict[str, Any]]:
+    try:
+        oid = ObjectId(user_id)
+    except Exception:
+        return None
+    user = await db["users"].find_one({"_id": oid}, USER_PROJECTION)
+    if not user:
+        return None
+    subscription = await db["subscriptions"].find_one({"user_id": user_id}, {"tier": 1, "_id": 0})
+    return {
+        "journey": _active_journey(user),
+        "tier": (subscription or {}).get("tier") or "free",
+        "role": user.get("role", "user"),
+    }
+
+
+def _remember(user_id: str, context: Dict[str, Any]) -> None:
+    scoped = _request_cache.get()
+    if scoped is None:
+        # ContextVar values set here are local to the current request's task
+        scoped = {}
+        _request_cache.set(scoped)
+    scoped[user_id] = context
+    if len(_local_cache) >= LOCAL_CACHE_MAX:
+        _local_cache.clear()
+    _local_cache[user_id] = (time.monotonic() + settings.USER_CONTEXT_LOCAL_TTL, context)
+
+
+async def get_user_context(db, user_id: str) -> Optional[Dict[str, Any]]:
+    """
+    {"journey": {...}, "tier": str, "role": str} for a user, or None if the
+    user does not exist. Cache hits never touch MongoDB.
+    """
+    if not user_id:
+        return None
+    scoped = _request_cache.get()
+    if scoped is not None and user_id in scoped:
+        return scoped[user_id]
+
+    cached = _local_cache.get(user_id)
+    if cached and cached[0] > time.monotonic():
+        _remember(user_id, cached[1])
+        return cached[1]
+
+    context = await redis_client.get_json(user_context_key(user_id))
+    if context is None:
+        context = await _load(db, user_id)
+        if context is None:
+            return None
+        await redis_client.set_json(user_context_key(user_id), context, expire=settings.USER_CONTEXT_TTL)
+    _remember(user_id, context)
+    return context
+
+
+async def invalidate_user_context(user_id: Optional[str]) -> None:
+    """Drop every cached copy after a journey, subscription or role change"""
+    if not user_id:
+        return
+    user_id = str(user_id)
+    _local_cache.pop(user_id, None)
+    scoped = _request_cache.get()
+    if scoped is not None:
+        scoped.pop(user_id, None)
+    await redis_client.delete(user_context_key(user_id))
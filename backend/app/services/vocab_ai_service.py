@@ -1,9 +1,51 @@
 """
 AI-powered vocabulary generation service with smart caching
+
+Daily words come from a per-level pool that a background warmer generates
+ahead of midnight UTC, so requests only slice an existing pool. Each user's
+selection skips words they already know via an indexed lookup bounded by
+the pool size, and is cached in Redis for the rest of the day.
 """
 from typing import List, Dict, Optional, Any
+import asyncio
 import datetime as dt
+import logging
+from pymongo import ReturnDocument
+from ..config import settings
 from ..ollama_client import ollama_client
+from ..redis_client import redis_client
+
+logger = logging.getLogger(__name__)
+
+# Levels warmed every day; the named levels join once they are requested
+POOL_LEVELS = ["a1", "a2", "b1", "b2", "c1", "c2"]
+WARMABLE_LEVELS = frozenset(POOL_LEVELS + ["beginner", "intermediate", "advanced"])
+MAX_DAILY_COUNT = 20
+POOL_GENERATION_BATCH = 20
+
+
+def _utc_today() -> dt.datetime:
+    return dt.datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _pool_key(level: str, day: dt.datetime) -> str:
+    return f"pool_{level}_{day.date().isoformat()}"
+
+
+def _level_criteria(level: str) -> Dict[str, Any]:
+    """seed_words match for a difficulty or CEFR level"""
+    level_lower = level.lower()
+    if level_lower == "beginner":
+        return {"level": {"$in": ["A1", "A2"]}}
+    if level_lower == "intermediate":
+        return {"level": {"$in": ["B1", "B2"]}}
+    if level_lower == "advanced":
+        return {"level": {"$in": ["C1", "C2"]}}
+    if level_lower in ["a1", "a2", "b1", "b2", "c1", "c2"]:
+        # CEFR level - convert to uppercase for database query
+        return {"level": level.upper()}
+    # Unknown level - try exact match
+    return {"level": level}
 
 
 class VocabAIService:
@@ -18,66 +60,95 @@ class VocabAIService:
         Generate daily vocabulary words - same words for the entire day, new words tomorrow
         
         Strategy:
-        1. Check user's completed words for today
-        2. Check if we have cached words for today
-        3. If cache exists, return those same words (user sees their progress)
-        4. If no cache, generate new words and cache them for the day
-        5. Tomorrow = new cache = new words automatically
+        1. Read today's pre-generated pool for the level
+        2. Anonymous callers get the head of the pool
+        3. Users get the pool minus words they already know, fixed for the day
+           (cached in Redis) so they see their progress on today's words
+        4. Any count is a slice of the same pool/selection
         """
-        today = dt.datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
-        today_str = today.date().isoformat()
+        today = _utc_today()
         
         # Normalize level to lowercase
         level = level.lower()
         
-        # Check cache first - same words all day
-        cache_key = f"daily_{level}_{count}_{today_str}"
-        cached = await self.db["ai_vocab_cache"].find_one({
-            "cache_key": cache_key
-        })
+        pool = await self.get_daily_pool(level, today)
+        if not user_id:
+            return pool[:count]
         
+        selection_key = f"vocab:daily:{level}:{today.date().isoformat()}:{user_id}"
+        selected = await redis_client.get_json(selection_key)
+        if selected is None:
+            selected = await self._select_for_user(pool, level, user_id)
+            ttl = int((today + dt.timedelta(days=1) - dt.datetime.utcnow()).total_seconds())
+            await redis_client.set_json(selection_key, selected, expire=max(ttl, 1))
+        return selected[:count]
+    
+    async def get_daily_pool(self, level: str, day: dt.datetime) -> List[Dict[str, Any]]:
+        """The level's pool for a day; builds a database-only pool if it was not warmed"""
+        cached = await self.db["ai_vocab_cache"].find_one({"cache_key": _pool_key(level, day)})
         if cached and cached.get("words"):
-            # Return same words for the entire day
-            return cached["words"][:count]
-        
-        # No cache - generate new words
-        # Get words user has already learned (from all time, not just today)
-        learned_words = set()
-        if user_id:
-            user_vocab = await self.db["user_vocab"].find(
-                {"user_id": user_id},
-                {"word": 1}
-            ).to_list(length=10000)
-            learned_words = {w["word"] for w in user_vocab}
+            return cached["words"]
         
-        # Generate words, excluding already learned ones
-        words = await self._generate_words_with_ai(level, count * 3, learned_words)  # Generate extra to filter
-        
-        # Filter out learned words
-        words = [w for w in words if w["word"] not in learned_words][:count]
+        # Never wait on the LLM here: serve seed words today, warm this level from now on
+        daily_vocab_warmer.request(level)
+        words = await self._fallback_to_db(level, settings.VOCAB_POOL_SIZE)
+        return await self._store_pool(level, day, words)
+    
+    async def build_daily_pool(self, level: str, day: dt.datetime) -> List[Dict[str, Any]]:
+        """Generate a full pool with the LLM (background job)"""
+        size = settings.VOCAB_POOL_SIZE
+        words: List[Dict[str, Any]] = []
+        seen: set = set()
+        for _ in range(size // POOL_GENERATION_BATCH + 1):
+            if len(words) >= size:
+                break
+            batch = await self._generate_words_with_ai(level, POOL_GENERATION_BATCH, seen)
+            fresh = [w for w in batch if w["word"] not in seen]
+            if not fresh:
+                break
+            for w in fresh:
+                seen.add(w["word"])
+            words.extend(fresh)
         
         # If not enough words, fill from database
-        if len(words) < count:
-            db_words = await self._fallback_to_db(level, count - len(words), learned_words)
-            words.extend(db_words)
-        
-        # Cache for the entire day
-        await self.db["ai_vocab_cache"].update_one(
-            {"cache_key": cache_key},
+        if len(words) < size:
+            words.extend(await self._fallback_to_db(level, size - len(words), seen))
+        return await self._store_pool(level, day, words[:size])
+    
+    async def _store_pool(self, level: str, day: dt.datetime, words: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        # First writer wins so a day's pool never changes under a user
+        doc = await self.db["ai_vocab_cache"].find_one_and_update(
+            {"cache_key": _pool_key(level, day)},
             {
-                "$set": {
-                    "cache_key": cache_key,
+                "$setOnInsert": {
                     "level": level,
                     "words": words,
                     "created_at": dt.datetime.utcnow(),
-                    "date": today_str,
-                    "expires_at": today + dt.timedelta(days=1)
+                    "date": day.date().isoformat(),
+                    "expires_at": day + dt.timedelta(days=1)
                 }
             },
-            upsert=True
+            upsert=True,
+            return_document=ReturnDocument.AFTER
         )
+        return doc.get("words") or words
+    
+    async def _select_for_user(self, pool: List[Dict[str, Any]], level: str, user_id: str) -> List[Dict[str, Any]]:
+        """Pool words the user has not learned yet, topped up from seed words"""
+        pool_words = [w["word"] for w in pool]
+        # Indexed (user_id, word) lookup bounded by the pool size
+        known = await self.db["user_vocab"].find(
+            {"user_id": user_id, "word": {"$in": pool_words}},
+            {"_id": 0, "word": 1}
+        ).to_list(length=len(pool_words))
+        learned_words = {w["word"] for w in known}
         
-        return words
+        selected = [w for w in pool if w["word"] not in learned_words][:MAX_DAILY_COUNT]
+        if len(selected) < MAX_DAILY_COUNT:
+            selected.extend(await self._fallback_to_db(
+                level, MAX_DAILY_COUNT - len(selected), set(pool_words), user_id=user_id
+            ))
+        return selected
     
     async def _generate_words_with_ai(self, level: str, count: int, exclude_words: set = None) -> List[Dict[str, Any]]:
         """Generate vocabulary words using AI model, excluding already learned words"""
@@ -163,40 +234,51 @@ Return ONLY the JSON array."""
         # Fallback: return from seed_words database
         return await self._fallback_to_db(level, count)
     
-    async def _fallback_to_db(self, level: str, count: int, exclude_words: set = None) -> List[Dict[str, Any]]:
-        """Fallback to database seed words if AI generation fails"""
-        if exclude_words is None:
-            exclude_words = set()
-        
-        # Convert difficulty level to CEFR for database query
-        level_lower = level.lower()
-        if level_lower == "beginner":
-            match_criteria = {"level": {"$in": ["A1", "A2"]}}
-        elif level_lower == "intermediate":
-            match_criteria = {"level": {"$in": ["B1", "B2"]}}
-        elif level_lower == "advanced":
-            match_criteria = {"level": {"$in": ["C1", "C2"]}}
-        elif level_lower in ["a1", "a2", "b1", "b2", "c1", "c2"]:
-            # CEFR level - convert to uppercase for database query
-            match_criteria = {"level": level.upper()}
-        else:
-            # Unknown level - try exact match
-            match_criteria = {"level": level}
-        
+    async def _fallback_to_db(
+        self,
+        level: str,
+        count: int,
+        exclude_words: set = None,
+        user_id: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Fallback to database seed words if AI generation fails.
+        With user_id, words the user already has in user_vocab are skipped
+        through a $lookup anti-join instead of loading their vocabulary.
+        """
+        match_criteria = _level_criteria(level)
         if exclude_words:
             match_criteria["word"] = {"$nin": list(exclude_words)}
         
         pipeline = [
             {"$match": match_criteria},
-            {"$sample": {"size": count}},
-            {"$project": {
-                "_id": 0,
-                "word": 1,
-                "level": 1,
-                "translation": 1,
-                "example": {"$arrayElemAt": ["$examples", 0]}
-            }}
+            {"$sample": {"size": count * 3 if user_id else count}},
         ]
+        if user_id:
+            pipeline += [
+                {"$lookup": {
+                    "from": "user_vocab",
+                    "let": {"word": "$word"},
+                    "pipeline": [
+                        {"$match": {"$expr": {"$and": [
+                            {"$eq": ["$user_id", user_id]},
+                            {"$eq": ["$word", "$$word"]}
+                        ]}}},
+                        {"$limit": 1},
+                        {"$project": {"_id": 1}}
+                    ],
+                    "as": "known"
+                }},
+                {"$match": {"known": {"$size": 0}}},
+                {"$limit": count},
+            ]
+        pipeline.append({"$project": {
+            "_id": 0,
+            "word": 1,
+            "level": 1,
+            "translation": 1,
+            "example": {"$arrayElemAt": ["$examples", 0]}
+        }})
         
         items = await self.db["seed_words"].aggregate(pipeline).to_list(count)
         return [
@@ -289,3 +371,85 @@ Return ONLY the JSON object."""
             print(f"AI enhancement failed: {e}")
         
         return {"word": word, "translation": "", "examples": [], "collocations": [], "usage_tip": ""}
+
+
+class DailyVocabPoolWarmer:
+    """Background job that generates each level's daily pool ahead of time"""
+    
+    def __init__(self, check_interval: float = 900, lead_seconds: int = settings.VOCAB_POOL_WARMUP_LEAD):
+        self.check_interval = check_interval
+        self.lead_seconds = lead_seconds
+        self.db = None
+        self._levels = set(POOL_LEVELS)
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+    
+    def request(self, level: str) -> None:
+        """Include a known level in future warm-ups; others only get database pools"""
+        if level in WARMABLE_LEVELS and level not in self._levels:
+            self._levels.add(level)
+            self._wake.set()
+    
+    async def start(self, db) -> None:
+        if self._task:
+            return
+        self.db = db
+        self._task = asyncio.create_task(self._run())
+        logger.info("📚 Daily vocabulary warmer started")
+    
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+    
+    async def warm(self, day: dt.datetime) -> int:
+        """Build every missing pool for a day; returns pools built"""
+        service = VocabAIService(self.db)
+        built = 0
+        for level in sorted(self._levels):
+            exists = await self.db["ai_vocab_cache"].find_one(
+                {"cache_key": _pool_key(level, day)}, {"_id": 1}
+            )
+            if exists:
+                continue
+            try:
+                await service.build_daily_pool(level, day)
+                built += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Vocabulary pool warm-up failed for {level}: {e}")
+        return built
+    
+    async def _run(self) -> None:
+        while True:
+            self._wake.clear()
+            today = _utc_today()
+            tomorrow = today + dt.timedelta(days=1)
+            try:
+                await self.warm(today)
+                until_midnight = (tomorrow - dt.datetime.utcnow()).total_seconds()
+                if until_midnight <= self.lead_seconds:
+                    built = await self.warm(tomorrow)
+                    if built:
+                        logger.info(f"📚 Warmed {built} vocabulary pools for {tomorrow.date().isoformat()}")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Vocabulary pool warm-up failed: {e}")
+            
+            # Sleep until the next check or the start of the warm-up window
+            until_window = (tomorrow - dt.datetime.utcnow()).total_seconds() - self.lead_seconds
+            timeout = min(self.check_interval, until_window) if until_window > 0 else self.check_interval
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+
+
+# Global warmer instance
+daily_vocab_warmer = DailyVocabPoolWarmer()
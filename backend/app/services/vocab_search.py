@@ -0,0 +1,294 @@
+"""
+In-process vocabulary search index
+
+seed_words is small enough to keep in memory, and an unanchored regex over
+it cannot use an index. This module tokenizes word/translation/examples
+after folding case, umlauts (ä → ae) and ß (→ ss), and keeps:
+- an inverted index token → {doc id: best field}
+- a sorted token list for prefix-as-you-type lookups (bisect)
+- a deletion-variant map for edit-distance-1 typo tolerance
+Searches score and rank matches without touching MongoDB. The index is
+built at startup and refreshed incrementally (only changed documents are
+re-tokenized) when the seed_words version stamp moves.
+"""
+import asyncio
+import heapq
+import re
+import time
+import unicodedata
+from bisect import bisect_left, insort
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+VERSION_COLLECTION = "cache_versions"
+VERSION_KEY = "seed_words"
+# How often a process re-reads the version stamp
+VERSION_CHECK_SECONDS = 5.0
+
+# Field ranks: lower is more relevant
+WORD, TRANSLATION, EXAMPLE = 0, 1, 2
+EXACT_SCORE = (100, 40, 10)
+PREFIX_SCORE = (60, 25, 5)
+FUZZY_SCORE = (45, 15, 3)
+WHOLE_WORD_BONUS = 200
+WORD_PREFIX_BONUS = 50
+
+MIN_FUZZY_LENGTH = 4
+MAX_PREFIX_EXPANSIONS = 200
+ARTICLES = {"der", "die", "das"}
+
+_FOLD = str.maketrans({"ä": "ae", "ö": "oe", "ü": "ue", "ß": "ss"})
+_TOKEN = re.compile(r"\w+")
+_PROJECTION = {"word": 1, "translation": 1, "level": 1, "examples": 1}
+
+
+def fold(text: str) -> str:
+    """Lowercase, spell out umlauts/ß and drop any other accents"""
+    text = (text or "").lower().translate(_FOLD)
+    if text.isascii():
+        return text
+    return "".join(ch for ch in unicodedata.normalize("NFKD", text) if not unicodedata.combining(ch))
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN.findall(fold(text))
+
+
+def _deletions(token: str) -> Set[str]:
+    return {token[:i] + token[i + 1:] for i in range(len(token))}
+
+
+def _within_one_edit(a: str, b: str) -> bool:
+    """Levenshtein distance <= 1, also allowing one adjacent transposition"""
+    if a == b:
+        return True
+    la, lb = len(a), len(b)
+    if abs(la - lb) > 1:
+        return False
+    if la > lb:
+        a, b, la, lb = b, a, lb, la
+    i = 0
+    while i < la and a[i] == b[i]:
+        i += 1
+    if la == lb:
+        if a[i + 1:] == b[i + 1:]:
+            return True
+        return i + 1 < la and a[i] == b[i + 1] and a[i + 1] == b[i] and a[i + 2:] == b[i + 2:]
+    return a[i:] == b[i + 1:]
+
+
+def _headword(word: str) -> str:
+    """Folded word without its leading article ("der Tisch" → "tisch")"""
+    tokens = tokenize(word)
+    if len(tokens) > 1 and tokens[0] in ARTICLES:
+        tokens = tokens[1:]
+    return " ".join(tokens)
+
+
+class VocabSearchIndex:
+    """Ranked prefix / fuzzy search over seed_words"""
+
+    def __init__(self):
+        self.version: Optional[int] = None
+        self.docs: Dict[str, Dict[str, Any]] = {}
+        self._signatures: Dict[str, Tuple] = {}
+        self._doc_tokens: Dict[str, Set[str]] = {}
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._tokens: List[str] = []
+        self._new_tokens: Set[str] = set()
+        self._deletes: Dict[str, Set[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self.docs)
+
+    # Maintenance
+
+    @staticmethod
+    def _signature(doc: Dict[str, Any]) -> Tuple:
+        return (doc.get("word"), doc.get("translation"), doc.get("level"), tuple(doc.get("examples") or ()))
+
+    def add(self, doc: Dict[str, Any]) -> None:
+        doc_id = str(doc["_id"])
+        if doc_id in self.docs:
+            self.remove(doc_id)
+        examples = doc.get("examples") or []
+        self.docs[doc_id] = {
+            "_id": doc_id,
+            "word": doc.get("word"),
+            "level": doc.get("level"),
+            "translation": doc.get("translation"),
+            "example": examples[0] if examples else None,
+            "_head": _headword(doc.get("word") or ""),
+        }
+        self._signatures[doc_id] = self._signature(doc)
+
+        fields = [(WORD, doc.get("word") or ""), (TRANSLATION, doc.get("translation") or "")]
+        fields += [(EXAMPLE, ex) for ex in examples if isinstance(ex, str)]
+        tokens: Set[str] = set()
+        for field, text in fields:
+            for token in tokenize(text):
+                tokens.add(token)
+                postings = self._postings.get(token)
+                if postings is None:
+                    postings = self._postings[token] = {}
+                    self._new_tokens.add(token)
+                if field < postings.get(doc_id, EXAMPLE + 1):
+                    postings[doc_id] = field
+                if field != EXAMPLE and len(token) >= MIN_FUZZY_LENGTH:
+                    for variant in _deletions(token):
+                        self._deletes.setdefault(variant, set()).add(token)
+        self._doc_tokens[doc_id] = tokens
+
+    def _merge_new_tokens(self) -> None:
+        # Sorting once per batch beats an insort per new token on bulk loads
+        if len(self._new_tokens) > 64:
+            self._tokens = sorted(self._new_tokens.union(self._tokens))
+        else:
+            for token in self._new_tokens:
+                insort(self._tokens, token)
+        self._new_tokens.clear()
+
+    def remove(self, doc_id: str) -> None:
+        self.docs.pop(doc_id, None)
+        self._signatures.pop(doc_id, None)
+        for token in self._doc_tokens.pop(doc_id, ()):
+            postings = self._postings.get(token)
+            if postings is None:
+                continue
+            postings.pop(doc_id, None)
+            if not postings:
+                # Stale deletion variants are skipped at lookup time
+                del self._postings[token]
+                if token in self._new_tokens:
+                    self._new_tokens.discard(token)
+                else:
+                    del self._tokens[bisect_left(self._tokens, token)]
+
+    def sync(self, docs: Iterable[Dict[str, Any]]) -> Dict[str, int]:
+        """Apply the current collection contents, re-indexing only what changed"""
+        seen: Set[str] = set()
+        added = updated = 0
+        for doc in docs:
+            doc_id = str(doc["_id"])
+            seen.add(doc_id)
+            old = self._signatures.get(doc_id)
+            if old is None:
+                added += 1
+            elif old != self._signature(doc):
+                updated += 1
+            else:
+                continue
+            self.add(doc)
+        removed = [doc_id for doc_id in self.docs if doc_id not in seen]
+        for doc_id in removed:
+            self.remove(doc_id)
+        if self._new_tokens:
+            self._merge_new_tokens()
+        return {"added": added, "updated": updated, "removed": len(removed)}
+
+    # Lookup
+
+    def _prefix_tokens(self, prefix: str) -> Iterable[str]:
+        if self._new_tokens:
+            self._merge_new_tokens()
+        i = bisect_left(self._tokens, prefix)
+        end = min(len(self._tokens), i + MAX_PREFIX_EXPANSIONS)
+        while i < end and self._tokens[i].startswith(prefix):
+            yield self._tokens[i]
+            i += 1
+
+    def _fuzzy_tokens(self, term: str) -> Set[str]:
+        candidates = set(self._deletes.get(term, ()))  # one extra letter in the token
+        for variant in _deletions(term):
+            if variant in self._postings:
+                candidates.add(variant)  # one extra letter in the query
+            candidates |= self._deletes.get(variant, set())  # substitution / transposition
+        candidates.discard(term)
+        return {t for t in candidates if t in self._postings and _within_one_edit(term, t)}
+
+    def _term_scores(self, term: str) -> Dict[str, int]:
+        scores: Dict[str, int] = {}
+
+        def credit(token: str, table: Tuple[int, int, int]) -> None:
+            for doc_id, field in self._postings[token].items():
+                score = table[field]
+                if score > scores.get(doc_id, 0):
+                    scores[doc_id] = score
+
+        if term in self._postings:
+            credit(term, EXACT_SCORE)
+        for token in self._prefix_tokens(term):
+            if token != term:
+                credit(token, PREFIX_SCORE)
+        if len(term) >= MIN_FUZZY_LENGTH:
+            for token in self._fuzzy_tokens(term):
+                credit(token, FUZZY_SCORE)
+        return scores
+
+    def search(self, query: str, levels: Optional[Iterable[str]] = None, limit: int = 25) -> List[Dict[str, Any]]:
+        """Every query term must match (exactly, as a prefix, or within one edit)"""
+        level_set = set(levels) if levels else None
+        terms = tokenize(query)
+        if not terms:
+            docs = (d for d in self.docs.values() if level_set is None or d["level"] in level_set)
+            return [self._public(d) for _, d in zip(range(limit), docs)]
+
+        scores: Optional[Dict[str, int]] = None
+        for term in terms:
+            term_scores = self._term_scores(term)
+            if scores is None:
+                scores = term_scores
+            else:
+                scores = {doc_id: s + term_scores[doc_id] for doc_id, s in scores.items() if doc_id in term_scores}
+            if not scores:
+                return []
+
+        folded = " ".join(terms)
+        ranked = []
+        for doc_id, score in scores.items():
+            doc = self.docs[doc_id]
+            if level_set is not None and doc["level"] not in level_set:
+                continue
+            if doc["_head"] == folded:
+                score += WHOLE_WORD_BONUS
+            elif doc["_head"].startswith(folded):
+                score += WORD_PREFIX_BONUS
+            ranked.append((-score, len(doc["word"] or ""), doc["word"] or "", doc_id))
+        return [self._public(self.docs[doc_id]) for *_, doc_id in heapq.nsmallest(limit, ranked)]
+
+    @staticmethod
+    def _public(doc: Dict[str, Any]) -> Dict[str, Any]:
+        return {key: value for key, value in doc.items() if not key.startswith("_") or key == "_id"}
+
+
+_index = VocabSearchIndex()
+_checked_at = 0.0
+_lock = asyncio.Lock()
+
+
+async def _current_version(db) -> int:
+    doc = await db[VERSION_COLLECTION].find_one({"_id": VERSION_KEY}, {"version": 1})
+    return int(doc.get("version", 0)) if doc else 0
+
+
+async def get_vocab_search_index(db) -> VocabSearchIndex:
+    """Process-wide index, synced with seed_words when the version stamp moves"""
+    global _checked_at
+    if _index.version is not None and time.monotonic() - _checked_at < VERSION_CHECK_SECONDS:
+        return _index
+    async with _lock:
+        if _index.version is not None and time.monotonic() - _checked_at < VERSION_CHECK_SECONDS:
+            return _index
+        version = await _current_version(db)
+        if _index.version != version:
+            docs = await db["seed_words"].find({}, _PROJECTION).to_list(length=None)
+            _index.sync(docs)
+            _index.version = version
+        _checked_at = time.monotonic()
+    return _index
+
+
+async def bump_seed_words_version(db) -> None:
+    """Mark seed_words as changed so every process re-syncs its index"""
+    global _checked_at
+    await db[VERSION_COLLECTION].update_one({"_id": VERSION_KEY}, {"$inc": {"version": 1}}, upsert=True)
+    _checked_at = 0.0
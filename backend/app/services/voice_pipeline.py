@@ -0,0 +1,196 @@
+"""
+Pipelined voice turns for scenario conversations
+
+Audio → Whisper → streamed LLM reply → sentence-by-sentence Piper TTS.
+Each sentence is synthesized as soon as the model finishes it, so the
+learner hears the start of the reply while the rest is still generating.
+"""
+import asyncio
+import base64
+import logging
+import re
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from app.ollama_client import OllamaClient
+from app.piper_client import piper_client
+from app.whisper_client import whisper_client
+from app.services.scenario_service import ScenarioService
+from app.services.conversation_engine import ConversationEngine
+
+logger = logging.getLogger(__name__)
+
+SendEvent = Callable[[Dict[str, Any]], Awaitable[None]]
+
+# Sentence end followed by whitespace; the trailing sentence is flushed at the end
+_SENTENCE_BREAK = re.compile(r'(?<=[.!?…])\s+')
+
+
+class VoiceTurnError(Exception):
+    """A voice turn could not be started (no conversation, no speech, ...)"""
+
+
+class SentenceSegmenter:
+    """Accumulates streamed tokens and emits complete sentences"""
+
+    def __init__(self):
+        self._buffer = ""
+
+    def feed(self, text: str) -> List[str]:
+        self._buffer += text
+        parts = _SENTENCE_BREAK.split(self._buffer)
+        self._buffer = parts.pop()
+        return [part.strip() for part in parts if part.strip()]
+
+    def flush(self) -> Optional[str]:
+        rest, self._buffer = self._buffer.strip(), ""
+        return rest or None
+
+
+class VoiceTurnLatency:
+    """Milliseconds from turn start to the end of each stage"""
+
+    STAGES = ("stt", "first_token", "first_audio", "total")
+
+    def __init__(self):
+        self._start = time.perf_counter()
+        self._marks: Dict[str, float] = {}
+
+    def mark(self, stage: str) -> None:
+        # Only the first occurrence counts (first token, first audio chunk)
+        if stage not in self._marks:
+            self._marks[stage] = round((time.perf_counter() - self._start) * 1000, 1)
+
+    def as_dict(self) -> Dict[str, Optional[float]]:
+        return {f"{stage}_ms": self._marks.get(stage) for stage in self.STAGES}
+
+
+def _serialized(send: SendEvent) -> SendEvent:
+    """The speaker task and the token loop share one socket: one send at a time"""
+    lock = asyncio.Lock()
+
+    async def locked_send(event: Dict[str, Any]) -> None:
+        async with lock:
+            await send(event)
+
+    return locked_send
+
+
+async def run_voice_turn(
+    db,
+    ollama: OllamaClient,
+    user_id: str,
+    scenario_id: str,
+    audio_data: bytes,
+    send: SendEvent
+) -> Dict[str, Any]:
+    """
+    Run one pipelined voice turn, pushing events through send():
+    transcript, token (text deltas), audio_chunk (base64 WAV per sentence)
+    and turn_complete with the per-stage latency.
+    Returns the turn_complete payload.
+    """
+    send = _serialized(send)
+    latency = VoiceTurnLatency()
+    service = ScenarioService(db)
+    engine = ConversationEngine(ollama)
+
+    state = await service.get_conversation_state(user_id=user_id, scenario_id=scenario_id)
+    if not state:
+        raise VoiceTurnError("No active conversation found. Start the scenario first.")
+
+    scenario = await service.get_scenario_by_id(scenario_id)
+    character = next((c for c in scenario.characters if c.id == state.character_id), None) if scenario else None
+    if not scenario or not character:
+        raise VoiceTurnError("Scenario or character not found")
+
+    # 1. Transcribe
+    transcription_result = await whisper_client.transcribe(audio_data, language="de")
+    user_message = transcription_result.get('text', '').strip()
+    latency.mark("stt")
+    if not user_message:
+        raise VoiceTurnError("Could not transcribe audio")
+    await send({"type": "transcript", "text": user_message})
+
+    await service.add_message(state, "user", user_message)
+    completed_objectives = engine.check_objectives(user_message, scenario, state)
+    for obj_id in completed_objectives:
+        await service.complete_objective(state, obj_id)
+
+    # 2. Synthesize sentences in order while the reply is still streaming
+    sentences: asyncio.Queue = asyncio.Queue()
+
+    async def speak() -> int:
+        seq = 0
+        while True:
+            sentence = await sentences.get()
+            if sentence is None:
+                return seq
+            try:
+                audio = await piper_client.synthesize(sentence)
+            except Exception as e:
+                logger.warning(f"Voice turn TTS failed for segment {seq}: {e}")
+                audio = None
+            if audio:
+                latency.mark("first_audio")
+            await send({
+                "type": "audio_chunk",
+                "seq": seq,
+                "text": sentence,
+                "audio": base64.b64encode(audio).decode('utf-8') if audio else None
+            })
+            seq += 1
+
+    speaker = asyncio.create_task(speak())
+    segmenter = SentenceSegmenter()
+    full_response = ""
+    try:
+        async for chunk in engine.generate_response_stream(
+            user_message=user_message,
+            scenario=scenario,
+            character=character,
+            state=state
+        ):
+            latency.mark("first_token")
+            full_response += chunk
+            await send({"type": "token", "content": chunk})
+            for sentence in segmenter.feed(chunk):
+                sentences.put_nowait(sentence)
+
+        rest = segmenter.flush()
+        if rest:
+            sentences.put_nowait(rest)
+        sentences.put_nowait(None)
+        audio_chunks = await speaker
+    except BaseException:
+        speaker.cancel()
+        raise
+
+    # 3. Persist the turn
+    character_response = full_response.strip()
+    if character_response and character_response[-1] not in '.!?':
+        character_response += '.'
+    await service.add_message(state, "character", character_response)
+
+    is_complete = engine.is_scenario_complete(scenario, state)
+    if is_complete:
+        await service.complete_scenario(state)
+    await service.update_conversation_state(state)
+
+    latency.mark("total")
+    timings = latency.as_dict()
+    logger.info(f"🎙️ Voice turn {scenario_id} for {user_id}: {timings}")
+
+    result = {
+        "type": "turn_complete",
+        "transcribed_text": user_message,
+        "character_message": character_response,
+        "audio_chunks": audio_chunks,
+        "objectives_updated": completed_objectives,
+        "grammar_feedback": engine.extract_grammar_feedback(user_message),
+        "score_change": engine.calculate_score_change(completed_objectives),
+        "conversation_complete": is_complete,
+        "latency": timings
+    }
+    await send(result)
+    return result
@@ -0,0 +1,301 @@
+"""
+Webhook delivery worker
+
+webhook_deliveries doubles as a durable queue: events are inserted as
+pending deliveries and a background worker leases them in batches, posts
+them through one pooled HTTP/2 client with a per-endpoint in-flight cap,
+and writes results and webhook stats back with bulk writes. Retries are
+rescheduled via next_retry_at instead of sleeping in a request worker, so
+they survive restarts; leases expire if a worker dies mid-batch and are
+renewed right before each POST, so a slow endpoint cannot outlast them.
+"""
+import asyncio
+import hashlib
+import hmac
+import importlib.util
+import json
+import logging
+import uuid
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+import httpx
+from bson import ObjectId
+from pymongo import UpdateOne
+
+from app.models.organization import WebhookDelivery
+
+logger = logging.getLogger(__name__)
+
+# h2 enables httpx HTTP/2
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+DEFAULT_BATCH_SIZE = 100
+DEFAULT_PER_ENDPOINT_LIMIT = 4
+LEASE_SECONDS = 120
+POLL_INTERVAL = 2.0
+
+# Outcome marker for deliveries re-leased by another worker before sending
+LEASE_LOST = object()
+
+
+def _to_oid(value: Any) -> Any:
+    return ObjectId(value) if isinstance(value, str) and ObjectId.is_valid(value) else value
+
+
+def sign_payload(body: bytes, secret: str) -> str:
+    """HMAC-SHA256 of the exact request body"""
+    return hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+
+
+def retry_delay(attempt: int) -> timedelta:
+    """Exponential backoff after the given (1-based) attempt"""
+    return timedelta(seconds=2 ** attempt)
+
+
+def build_http_client(max_connections: int = 100) -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        http2=HTTP2_AVAILABLE,
+        timeout=httpx.Timeout(30.0, connect=5.0),
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections
+        )
+    )
+
+
+async def enqueue_deliveries(
+    db,
+    webhooks: List[Dict[str, Any]],
+    event_type: str,
+    payload: Dict[str, Any]
+) -> int:
+    """Insert one pending delivery per webhook and wake the worker"""
+    if not webhooks:
+        return 0
+    now = datetime.utcnow()
+    docs = []
+    for webhook in webhooks:
+        delivery = WebhookDelivery(
+            webhook_id=str(webhook["_id"]),
+            organization_id=webhook["organization_id"],
+            event_type=event_type,
+            payload=payload,
+            next_retry_at=now
+        )
+        docs.append(delivery.dict(by_alias=True, exclude={"id"}))
+    await db["webhook_deliveries"].insert_many(docs, ordered=False)
+    webhook_worker.notify()
+    return len(docs)
+
+
+class WebhookDeliveryWorker:
+    """Leases pending deliveries and sends them with bounded concurrency"""
+
+    def __init__(
+        self,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        per_endpoint_limit: int = DEFAULT_PER_ENDPOINT_LIMIT
+    ):
+        self.batch_size = batch_size
+        self.per_endpoint_limit = per_endpoint_limit
+        self.worker_id = uuid.uuid4().hex
+        self.db = None
+        self.client: Optional[httpx.AsyncClient] = None
+        # endpoint -> [semaphore, holders]; dropped once nobody holds or waits on it
+        self._endpoint_slots: Dict[str, List[Any]] = {}
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def notify(self) -> None:
+        """Wake the loop early after new deliveries are queued"""
+        self._wake.set()
+
+    @asynccontextmanager
+    async def _slot(self, url: str):
+        """Hold one of the endpoint's in-flight slots"""
+        endpoint = httpx.URL(url).host or url
+        slot = self._endpoint_slots.get(endpoint)
+        if slot is None:
+            slot = self._endpoint_slots[endpoint] = [asyncio.Semaphore(self.per_endpoint_limit), 0]
+        slot[1] += 1
+        try:
+            async with slot[0]:
+                yield
+        finally:
+            slot[1] -= 1
+            if not slot[1]:
+                del self._endpoint_slots[endpoint]
+
+    async def start(self, db, client: Optional[httpx.AsyncClient] = None) -> None:
+        if self._task:
+            return
+        self.db = db
+        self.client = client or build_http_client()
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"📮 Webhook worker started (http2={HTTP2_AVAILABLE})")
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self.client:
+            await self.client.aclose()
+            self.client = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                processed = await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Webhook worker batch failed: {e}")
+                processed = 0
+            if processed < self.batch_size:
+                # Queue drained: sleep until notified or the next poll
+                self._wake.clear()
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=POLL_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def _lease(self) -> List[Dict[str, Any]]:
+        """Claim up to batch_size due deliveries for this worker"""
+        now = datetime.utcnow()
+        due = {
+            "status": "pending",
+            "next_retry_at": {"$lte": now},
+            "$or": [{"locked_until": None}, {"locked_until": {"$lt": now}}]
+        }
+        candidates = await self.db["webhook_deliveries"].find(
+            due, {"_id": 1}
+        ).sort("next_retry_at", 1).limit(self.batch_size).to_list(length=self.batch_size)
+        if not candidates:
+            return []
+
+        lease = {"lease_owner": self.worker_id, "locked_until": now + timedelta(seconds=LEASE_SECONDS)}
+        await self.db["webhook_deliveries"].update_many(
+            {"_id": {"$in": [c["_id"] for c in candidates]}, **due},
+            {"$set": lease}
+        )
+        return await self.db["webhook_deliveries"].find(lease).to_list(length=self.batch_size)
+
+    async def _renew(self, delivery: Dict[str, Any]) -> bool:
+        """Extend this worker's lease on a delivery; False if another worker took it over"""
+        result = await self.db["webhook_deliveries"].update_one(
+            {"_id": delivery["_id"], "lease_owner": self.worker_id},
+            {"$set": {"locked_until": datetime.utcnow() + timedelta(seconds=LEASE_SECONDS)}}
+        )
+        return result.matched_count == 1
+
+    async def send(self, delivery: Dict[str, Any], webhook: Optional[Dict[str, Any]]) -> Any:
+        """
+        POST one leased delivery under its endpoint slot. Returns the outcome,
+        None if the webhook is gone or inactive, or LEASE_LOST if another
+        worker took the delivery over while it waited for a slot.
+        """
+        if not webhook or not webhook.get("active"):
+            return None
+        async with self._slot(webhook["url"]):
+            # Waiting for a busy endpoint can take longer than the lease
+            if not await self._renew(delivery):
+                return LEASE_LOST
+            return await self._post(delivery, webhook)
+
+    async def _post(self, delivery: Dict[str, Any], webhook: Dict[str, Any]) -> Dict[str, Any]:
+        body = json.dumps(delivery["payload"], separators=(",", ":"), default=str).encode()
+        headers = {
+            "X-Webhook-Signature": sign_payload(body, webhook["secret"]),
+            "X-Webhook-Event": delivery["event_type"],
+            "X-Webhook-Delivery": str(delivery["_id"]),
+            "Content-Type": "application/json"
+        }
+        try:
+            response = await self.client.post(webhook["url"], content=body, headers=headers)
+            return {
+                "ok": response.status_code < 400,
+                "response_code": response.status_code,
+                "response_body": response.text[:1000],  # Limit size
+                "error_message": None
+            }
+        except Exception as e:
+            return {"ok": False, "response_code": None, "response_body": None, "error_message": str(e)}
+
+    async def run_once(self) -> int:
+        """Deliver one leased batch and flush its results; returns batch size"""
+        deliveries = await self._lease()
+        if not deliveries:
+            return 0
+
+        webhook_ids = {_to_oid(d["webhook_id"]) for d in deliveries}
+        webhooks = {
+            str(w["_id"]): w
+            for w in await self.db["webhooks"].find({"_id": {"$in": list(webhook_ids)}}).to_list(length=len(webhook_ids))
+        }
+
+        async def attempt(delivery):
+            return delivery, await self.send(delivery, webhooks.get(delivery["webhook_id"]))
+
+        results = await asyncio.gather(*(attempt(d) for d in deliveries))
+
+        now = datetime.utcnow()
+        delivery_ops = []
+        stats: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        last_success: Dict[str, datetime] = {}
+        for delivery, outcome in results:
+            if outcome is LEASE_LOST:
+                continue
+            owned = {"_id": delivery["_id"], "lease_owner": self.worker_id}
+            release = {"lease_owner": None, "locked_until": None}
+            if outcome is None:
+                delivery_ops.append(UpdateOne(
+                    owned,
+                    {"$set": {**release, "status": "cancelled"}}
+                ))
+                continue
+
+            attempts = delivery.get("attempts", 0) + 1
+            update = {
+                **release,
+                "attempts": attempts,
+                "response_code": outcome["response_code"],
+                "response_body": outcome["response_body"],
+                "error_message": outcome["error_message"]
+            }
+            webhook_stats = stats[delivery["webhook_id"]]
+            webhook_stats["total_deliveries"] += 1
+            if outcome["ok"]:
+                update.update(status="delivered", delivered_at=now, next_retry_at=None)
+                webhook_stats["successful_deliveries"] += 1
+                last_success[delivery["webhook_id"]] = now
+            else:
+                webhook_stats["failed_deliveries"] += 1
+                if attempts < delivery.get("max_attempts", 3):
+                    update.update(status="pending", next_retry_at=now + retry_delay(attempts))
+                else:
+                    update.update(status="failed", next_retry_at=None)
+            delivery_ops.append(UpdateOne(owned, {"$set": update}))
+
+        if delivery_ops:
+            await self.db["webhook_deliveries"].bulk_write(delivery_ops, ordered=False)
+        if stats:
+            webhook_ops = []
+            for webhook_id, counters in stats.items():
+                update = {"$inc": dict(counters)}
+                if webhook_id in last_success:
+                    update["$set"] = {"last_delivery_at": last_success[webhook_id]}
+                webhook_ops.append(UpdateOne({"_id": _to_oid(webhook_id)}, update))
+            await self.db["webhooks"].bulk_write(webhook_ops, ordered=False)
+
+        return len(deliveries)
+
+
+# Global worker instance
+webhook_worker = WebhookDeliveryWorker()
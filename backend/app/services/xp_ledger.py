@@ -0,0 +1,295 @@
+"""
+XP event ledger
+
+Every XP / counter change is appended to xp_ledger as one small document
+(a single insert, no read-modify-write on the hot path). One background
+writer per process leases pending events in batches, coalesces them per
+(target collection, user) and applies them with one $inc bulk_write per
+collection, then recomputes the derived level fields.
+
+Batches are applied exactly once: each counter document remembers its last
+applied batch ids and the $inc is filtered on the batch id, so a batch that
+is re-leased after a crash (same batch_id) does not double count, and the
+leaderboard only hears about users whose $inc landed in this attempt.
+Applied events stay in the ledger until the TTL index drops them.
+"""
+import asyncio
+import logging
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from pymongo import UpdateOne
+from pymongo.errors import DuplicateKeyError
+
+from app.models.achievement import UserStats, get_level_from_xp
+from app.models.gamification import UserLevel, calculate_level_from_xp, calculate_xp_for_level
+
+logger = logging.getLogger(__name__)
+
+LEDGER_COLLECTION = "xp_ledger"
+# Re-lease claims for batches whose writer died mid-apply
+LEASE_COLLECTION = "xp_ledger_leases"
+USER_STATS = "user_stats"
+USER_LEVELS = "user_levels"
+TARGETS = (USER_STATS, USER_LEVELS)
+
+DEFAULT_BATCH_SIZE = 500
+LEASE_SECONDS = 60
+POLL_INTERVAL = 1.0
+# Applied batch ids remembered per counter document
+APPLIED_BATCHES_KEPT = 20
+
+
+async def emit_xp(
+    db,
+    user_id: str,
+    target: str,
+    inc: Dict[str, int],
+    source: str,
+    metadata: Optional[Dict[str, Any]] = None
+) -> None:
+    """Append one counter change for the writer to apply"""
+    if target not in TARGETS:
+        raise ValueError(f"Unknown XP ledger target: {target}")
+    inc = {field: amount for field, amount in inc.items() if amount}
+    if not inc:
+        return
+    await db[LEDGER_COLLECTION].insert_one({
+        "user_id": user_id,
+        "target": target,
+        "inc": inc,
+        "source": source,
+        "metadata": metadata or {},
+        "created_at": datetime.utcnow(),
+        "batch_id": None,
+        "locked_until": None,
+        "applied_at": None
+    })
+    xp_ledger_writer.notify()
+
+
+def coalesce(events: List[Dict[str, Any]]) -> Dict[Tuple[str, str], Dict[str, int]]:
+    """Sum the increments of a batch per (target, user)"""
+    totals: Dict[Tuple[str, str], Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+    for event in events:
+        counters = totals[(event["target"], event["user_id"])]
+        for field, amount in event["inc"].items():
+            counters[field] += amount
+    return {key: dict(counters) for key, counters in totals.items()}
+
+
+def _defaults(target: str, user_id: str) -> Dict[str, Any]:
+    if target == USER_STATS:
+        return UserStats(user_id=user_id).model_dump(exclude={"id"})
+    return UserLevel(user_id=user_id).dict()
+
+
+def _level_fields(target: str, total_xp: int) -> Dict[str, Any]:
+    if target == USER_STATS:
+        level, _, xp_to_next = get_level_from_xp(total_xp)
+        return {"level": level, "xp_to_next_level": xp_to_next}
+    level = calculate_level_from_xp(total_xp)
+    floor = calculate_xp_for_level(level)
+    return {
+        "level": level,
+        "current_xp": total_xp - floor,
+        "next_level_xp": calculate_xp_for_level(level + 1) - floor
+    }
+
+
+class XPLedgerWriter:
+    """Leases ledger batches and applies them as coalesced $inc bulk writes"""
+
+    def __init__(self, batch_size: int = DEFAULT_BATCH_SIZE):
+        self.batch_size = batch_size
+        self.worker_id = uuid.uuid4().hex
+        self.db = None
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def notify(self) -> None:
+        """Wake the loop early after new events are appended"""
+        self._wake.set()
+
+    async def start(self, db) -> None:
+        if self._task:
+            return
+        self.db = db
+        self._task = asyncio.create_task(self._run())
+        logger.info("📒 XP ledger writer started")
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self.db is not None:
+            # Apply whatever is already queued before shutting down
+            try:
+                while await self.run_once() >= self.batch_size:
+                    pass
+            except Exception as e:
+                logger.error(f"XP ledger final flush failed: {e}")
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                processed = await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"XP ledger batch failed: {e}")
+                processed = 0
+            if processed < self.batch_size:
+                # Ledger drained: sleep until notified or the next poll
+                self._wake.clear()
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=POLL_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def _lease(self) -> Tuple[Optional[str], List[Dict[str, Any]], bool]:
+        """Re-claim an expired batch (keeping its id) or claim a new one; flags re-leases"""
+        ledger = self.db[LEDGER_COLLECTION]
+        now = datetime.utcnow()
+        locked_until = now + timedelta(seconds=LEASE_SECONDS)
+
+        expired = await ledger.find_one(
+            {"applied_at": None, "batch_id": {"$ne": None}, "locked_until": {"$lt": now}},
+            {"batch_id": 1}
+        )
+        if expired and await self._claim_expired(expired["batch_id"], now, locked_until):
+            batch_id = expired["batch_id"]
+            await ledger.update_many(
+                {"batch_id": batch_id, "applied_at": None},
+                {"$set": {"locked_until": locked_until, "lease_owner": self.worker_id}}
+            )
+            return batch_id, await ledger.find(
+                {"batch_id": batch_id, "applied_at": None}
+            ).to_list(length=None), True
+
+        candidates = await ledger.find(
+            {"batch_id": None}, {"_id": 1}
+        ).sort("_id", 1).limit(self.batch_size).to_list(length=self.batch_size)
+        if not candidates:
+            return None, [], False
+        batch_id = uuid.uuid4().hex
+        await ledger.update_many(
+            {"_id": {"$in": [c["_id"] for c in candidates]}, "batch_id": None},
+            {"$set": {"batch_id": batch_id, "locked_until": locked_until, "lease_owner": self.worker_id}}
+        )
+        return batch_id, await ledger.find({"batch_id": batch_id}).to_list(length=self.batch_size), False
+
+    async def _claim_expired(self, batch_id: str, now: datetime, locked_until: datetime) -> bool:
+        """One writer wins the re-lease of an abandoned batch"""
+        try:
+            await self.db[LEASE_COLLECTION].update_one(
+                {"_id": batch_id, "locked_until": {"$lt": now}},
+                {"$set": {"owner": self.worker_id, "locked_until": locked_until}},
+                upsert=True
+            )
+            return True
+        except DuplicateKeyError:
+            return False
+
+    async def apply(self, batch_id: str, events: List[Dict[str, Any]], released: bool = False) -> None:
+        """Apply one leased batch to the counter collections"""
+        now = datetime.utcnow()
+        by_target: Dict[str, Dict[str, Dict[str, int]]] = defaultdict(dict)
+        for (target, user_id), inc in coalesce(events).items():
+            by_target[target][user_id] = inc
+
+        for target, users in by_target.items():
+            collection = self.db[target]
+            await collection.bulk_write([
+                UpdateOne(
+                    {"user_id": user_id},
+                    {"$setOnInsert": _defaults(target, user_id)},
+                    upsert=True
+                )
+                for user_id in users
+            ], ordered=False)
+            applied = set(users)
+            if released:
+                # The crashed attempt already applied (and reported) these users
+                applied -= set(await collection.distinct(
+                    "user_id", {"user_id": {"$in": list(users)}, "xp_ledger_batches": batch_id}
+                ))
+            await collection.bulk_write([
+                UpdateOne(
+                    {"user_id": user_id, "xp_ledger_batches": {"$ne": batch_id}},
+                    {
+                        "$inc": inc,
+                        "$set": {"updated_at": now},
+                        "$push": {"xp_ledger_batches": {"$each": [batch_id], "$slice": -APPLIED_BATCHES_KEPT}}
+                    }
+                )
+                for user_id, inc in users.items()
+            ], ordered=False)
+
+            xp_users = [user_id for user_id, inc in users.items() if inc.get("total_xp")]
+            if xp_users:
+                gained = {u: users[u]["total_xp"] for u in xp_users if u in applied}
+                await self._refresh_levels(target, xp_users, gained)
+
+        await self.db[LEDGER_COLLECTION].update_many(
+            {"batch_id": batch_id},
+            {"$set": {"applied_at": now, "locked_until": None}}
+        )
+
+    async def _refresh_levels(self, target: str, user_ids: List[str], gained: Dict[str, int]) -> None:
+        """Recompute level fields from the new totals; notify level-ups
+
+        Only users in `gained` (those whose $inc this attempt applied) are
+        reported to the leaderboards.
+        """
+        collection = self.db[target]
+        docs = await collection.find(
+            {"user_id": {"$in": user_ids}},
+            {"user_id": 1, "total_xp": 1, "level": 1}
+        ).to_list(length=len(user_ids))
+        ops = []
+        level_ups = []
+        for doc in docs:
+            total_xp = doc.get("total_xp") or 0
+            fields = _level_fields(target, total_xp)
+            if fields["level"] > (doc.get("level") or 1):
+                level_ups.append((doc["user_id"], fields["level"]))
+            # Skipped if another batch moved total_xp meanwhile; that batch recomputes
+            ops.append(UpdateOne({"user_id": doc["user_id"], "total_xp": total_xp}, {"$set": fields}))
+        if ops:
+            await collection.bulk_write(ops, ordered=False)
+
+        if target != USER_STATS:
+            return
+        from app.services.leaderboard_service import LeaderboardService
+        leaderboards = LeaderboardService(self.db)
+        for doc in docs:
+            if doc["user_id"] in gained:
+                await leaderboards.record_xp(doc["user_id"], gained[doc["user_id"]], doc.get("total_xp") or 0)
+        if level_ups:
+            try:
+                from app.services.notification_service import NotificationService
+                notification_service = NotificationService(self.db)
+                for user_id, level in level_ups:
+                    await notification_service.create_level_up_notification(user_id=user_id, new_level=level)
+            except Exception as e:
+                # Don't fail the batch if notifications fail
+                logger.warning(f"Failed to create level-up notification: {e}")
+
+    async def run_once(self) -> int:
+        """Apply one leased batch; returns the number of events applied"""
+        batch_id, events, released = await self._lease()
+        if not events:
+            return 0
+        await self.apply(batch_id, events, released)
+        return len(events)
+
+
+# Global writer instance
+xp_ledger_writer = XPLedgerWriter()
@@ -3,6 +3,8 @@ import os
 import logging
 import asyncio
 from .db import get_db
+from .services.grammar_rule_engine import bump_rules_version
+from .services.vocab_search import bump_seed_words_version
 
 SEED_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'seed')
 logger = logging.getLogger(__name__)
@@ -32,6 +34,7 @@ async def seed_collections():
                     data = json.load(f)
                     if isinstance(data, list) and data:
                         await with_timeout(db['seed_words'].insert_many(data))
+                        await with_timeout(bump_seed_words_version(db))
             except Exception:
                 # Ignore seed file errors silently (non-critical for startup)
                 pass
@@ -185,6 +188,7 @@ async def seed_collections():
             pass
         # Seed grammar rules
         count_gr = await with_timeout(db['grammar_rules'].count_documents({}))
+        seeded_gr = False
         if count_gr == 0:
             path = os.path.join(SEED_DIR, 'grammar_rules.json')
             try:
@@ -192,6 +196,7 @@ async def seed_collections():
                     data = json.load(f)
                     if isinstance(data, list) and data:
                         await with_timeout(db['grammar_rules'].insert_many(data))
+                        seeded_gr = True
             except Exception:
                 pass
         # Top up grammar_rules to at least 100 entries
@@ -211,8 +216,14 @@ async def seed_collections():
                     })
                 if rules:
                     await with_timeout(db['grammar_rules'].insert_many(rules))
+                    seeded_gr = True
         except Exception:
             pass
+        if seeded_gr:
+            try:
+                await with_timeout(bump_rules_version(db))
+            except Exception:
+                pass
         
         # Seed scenarios
         try:
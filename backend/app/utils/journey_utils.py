@@ -2,7 +2,7 @@
 Utility functions for journey-related operations
 """
 from typing import Optional
-from bson import ObjectId
+from ..services.user_context import get_user_context, EMPTY_JOURNEY
 
 
 async def get_user_journey_level(db, user_id: str) -> Optional[str]:
@@ -11,37 +11,10 @@ async def get_user_journey_level(db, user_id: str) -> Optional[str]:
     Returns the level (e.g., 'A1', 'B1', 'Beginner', etc.) or None
     """
     try:
-        print(f"[JOURNEY] Looking up user_id: {user_id}")
-        user = await db["users"].find_one({"_id": ObjectId(user_id)})
-        if not user:
-            print(f"[JOURNEY] User not found with ID: {user_id}")
-            return None
-        
-        print(f"[JOURNEY] Found user: {user.get('email')}")
-        journeys_data = user.get("learning_journeys", {})
-        active_id = journeys_data.get("active_journey_id")
-        
-        print(f"[JOURNEY] Active journey ID: {active_id}")
-        print(f"[JOURNEY] Total journeys: {len(journeys_data.get('journeys', []))}")
-        
-        if not active_id:
-            print(f"[JOURNEY] No active journey ID found")
-            return None
-        
-        # Find active journey
-        for journey in journeys_data.get("journeys", []):
-            print(f"[JOURNEY] Checking journey: {journey.get('id')} (type: {journey.get('type')}, level: {journey.get('level')})")
-            if journey.get("id") == active_id:
-                level = journey.get("level")
-                print(f"[JOURNEY] ✅ Found active journey level: {level}")
-                return level
-        
-        print(f"[JOURNEY] Active journey not found in journeys list")
-        return None
+        context = await get_user_context(db, user_id)
+        return context["journey"].get("level") if context else None
     except Exception as e:
         print(f"[JOURNEY] Error getting user journey level: {e}")
-        import traceback
-        traceback.print_exc()
         return None
 
 
@@ -51,30 +24,11 @@ async def get_user_journey_info(db, user_id: str) -> dict:
     Returns dict with level, type, and other journey info
     """
     try:
-        user = await db["users"].find_one({"_id": ObjectId(user_id)})
-        if not user:
-            return {"level": None, "type": None, "id": None}
-        
-        journeys_data = user.get("learning_journeys", {})
-        active_id = journeys_data.get("active_journey_id")
-        
-        if not active_id:
-            return {"level": None, "type": None, "id": None}
-        
-        # Find active journey
-        for journey in journeys_data.get("journeys", []):
-            if journey.get("id") == active_id:
-                return {
-                    "level": journey.get("level"),
-                    "type": journey.get("type"),
-                    "id": journey.get("id"),
-                    "is_primary": journey.get("is_primary", False)
-                }
-        
-        return {"level": None, "type": None, "id": None}
+        context = await get_user_context(db, user_id)
+        return dict(context["journey"]) if context else dict(EMPTY_JOURNEY)
     except Exception as e:
         print(f"Error getting user journey info: {e}")
-        return {"level": None, "type": None, "id": None}
+        return dict(EMPTY_JOURNEY)
 
 
 def normalize_level_for_query(level: str, journey_type: Optional[str] = None) -> dict:
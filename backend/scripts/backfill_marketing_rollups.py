@@ -0,0 +1,38 @@
+"""
+Rebuild the marketing_rollups buckets from the raw collections
+
+Reads conversion_events, invoices, subscriptions and ab_test_* and swaps in
+freshly computed hourly/daily buckets and gauges. Run once after deploying
+the rollups, and again whenever the counters are suspected to have drifted.
+"""
+import asyncio
+import sys
+import time
+from pathlib import Path
+from motor.motor_asyncio import AsyncIOMotorClient
+import os
+from dotenv import load_dotenv
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.marketing_rollups import MarketingRollupService
+
+load_dotenv()
+
+MONGODB_URI = os.getenv("MONGODB_URI", "mongodb://localhost:27017")
+DB_NAME = os.getenv("MONGODB_DB_NAME", "german_ai")
+
+async def main():
+    client = AsyncIOMotorClient(MONGODB_URI)
+    db = client[DB_NAME]
+
+    start = time.perf_counter()
+    written = await MarketingRollupService(db).rebuild()
+    for metric, count in sorted(written.items()):
+        print(f"   {metric:<24} {count:>8} buckets")
+    print(f"✅ Rebuilt marketing rollups in {time.perf_counter() - start:.2f}s")
+
+    client.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
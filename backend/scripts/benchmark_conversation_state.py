@@ -0,0 +1,123 @@
+"""
+Benchmark: whole-document $set vs delta updates for scenario turns
+
+For conversations of 10, 100 and 500 messages, runs turns (a user and a
+character message, one completed objective, score change) and measures
+building the update plus its BSON size both ways. With MongoDB reachable
+at MONGODB_URI the updates are also applied to a scratch collection
+(through ScenarioService for the delta path, so archiving kicks in) and
+the round trip is timed.
+
+Usage: python scripts/benchmark_conversation_state.py [turns]
+"""
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+import bson
+from bson import ObjectId
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.models.conversation_state import ConversationState, Message, ObjectiveProgress
+
+SIZES = (10, 100, 500)
+SENTENCE = "Ich hätte gern einen Kaffee mit Milch und ein Stück Apfelkuchen, bitte."
+
+
+def make_state(messages: int) -> ConversationState:
+    state = ConversationState(
+        id=ObjectId(),
+        user_id="bench-user",
+        scenario_id="bench-scenario",
+        character_id="bench-character",
+        objectives_progress=[ObjectiveProgress(objective_id=f"obj{i}") for i in range(5)],
+        messages=[Message(role="user" if i % 2 else "character", content=SENTENCE) for i in range(messages)],
+        total_messages=messages
+    )
+    state.mark_persisted()
+    return state
+
+
+def play_turn(state: ConversationState, turn: int) -> None:
+    # Same mutations as ScenarioService.add_message / complete_objective
+    for role in ("user", "character"):
+        state.messages.append(Message(role=role, content=SENTENCE))
+        state.total_messages += 1
+    progress = state.objectives_progress[turn % len(state.objectives_progress)]
+    if not progress.completed:
+        progress.completed = True
+        state.score += 20
+
+
+def legacy_update(state: ConversationState):
+    return {"$set": state.dict(by_alias=True, exclude={"id"})}
+
+
+def measure_build(size: int, turns: int, build) -> tuple:
+    state = make_state(size)
+    elapsed = 0.0
+    total_bytes = 0
+    for turn in range(turns):
+        play_turn(state, turn)
+        start = time.perf_counter()
+        update = build(state)
+        total_bytes += len(bson.encode(update))
+        elapsed += time.perf_counter() - start
+        state.mark_persisted()
+    return elapsed / turns * 1000, total_bytes // turns
+
+
+async def measure_mongo(db, size: int, turns: int) -> tuple:
+    from app.services.scenario_service import ScenarioService
+    service = ScenarioService(db)
+    service.conversation_states_collection = db["bench_conversation_states"]
+    service.message_archive_collection = db["bench_conversation_message_archive"]
+    collection = service.conversation_states_collection
+
+    results = []
+    for delta in (False, True):
+        state = make_state(size)
+        await collection.insert_one({"_id": state.id, **state.dict(by_alias=True, exclude={"id"})})
+        start = time.perf_counter()
+        for turn in range(turns):
+            play_turn(state, turn)
+            if delta:
+                await service.update_conversation_state(state)
+            else:
+                await collection.update_one({"_id": state.id}, legacy_update(state))
+        results.append((time.perf_counter() - start) / turns * 1000)
+    await collection.drop()
+    await service.message_archive_collection.drop()
+    return tuple(results)
+
+
+async def main():
+    turns = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    print(f"💬 {turns} turns per conversation size\n")
+    print(f"{'messages':>8}  {'full $set':>22}  {'delta':>22}")
+    for size in SIZES:
+        full_ms, full_bytes = measure_build(size, turns, legacy_update)
+        delta_ms, delta_bytes = measure_build(size, turns, lambda s: s.build_update())
+        print(f"{size:>8}  {full_ms:>8.3f} ms {full_bytes:>8} B  {delta_ms:>8.3f} ms {delta_bytes:>8} B")
+
+    if not os.getenv("MONGODB_URI"):
+        print("\n⚠️  MONGODB_URI not set, skipping the round-trip comparison")
+        return
+    from app.db import get_db
+    db = await get_db()
+    try:
+        await asyncio.wait_for(db.command("ping"), timeout=3)
+    except Exception as e:
+        print(f"\n⚠️  MongoDB unreachable ({e}), skipping the round-trip comparison")
+        return
+    print(f"\n{'messages':>8}  {'full $set turn':>16}  {'delta turn':>12}")
+    for size in SIZES:
+        full_ms, delta_ms = await measure_mongo(db, size, turns)
+        print(f"{size:>8}  {full_ms:>13.2f} ms  {delta_ms:>9.2f} ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,129 @@
+"""
+Benchmark: connection-per-message SMTP vs the pooled mail queue
+
+Starts a local SMTP sink (plain asyncio, accepts AUTH PLAIN, discards
+DATA) that waits `handshake_ms` before its greeting to stand in for the
+TCP + TLS + login cost of a real provider. Sends the same weekly_progress
+campaign both ways, and times str.replace rendering against the compiled
+templates. No MongoDB needed: the queue runs without log persistence.
+
+Usage: python scripts/benchmark_email_queue.py [messages] [pool_size] [handshake_ms]
+"""
+import asyncio
+import smtplib
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.email_service import EmailService
+from app.services.mail_queue import MailQueue, SMTPSessionPool
+
+HANDSHAKE = 0.02
+received = 0
+
+
+async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    global received
+    await asyncio.sleep(HANDSHAKE)
+    writer.write(b"220 sink ESMTP\r\n")
+    try:
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            command = line[:4].upper()
+            if command in (b"EHLO", b"HELO"):
+                writer.write(b"250-sink\r\n250-AUTH PLAIN\r\n250 8BITMIME\r\n")
+            elif command == b"AUTH":
+                writer.write(b"235 ok\r\n")
+            elif command == b"DATA":
+                writer.write(b"354 go\r\n")
+                await writer.drain()
+                await reader.readuntil(b"\r\n.\r\n")
+                received += 1
+                writer.write(b"250 queued\r\n")
+            elif command == b"QUIT":
+                writer.write(b"221 bye\r\n")
+                await writer.drain()
+                break
+            else:
+                writer.write(b"250 ok\r\n")
+            await writer.drain()
+    except (asyncio.IncompleteReadError, ConnectionResetError):
+        pass
+    finally:
+        writer.close()
+
+
+def send_per_connection(port: int, msg) -> None:
+    # Previous behaviour: connect, log in and quit for every message
+    with smtplib.SMTP("127.0.0.1", port, timeout=30) as server:
+        server.login("bench", "bench")
+        server.send_message(msg)
+
+
+def campaign(service: EmailService, n: int):
+    return [
+        service.render(f"user{i}@example.com", "weekly_progress", {
+            "name": f"User {i}", "scenarios_completed": i % 12, "words_learned": i % 300, "streak": i % 30
+        })
+        for i in range(n)
+    ]
+
+
+def bench_render(service: EmailService, n: int) -> None:
+    template = service.templates["weekly_progress"]
+    variables = {"name": "Anna", "scenarios_completed": 4, "words_learned": 120, "streak": 9}
+    start = time.perf_counter()
+    for _ in range(n):
+        html = template.html_content
+        for key, value in variables.items():
+            html = html.replace(f"{{{{{key}}}}}", str(value))
+    replace_us = (time.perf_counter() - start) / n * 1e6
+    compiled = service._compiled(template)[2]
+    start = time.perf_counter()
+    for _ in range(n):
+        compiled.render(variables)
+    compiled_us = (time.perf_counter() - start) / n * 1e6
+    print(f"render  str.replace {replace_us:.2f} µs   compiled {compiled_us:.2f} µs\n")
+
+
+async def main():
+    global HANDSHAKE, received
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    pool_size = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    HANDSHAKE = (int(sys.argv[3]) if len(sys.argv) > 3 else 20) / 1000
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    service = EmailService(db=None)
+    messages = campaign(service, n)
+    print(f"✉️  {n} messages, {HANDSHAKE * 1000:.0f} ms handshake, pool of {pool_size}\n")
+    bench_render(service, 20000)
+
+    loop = asyncio.get_running_loop()
+    received = 0
+    start = time.perf_counter()
+    for msg in messages:
+        await loop.run_in_executor(None, send_per_connection, port, msg)
+    elapsed = time.perf_counter() - start
+    print(f"{'connection per message':<24} {elapsed:>7.2f}s {n / elapsed:>8.0f} msg/s  ({received}/{n} received)")
+
+    received = 0
+    queue = MailQueue(SMTPSessionPool("127.0.0.1", port, "bench", "bench", size=pool_size, starttls=False), rate=0)
+    await queue.start(db=None)
+    start = time.perf_counter()
+    for msg in messages:
+        await queue.enqueue(msg, "weekly_progress")
+    await queue.join()
+    elapsed = time.perf_counter() - start
+    print(f"{'pooled mail queue':<24} {elapsed:>7.2f}s {n / elapsed:>8.0f} msg/s  ({received}/{n} received)")
+    await queue.stop()
+
+    server.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
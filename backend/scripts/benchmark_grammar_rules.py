@@ -0,0 +1,148 @@
+"""
+Benchmark: per-call rule loop vs the compiled DB grammar rule engine
+
+Builds a synthetic rule set shaped like the seeded grammar_rules collection
+(plain, case-insensitive and word-boundary literals plus regex rules) and
+corrects a corpus of learner sentences both ways, checking that the outputs
+agree. No MongoDB needed; the legacy path's per-call rule reload is not
+counted, only its matching loop.
+
+Usage: python scripts/benchmark_grammar_rules.py [rules] [sentences]
+"""
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.grammar_rule_engine import CompiledRuleSet
+
+MAX_STEPS = 3
+
+LEARNER_SENTENCES = [
+    "Ich habe gestern in die Schule gegangen.",
+    "Der Entwicklung sind sehr wichtig für uns.",
+    "Wir fahren mit der Bus nach Berlin.",
+    "Ich bin gestern in das Kino gegangen und habe ein Film gesehen.",
+    "Er hat keine Zeit weil er muss arbeiten.",
+    "Kannst du mir helfen mit meine Hausaufgaben?",
+    "Das sind mein Bruder und das ist meine Schwester.",
+    "Ich wohne seit drei Jahre in München.",
+    "Morgen ich gehe zum Arzt.",
+    "Sie spricht sehr gut deutsch aber sie schreibt nicht so gut.",
+    "Wegen dem Regen bleiben wir zu Hause.",
+    "Ich freue mich auf dem Wochenende.",
+]
+
+
+def build_rules(n: int):
+    rng = random.Random(42)
+    rules = [
+        {"_id": "r-weil", "regex": r"weil er muss (\w+)", "replacement": r"weil er \1 muss", "priority": 9},
+        {"_id": "r-seit", "regex": r"seit (\w+) Jahre\b", "replacement": r"seit \1 Jahren", "priority": 8},
+        {"_id": "r-morgen", "regex": r"^Morgen ich (\w+)", "replacement": r"Morgen \1 ich", "priority": 7},
+        {"_id": "l-bus", "pattern": "mit der Bus", "replacement": "mit dem Bus", "priority": 6},
+        {"_id": "l-film", "pattern": "ein film", "replacement": "einen Film", "ci": True, "priority": 5},
+        {"_id": "l-wegen", "pattern": "Wegen dem", "replacement": "Wegen des", "word_boundary": True, "priority": 4},
+        {"_id": "l-auf", "pattern": "auf dem Wochenende", "replacement": "auf das Wochenende", "priority": 4},
+        {"_id": "l-meine", "pattern": "mit meine", "replacement": "mit meinen", "ci": True, "priority": 3},
+        {"_id": "l-gegangen", "pattern": "habe gestern in die Schule gegangen",
+         "replacement": "bin gestern in die Schule gegangen", "priority": 3},
+    ]
+    for i in range(max(0, n - len(rules))):
+        kind = rng.random()
+        rule = {"_id": f"s{i}", "pattern": f"fehl{i % 20}x{i}", "replacement": f"korrekt{i % 20}"}
+        if kind < 0.2:
+            rule["ci"] = True
+        elif kind < 0.3:
+            rule["word_boundary"] = True
+        elif kind < 0.4:
+            rule = {"_id": f"s{i}", "regex": rf"\bfehl{i}\w*", "replacement": f"korrekt{i}"}
+        rules.append(rule)
+    # grammar_check sorts by priority descending (missing priority last)
+    return sorted(rules, key=lambda r: -r.get("priority", -1))
+
+
+def legacy_apply_one(all_rules, text, applied):
+    # Former in-request loop (word-boundary pattern uses a real \b here so outputs compare)
+    for rule in all_rules:
+        if str(rule.get("_id")) in applied:
+            continue
+        replacement = rule.get("replacement", "")
+        rx = rule.get("regex")
+        if isinstance(rx, str) and rx:
+            flags_str = (rule.get("flags") or "") if isinstance(rule.get("flags"), str) else ""
+            flags = 0
+            if "i" in flags_str: flags |= re.IGNORECASE
+            try:
+                pattern = re.compile(rx, flags)
+                if pattern.search(text):
+                    new_text = pattern.sub(replacement or rx, text, count=1)
+                    return new_text, new_text != text, rule
+            except re.error:
+                continue
+        pat = rule.get("pattern")
+        if isinstance(pat, str) and pat:
+            if bool(rule.get("ci")):
+                idx = text.lower().find(pat.lower())
+                if idx != -1:
+                    return text[:idx] + (replacement or pat) + text[idx+len(pat):], True, rule
+            elif bool(rule.get("word_boundary")):
+                wb_rx = re.compile(rf"\b{re.escape(pat)}\b")
+                if wb_rx.search(text):
+                    return wb_rx.sub(replacement or pat, text, count=1), True, rule
+            elif pat in text:
+                return text.replace(pat, replacement or pat, 1), True, rule
+    return text, False, None
+
+
+def legacy_check(all_rules, sentence):
+    current, applied = sentence, []
+    for _ in range(MAX_STEPS):
+        current, changed, rule = legacy_apply_one(all_rules, current, applied)
+        if not changed or not rule:
+            break
+        applied.append(str(rule.get("_id")))
+    return current
+
+
+def compiled_check(rule_set, sentence):
+    current, applied = sentence, set()
+    for _ in range(MAX_STEPS):
+        current, changed, meta = rule_set.apply_one(current, applied)
+        if not changed or not meta:
+            break
+        applied.add(meta["rank"])
+    return current
+
+
+def timed(label, fn, corpus):
+    start = time.perf_counter()
+    out = [fn(s) for s in corpus]
+    elapsed = time.perf_counter() - start
+    print(f"{label:<20} {elapsed * 1000:>10.1f} ms {len(corpus) / elapsed:>12.0f} sentences/s")
+    return out
+
+
+def main():
+    n_rules = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    n_sentences = int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+    rules = build_rules(n_rules)
+    corpus = [LEARNER_SENTENCES[i % len(LEARNER_SENTENCES)] for i in range(n_sentences)]
+    print(f"📝 {len(rules)} rules, {len(corpus)} learner sentences\n")
+
+    start = time.perf_counter()
+    rule_set = CompiledRuleSet(rules)
+    print(f"{'compile once':<20} {(time.perf_counter() - start) * 1000:>10.1f} ms")
+
+    legacy = timed("per-call loop", lambda s: legacy_check(rules, s), corpus)
+    compiled = timed("compiled engine", lambda s: compiled_check(rule_set, s), corpus)
+
+    mismatches = sum(1 for a, b in zip(legacy, compiled) if a != b)
+    print(f"\n{'✅' if not mismatches else '❌'} {mismatches} mismatching corrections")
+
+
+if __name__ == "__main__":
+    main()
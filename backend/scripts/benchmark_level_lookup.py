@@ -0,0 +1,42 @@
+"""
+Benchmark: level lookup loop vs threshold-table bisect vs vectorized searchsorted
+
+Usage: python scripts/benchmark_level_lookup.py
+"""
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.models.achievement import calculate_xp_for_level, calculate_level, calculate_levels
+
+def loop_level(xp: int) -> int:
+    # Previous implementation of get_level_from_xp's level search
+    level = 1
+    while calculate_xp_for_level(level + 1) <= xp:
+        level += 1
+    return level
+
+def timed(fn, *args) -> float:
+    start = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - start
+
+if __name__ == "__main__":
+    rng = random.Random(7)
+
+    print(f"{'max xp':>10} {'loop (µs/op)':>14} {'bisect (µs/op)':>16}")
+    for max_xp in [10**3, 10**4, 10**5, 10**6, 10**7]:
+        values = [rng.randint(0, max_xp) for _ in range(2000)]
+        assert [loop_level(v) for v in values] == [calculate_level(v) for v in values]
+        t_loop = timed(lambda: [loop_level(v) for v in values]) / len(values)
+        t_bisect = timed(lambda: [calculate_level(v) for v in values]) / len(values)
+        print(f"{max_xp:>10} {t_loop * 1e6:>14.2f} {t_bisect * 1e6:>16.3f}")
+
+    n = 1_000_000
+    values = [rng.randint(0, 10**7) for _ in range(n)]
+    t_scalar = timed(lambda: [calculate_level(v) for v in values])
+    t_vector = timed(calculate_levels, values)
+    print(f"\n{n:,} users up to 10^7 XP: bisect {t_scalar:.2f}s, vectorized {t_vector:.3f}s")
@@ -0,0 +1,116 @@
+"""
+Benchmark: event-loop lag while AI fallbacks are in flight
+
+Starts a local HTTP server that answers like /v1/chat/completions after a
+fixed delay, then fires concurrent "fallback" calls three ways while
+LoopLagProbe samples the loop:
+  - the former sync client called inline (blocks the loop per request)
+  - the same sync call pushed to a thread pool
+  - the AsyncOpenAI adapter (app.openai_client), if openai is installed
+The max lag is how long any other request on the worker would have stalled.
+
+Usage: python scripts/benchmark_loop_lag.py [requests] [delay_ms]
+"""
+import asyncio
+import importlib
+import json
+import os
+import sys
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+DELAY = 0.2
+
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        time.sleep(DELAY)
+        body = json.dumps({
+            "id": "bench", "object": "chat.completion", "created": 0, "model": "gpt-4o-mini",
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": "{\"ok\": true}"}}],
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def sync_chat(url: str) -> str:
+    # Stand-in for the former sync OpenAI(...).chat.completions.create call
+    request = urllib.request.Request(
+        f"{url}/chat/completions",
+        data=json.dumps({"model": "gpt-4o-mini", "messages": []}).encode(),
+        headers={"Content-Type": "application/json"}
+    )
+    with urllib.request.urlopen(request, timeout=30) as resp:
+        return json.loads(resp.read())["choices"][0]["message"]["content"]
+
+
+async def measure(label, probe, requests, call):
+    probe.reset()
+    start = time.perf_counter()
+    await asyncio.gather(*(call() for _ in range(requests)))
+    await asyncio.sleep(probe.interval * 2)  # Let the probe record the tail
+    elapsed = time.perf_counter() - start
+    stats = probe.stats()
+    print(f"{label:<24} {elapsed:>7.2f}s total  lag p99 {stats['p99_ms']:>8.1f} ms  max {stats['max_ms']:>8.1f} ms")
+
+
+async def main():
+    global DELAY
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    DELAY = (int(sys.argv[2]) if len(sys.argv) > 2 else 200) / 1000
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeOpenAIHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/v1"
+    os.environ.setdefault("OPENAI_API_KEY", "bench")
+    os.environ["OPENAI_BASE_URL"] = url
+
+    from app.services.loop_lag import LoopLagProbe
+    probe = LoopLagProbe(interval=0.005, warn_ms=float("inf"))
+    probe.start()
+    print(f"🐢 {requests} concurrent fallback calls, provider latency {DELAY * 1000:.0f} ms\n")
+
+    async def inline():
+        return sync_chat(url)
+
+    executor = ThreadPoolExecutor(max_workers=requests)
+
+    async def threaded():
+        return await asyncio.get_running_loop().run_in_executor(executor, sync_chat, url)
+
+    await measure("sync client inline", probe, requests, inline)
+    await measure("sync client in executor", probe, requests, threaded)
+
+    try:
+        importlib.import_module("openai")
+        from app.openai_client import openai_client
+    except ImportError:
+        print("⚠️  openai not installed, skipping the AsyncOpenAI adapter")
+    else:
+        async def adapter():
+            return await openai_client.chat([{"role": "user", "content": "Hallo"}])
+
+        await measure("AsyncOpenAI adapter", probe, requests, adapter)
+        await openai_client.close()
+
+    await probe.stop()
+    executor.shutdown()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
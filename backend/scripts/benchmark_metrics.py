@@ -0,0 +1,89 @@
+"""
+Benchmark: per-log Redis GET/SET counters vs the in-process metrics registry
+
+Replays the same AI usage logs through the former log_ai_usage round trips
+(concurrently, so lost updates on the GET/SET totals show up) and through
+MetricsRegistry.inc/observe plus one pipelined flush. Needs Redis at
+REDIS_URL for the comparison; without it only the in-memory recording cost
+is measured.
+
+Usage: python scripts/benchmark_metrics.py [logs]
+"""
+import asyncio
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.redis_client import redis_client
+from app.services.metrics import MetricsRegistry
+
+FEATURES = ("grammar", "quiz", "voice", "scenario")
+CONCURRENCY = 100
+
+
+async def legacy_log(client, prefix: str, feature: str, response_time: float):
+    # Former handler: INCRs plus non-atomic GET/SET for the running totals
+    await client.incr(f"{prefix}:total_requests")
+    await client.incr(f"{prefix}:{feature}:requests")
+    current_total = await client.get(f"{prefix}:total_time") or 0
+    await client.set(f"{prefix}:total_time", float(current_total) + response_time)
+    await client.incr(f"{prefix}:{feature}:success")
+    feature_time = await client.get(f"{prefix}:{feature}:time") or 0
+    await client.set(f"{prefix}:{feature}:time", float(feature_time) + response_time)
+
+
+async def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    rng = random.Random(7)
+    logs = [(rng.choice(FEATURES), round(rng.uniform(0.05, 3.0), 3)) for _ in range(n)]
+    expected_time = sum(t for _, t in logs)
+    print(f"📈 {n} AI usage logs, {len(FEATURES)} features\n")
+
+    run_id = int(time.time())
+    # Own key prefix so the benchmark never touches the live metrics hashes
+    registry = MetricsRegistry(key_prefix=f"bench:metrics:{run_id}")
+    start = time.perf_counter()
+    for feature, response_time in logs:
+        registry.inc("ai_requests_total", feature=feature, status="success")
+        registry.observe("ai_response_time_seconds", response_time, feature=feature)
+    record_us = (time.perf_counter() - start) / n * 1e6
+    print(f"{'registry record':<22} {record_us:>8.2f} µs/log")
+
+    await redis_client.connect()
+    client = redis_client.client
+    if client is None:
+        print("⚠️  Redis unreachable, skipping the round-trip comparison")
+        return
+
+    prefix = f"bench:ai:{run_id}"
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+
+    async def one(feature, response_time):
+        async with semaphore:
+            await legacy_log(client, prefix, feature, response_time)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(f, t) for f, t in logs))
+    elapsed = time.perf_counter() - start
+    recorded = float(await client.get(f"{prefix}:total_time") or 0)
+    print(f"{'GET/SET per log':<22} {elapsed / n * 1e6:>8.2f} µs/log  total_time {recorded:.1f} / {expected_time:.1f}")
+
+    registry.redis = redis_client
+    start = time.perf_counter()
+    commands = await registry.flush()
+    flush_ms = (time.perf_counter() - start) * 1000
+    snapshot = await registry.collect()
+    total = sum(e["sum"] for e in snapshot["histograms"]["ai_response_time_seconds"].values())
+    print(f"{'pipelined flush':<22} {flush_ms:>8.2f} ms for {commands} commands  total_time {total:.1f} / {expected_time:.1f}")
+
+    keys = [k async for k in client.scan_iter(f"bench:*:{run_id}:*")]
+    if keys:
+        await client.delete(*keys)
+    await redis_client.disconnect()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,97 @@
+"""
+Benchmark: rate limiter throughput and accuracy under concurrent load
+
+Drives RateLimitMiddleware directly with synthetic ASGI requests (API-key
+callers, so no MongoDB is needed) against a no-op app. With Redis at
+REDIS_URL it compares the former GET/SETEX/INCR + GET round trips with the
+single EVALSHA; without Redis it measures the local fail-open buckets.
+Each caller sends more requests than its limit, so the allowed count should
+equal the limit exactly.
+
+Usage: python scripts/benchmark_rate_limit.py [callers] [requests_per_caller]
+"""
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.redis_client import redis_client
+from app.middleware.rate_limit import RateLimitMiddleware, API_KEY_LIMIT
+
+CONCURRENCY = 200
+
+
+async def noop_app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"ok"})
+
+
+async def legacy_check(client, key: str, limit: int) -> bool:
+    # Former middleware: GET (+ SETEX or INCR) to check, then GET again for the remaining count
+    current = await client.get(key)
+    if current is None:
+        await client.setex(key, 3600, 1)
+    elif int(current) >= limit:
+        return False
+    else:
+        await client.incr(key)
+    await client.get(key)
+    return True
+
+
+async def run(label, requests, handler):
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+    allowed = 0
+
+    async def one(caller):
+        nonlocal allowed
+        async with semaphore:
+            if await handler(caller):
+                allowed += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(caller) for caller in requests))
+    elapsed = time.perf_counter() - start
+    print(f"{label:<22} {len(requests) / elapsed:>10.0f} req/s  allowed {allowed}")
+    return allowed
+
+
+async def main():
+    callers = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    per_caller = int(sys.argv[2]) if len(sys.argv) > 2 else API_KEY_LIMIT + 200
+    requests = [c for _ in range(per_caller) for c in range(callers)]
+    run_id = int(time.time())
+    print(f"🚦 {callers} callers x {per_caller} requests (limit {API_KEY_LIMIT}/caller), concurrency {CONCURRENCY}\n")
+
+    await redis_client.connect()
+    middleware = RateLimitMiddleware(noop_app, redis_client)
+
+    async def through_middleware(caller, prefix):
+        status = {}
+        scope = {"type": "http", "path": "/api/v1/vocab/search", "client": ("127.0.0.1", 0),
+                 "headers": [(b"x-api-key", f"{prefix}-{run_id}-{caller}".encode())]}
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+
+        await middleware(scope, None, send)
+        return status["code"] == 200
+
+    if redis_client.client is not None:
+        client = redis_client.client
+        await run("GET/INCR round trips", requests,
+                  lambda c: legacy_check(client, f"rate_limit:bench-legacy-{run_id}-{c}", API_KEY_LIMIT))
+        await run("EVALSHA (GCRA)", requests, lambda c: through_middleware(c, "bench-gcra"))
+    else:
+        print("⚠️  Redis unreachable, measuring the local fail-open buckets only")
+    middleware.redis = None
+    await run("local buckets", requests, lambda c: through_middleware(c, "bench-local"))
+    print(f"\n✅ expected allowed per run: {callers * min(per_caller, API_KEY_LIMIT)}")
+    await redis_client.disconnect()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,63 @@
+"""
+Benchmark: per-card SM-2 loop vs vectorized batch SM-2
+
+Usage: python scripts/benchmark_sm2_batch.py [batch_size ...]
+"""
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.spaced_repetition import SM2Algorithm
+
+def make_batch(n: int):
+    rng = random.Random(42)
+    return {
+        "quality": [rng.randint(0, 5) for _ in range(n)],
+        "repetitions": [rng.randint(0, 8) for _ in range(n)],
+        "easiness_factor": [round(rng.uniform(1.3, 2.5), 2) for _ in range(n)],
+        "interval": [rng.randint(0, 120) for _ in range(n)],
+        "reviewed_at": [time.time() - rng.randint(0, 86400) for _ in range(n)],
+    }
+
+def run_loop(batch):
+    return [
+        SM2Algorithm.calculate_next_review(q, r, ef, i)
+        for q, r, ef, i in zip(
+            batch["quality"], batch["repetitions"], batch["easiness_factor"], batch["interval"]
+        )
+    ]
+
+def run_batch(batch):
+    return SM2Algorithm.calculate_next_review_batch(**batch)
+
+def best_of(fn, batch, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(batch)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def check_equal(batch):
+    loop = run_loop(batch)
+    vec = run_batch(batch)
+    for i, r in enumerate(loop):
+        assert r["repetitions"] == vec["repetitions"][i]
+        assert r["interval"] == vec["interval"][i]
+        assert abs(r["easiness_factor"] - vec["easiness_factor"][i]) < 1e-9
+
+if __name__ == "__main__":
+    sizes = [int(a) for a in sys.argv[1:]] or [10, 50, 500, 5000]
+
+    check_equal(make_batch(2000))
+    print("✅ Batch results match the per-card loop\n")
+
+    print(f"{'cards':>8} {'loop (ms)':>12} {'batch (ms)':>12} {'speedup':>9}")
+    for n in sizes:
+        batch = make_batch(n)
+        t_loop = best_of(run_loop, batch)
+        t_batch = best_of(run_batch, batch)
+        print(f"{n:>8} {t_loop * 1000:>12.3f} {t_batch * 1000:>12.3f} {t_loop / t_batch:>8.1f}x")
@@ -0,0 +1,110 @@
+"""
+Benchmark: regex scan vs the in-process vocab search index
+
+Loads the seed word banks (padded with synthetic compounds up to the
+requested size) and runs as-you-type query prefixes, umlaut spellings and
+typos against both the former unanchored regex $or (run here as an
+in-memory scan, i.e. without MongoDB's per-query overhead) and the index.
+Also times an incremental refresh after a handful of edits.
+
+Usage: python scripts/benchmark_vocab_search.py [words]
+"""
+import json
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.vocab_search import VocabSearchIndex
+
+SEED_DIR = Path(__file__).parent.parent / "seed"
+SEED_FILES = ["seed_words.json", "word_bank_large.json", "german_words_comprehensive.json"]
+SUFFIXES = ["haus", "zeit", "platz", "stück", "straße", "tür", "bahn", "geld", "karte", "buch"]
+
+QUERIES = [
+    "t", "ti", "tis", "tisch", "der tisch",
+    "stra", "strasse", "straße", "strase",
+    "tuer", "tür", "bruecke", "brücke",
+    "kafee", "kaffee", "herausforderung", "herrausforderung",
+    "table", "the tab", "coffee", "cofee",
+]
+
+
+def load_words(n: int):
+    seen, words = set(), []
+    for name in SEED_FILES:
+        for item in json.loads((SEED_DIR / name).read_text(encoding="utf-8")):
+            if item.get("word") and item["word"] not in seen:
+                seen.add(item["word"])
+                examples = item.get("examples") or [item.get("example", "")]
+                words.append({"level": item.get("level", "A1"), "word": item["word"],
+                              "translation": item.get("translation", ""), "examples": examples})
+    rng = random.Random(7)
+    base = list(words)
+    i = 0
+    while len(words) < n:
+        src = base[i % len(base)]
+        noun = src["word"].split()[-1]
+        compound = f"{noun}{rng.choice(SUFFIXES)}{i}"
+        words.append({"level": src["level"], "word": f"das {compound}",
+                      "translation": f"{src['translation']} {i}", "examples": [f"Das {compound} ist neu."]})
+        i += 1
+    for idx, w in enumerate(words):
+        w["_id"] = f"w{idx}"
+    return words[:n]
+
+
+def regex_search(words, q, limit=25):
+    rx = re.compile(re.escape(q.strip()), re.IGNORECASE)
+    out = []
+    for w in words:
+        if rx.search(w["word"]) or rx.search(w["translation"]) or any(rx.search(e) for e in w["examples"]):
+            out.append(w)
+            if len(out) >= limit:
+                break
+    return out
+
+
+def timed(label, fn, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for q in QUERIES:
+            fn(q)
+    per_query = (time.perf_counter() - start) / (rounds * len(QUERIES))
+    print(f"{label:<20} {per_query * 1e6:>10.1f} µs/query")
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    words = load_words(n)
+    print(f"📚 {len(words)} words, {len(QUERIES)} queries\n")
+
+    index = VocabSearchIndex()
+    start = time.perf_counter()
+    index.sync(words)
+    print(f"{'build index':<20} {(time.perf_counter() - start) * 1000:>10.1f} ms")
+
+    rounds = 20
+    timed("regex scan", lambda q: regex_search(words, q), rounds)
+    timed("search index", lambda q: index.search(q), rounds)
+
+    edited = [dict(w) for w in words]
+    for w in edited[:10]:
+        w["translation"] += " (edited)"
+    del edited[-5:]
+    start = time.perf_counter()
+    stats = index.sync(edited)
+    print(f"{'incremental sync':<20} {(time.perf_counter() - start) * 1000:>10.1f} ms {stats}")
+
+    print("\n🔎 Sample results")
+    for q in ("strase", "tuer", "herrausforderung", "the tab"):
+        hits = [h["word"] for h in index.search(q, limit=3)]
+        regex_hits = len(regex_search(edited, q))
+        print(f"  {q!r:<20} index: {hits}  regex hits: {regex_hits}")
+
+
+if __name__ == "__main__":
+    main()
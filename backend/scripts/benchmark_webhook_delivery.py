@@ -0,0 +1,135 @@
+"""
+Benchmark: per-attempt httpx clients vs the pooled webhook worker client
+
+Starts local stub receivers (plain asyncio HTTP/1.1 keep-alive servers) and
+posts the same deliveries both ways. The worker side queues them in scratch
+collections and drains them with WebhookDeliveryWorker.run_once, so leasing,
+lease renewal and the bulk result flush are included; it needs MongoDB at
+MONGODB_URI and is skipped without it.
+
+Usage: python scripts/benchmark_webhook_delivery.py [deliveries] [endpoints] [per_endpoint_limit]
+"""
+import asyncio
+import os
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.models.organization import WebhookDelivery
+from app.services.webhook_worker import WebhookDeliveryWorker, build_http_client, sign_payload
+
+RESPONSE = b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\nContent-Type: text/plain\r\n\r\nok"
+
+async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    try:
+        while True:
+            head = await reader.readuntil(b"\r\n\r\n")
+            length = 0
+            for line in head.split(b"\r\n"):
+                if line.lower().startswith(b"content-length:"):
+                    length = int(line.split(b":", 1)[1])
+            if length:
+                await reader.readexactly(length)
+            writer.write(RESPONSE)
+            await writer.drain()
+    except (asyncio.IncompleteReadError, ConnectionResetError):
+        pass
+    finally:
+        writer.close()
+
+async def start_receivers(count: int):
+    servers = [await asyncio.start_server(handle, "127.0.0.1", 0) for _ in range(count)]
+    urls = [f"http://127.0.0.1:{s.sockets[0].getsockname()[1]}/hook" for s in servers]
+    return servers, urls
+
+def make_deliveries(n: int, urls):
+    webhooks = [{"_id": f"wh{i}", "url": url, "secret": "s3cret", "active": True} for i, url in enumerate(urls)]
+    deliveries = [
+        {
+            "_id": f"d{i}",
+            "webhook_id": webhooks[i % len(webhooks)]["_id"],
+            "event_type": "scenario.completed",
+            "payload": {"event": "scenario.completed", "user_id": f"user{i}", "score": i % 100}
+        }
+        for i in range(n)
+    ]
+    return deliveries, {w["_id"]: w for w in webhooks}
+
+async def per_attempt_clients(deliveries, webhooks):
+    # Previous behaviour: a fresh AsyncClient (and TCP connection) per attempt
+    async def post(delivery):
+        webhook = webhooks[delivery["webhook_id"]]
+        async with httpx.AsyncClient(timeout=30.0) as client:
+            response = await client.post(webhook["url"], json=delivery["payload"], headers={
+                "X-Webhook-Signature": sign_payload(str(delivery["payload"]).encode(), webhook["secret"])
+            })
+        return response.status_code < 400
+    return await asyncio.gather(*(post(d) for d in deliveries))
+
+async def pooled_worker(db, deliveries, webhooks, per_endpoint_limit: int):
+    # Full worker path against scratch collections: lease, renew, POST, flush
+    collections = {"webhooks": db["bench_webhooks"], "webhook_deliveries": db["bench_webhook_deliveries"]}
+    await collections["webhooks"].insert_many([dict(w) for w in webhooks.values()])
+    now = datetime.utcnow()
+    await collections["webhook_deliveries"].insert_many([
+        WebhookDelivery(
+            webhook_id=d["webhook_id"],
+            organization_id="bench",
+            event_type=d["event_type"],
+            payload=d["payload"],
+            next_retry_at=now
+        ).dict(by_alias=True, exclude={"id"})
+        for d in deliveries
+    ])
+    worker = WebhookDeliveryWorker(per_endpoint_limit=per_endpoint_limit)
+    worker.db = collections
+    worker.client = build_http_client()
+    try:
+        while await worker.run_once():
+            pass
+        delivered = await collections["webhook_deliveries"].count_documents({"status": "delivered"})
+    finally:
+        await worker.client.aclose()
+        for collection in collections.values():
+            await collection.drop()
+    return [True] * delivered + [False] * (len(deliveries) - delivered)
+
+async def timed(label: str, coro, n: int):
+    start = time.perf_counter()
+    results = await coro
+    elapsed = time.perf_counter() - start
+    ok = sum(results)
+    print(f"{label:<24} {elapsed * 1000:>10.1f} ms {n / elapsed:>10.0f} deliveries/s   ({ok}/{n} ok)")
+
+async def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    endpoints = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    limit = int(sys.argv[3]) if len(sys.argv) > 3 else 4
+
+    servers, urls = await start_receivers(endpoints)
+    deliveries, webhooks = make_deliveries(n, urls)
+    print(f"📮 {n} deliveries to {endpoints} stub endpoints (per-endpoint limit {limit})\n")
+    try:
+        await timed("per-attempt clients", per_attempt_clients(deliveries, webhooks), n)
+        if not os.getenv("MONGODB_URI"):
+            print("⚠️  MONGODB_URI not set, skipping the worker run")
+            return
+        from app.db import get_db
+        db = await get_db()
+        try:
+            await asyncio.wait_for(db.command("ping"), timeout=3)
+        except Exception as e:
+            print(f"⚠️  MongoDB unreachable ({e}), skipping the worker run")
+            return
+        await timed("webhook worker run_once", pooled_worker(db, deliveries, webhooks, limit), n)
+    finally:
+        for server in servers:
+            server.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
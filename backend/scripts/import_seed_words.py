@@ -83,6 +83,9 @@ def main():
     for chunk in batched(to_write, 500):
         res = coll.bulk_write(chunk, ordered=False)
         total += res.upserted_count + res.modified_count
+    if total:
+        # Running API processes re-sync their vocab search index on the next stamp check
+        db["cache_versions"].update_one({"_id": "seed_words"}, {"$inc": {"version": 1}}, upsert=True)
 
     print(f"Imported/updated {total} words from {csv_path}")
 
@@ -0,0 +1,64 @@
+"""
+Migrate review_cards dates from ISO strings to native BSON dates
+
+The /reviews/due query filters and sorts on next_review_date inside MongoDB,
+which only matches BSON dates. Run once after deploying; safe to re-run.
+"""
+import asyncio
+from motor.motor_asyncio import AsyncIOMotorClient
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+MONGODB_URI = os.getenv("MONGODB_URI", "mongodb://localhost:27017")
+DB_NAME = os.getenv("MONGODB_DB_NAME", "german_ai")
+
+DATE_FIELDS = ["next_review_date", "last_reviewed", "created_at"]
+
+async def migrate():
+    client = AsyncIOMotorClient(MONGODB_URI)
+    db = client[DB_NAME]
+    cards = db.review_cards
+
+    print("=" * 60)
+    print("MIGRATING REVIEW CARD DATES")
+    print("=" * 60)
+
+    # Legacy dummy-data cards used next_review / last_review field names
+    result = await cards.update_many(
+        {"next_review": {"$exists": True}, "next_review_date": {"$exists": False}},
+        {"$rename": {"next_review": "next_review_date", "last_review": "last_reviewed"}}
+    )
+    print(f"🔁 Renamed legacy fields on {result.modified_count} cards")
+
+    # Convert string dates server-side; no documents are pulled into Python
+    for field in DATE_FIELDS:
+        result = await cards.update_many(
+            {field: {"$type": "string"}},
+            [{"$set": {field: {"$dateFromString": {"dateString": f"${field}", "onError": None}}}}]
+        )
+        print(f"📅 {field}: converted {result.modified_count} cards")
+
+    # Cards without a due date are due now
+    result = await cards.update_many(
+        {"next_review_date": None},
+        [{"$set": {"next_review_date": "$$NOW"}}]
+    )
+    print(f"⏰ Backfilled next_review_date on {result.modified_count} cards")
+
+    await cards.create_index([
+        ("user_id", 1),
+        ("next_review_date", 1),
+        ("repetitions", 1)
+    ])
+    print("✅ Due-queue index ensured")
+
+    remaining = await cards.count_documents({"next_review_date": {"$type": "string"}})
+    print(f"\n{'✅' if remaining == 0 else '⚠️ '} {remaining} string-dated cards remaining")
+    print("=" * 60)
+
+    client.close()
+
+if __name__ == "__main__":
+    asyncio.run(migrate())
@@ -0,0 +1,93 @@
+"""
+Move saved-vocabulary SRS state from user_vocab.srs into review_cards
+
+Vocab reviews and review cards now share one due-queue (card_type
+"vocabulary"). Run after migrate_review_card_dates.py; safe to re-run.
+"""
+import asyncio
+import sys
+from pathlib import Path
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import UpdateOne
+import os
+from dotenv import load_dotenv
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.spaced_repetition import CardState, create_vocabulary_card, to_epoch
+
+load_dotenv()
+
+MONGODB_URI = os.getenv("MONGODB_URI", "mongodb://localhost:27017")
+DB_NAME = os.getenv("MONGODB_DB_NAME", "german_ai")
+BATCH_SIZE = 500
+
+# Scheduling fields taken from whichever side has more repetitions
+STATE_FIELDS = ("easiness_factor", "interval", "last_reviewed")
+
+def card_op(doc: dict) -> UpdateOne:
+    srs = doc.get("srs") or {}
+    card = create_vocabulary_card(doc, doc["user_id"])
+    card.state = CardState(
+        repetitions=int(srs.get("repetitions") or 0),
+        easiness_factor=float(srs.get("ease") or 2.5),
+        interval=int(srs.get("interval") or 0),
+        due_at=to_epoch(srs.get("due"))
+    )
+    legacy = card.to_dict()
+    merged = {
+        field: {"$ifNull": [f"${field}", {"$literal": value}]}
+        for field, value in legacy.items()
+    }
+    if srs:
+        # A card the user already reviews through /reviews is merged, not replaced:
+        # keep the higher repetitions and the later next_review_date.
+        # Rows without srs (or already migrated) only fill in a missing card.
+        legacy_ahead = {"$gt": [legacy["repetitions"], {"$ifNull": ["$repetitions", -1]}]}
+        merged.update({
+            field: {"$cond": [legacy_ahead, {"$literal": legacy[field]}, f"${field}"]}
+            for field in STATE_FIELDS
+        })
+        merged["repetitions"] = {"$max": ["$repetitions", legacy["repetitions"]]}
+        merged["next_review_date"] = {"$max": ["$next_review_date", {"$literal": legacy["next_review_date"]}]}
+    return UpdateOne(
+        {"user_id": card.user_id, "card_id": card.card_id},
+        [{"$set": merged}],
+        upsert=True
+    )
+
+async def migrate():
+    client = AsyncIOMotorClient(MONGODB_URI)
+    db = client[DB_NAME]
+
+    print("=" * 60)
+    print("MIGRATING VOCAB SRS → REVIEW CARDS")
+    print("=" * 60)
+
+    cursor = db.user_vocab.find(
+        {"word": {"$ne": None}, "user_id": {"$ne": None}},
+        {"user_id": 1, "word": 1, "translation": 1, "example": 1, "level": 1, "srs": 1}
+    )
+    ops, created, merged = [], 0, 0
+    async for doc in cursor:
+        ops.append(card_op(doc))
+        if len(ops) >= BATCH_SIZE:
+            result = await db.review_cards.bulk_write(ops, ordered=False)
+            created += result.upserted_count
+            merged += result.modified_count
+            ops = []
+    if ops:
+        result = await db.review_cards.bulk_write(ops, ordered=False)
+        created += result.upserted_count
+        merged += result.modified_count
+    print(f"📚 Created {created} vocabulary review cards, merged legacy state into {merged}")
+
+    # Every row's state now lives on its card (inserted or merged)
+    result = await db.user_vocab.update_many({"srs": {"$exists": True}}, {"$unset": {"srs": ""}})
+    print(f"🧹 Removed legacy srs from {result.modified_count} user_vocab rows")
+    print("=" * 60)
+
+    client.close()
+
+if __name__ == "__main__":
+    asyncio.run(migrate())
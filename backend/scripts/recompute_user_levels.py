@@ -0,0 +1,34 @@
+"""
+Recompute level and xp_to_next_level for every user_stats document
+
+Run as a background job after changing the level curve.
+"""
+import asyncio
+import sys
+import time
+from pathlib import Path
+from motor.motor_asyncio import AsyncIOMotorClient
+import os
+from dotenv import load_dotenv
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.achievement_service import AchievementService
+
+load_dotenv()
+
+MONGODB_URI = os.getenv("MONGODB_URI", "mongodb://localhost:27017")
+DB_NAME = os.getenv("MONGODB_DB_NAME", "german_ai")
+
+async def main():
+    client = AsyncIOMotorClient(MONGODB_URI)
+    db = client[DB_NAME]
+
+    start = time.perf_counter()
+    updated = await AchievementService(db).recompute_levels()
+    print(f"✅ Updated {updated} user_stats documents in {time.perf_counter() - start:.2f}s")
+
+    client.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
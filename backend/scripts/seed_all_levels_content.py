@@ -102,6 +102,8 @@ async def seed_vocabulary():
     if words_to_insert:
         await db.seed_words.insert_many(words_to_insert)
         print(f"✅ Inserted {len(words_to_insert)} vocabulary words across all levels")
+    # Running API processes re-sync their vocab search index on the next stamp check
+    await db.cache_versions.update_one({"_id": "seed_words"}, {"$inc": {"version": 1}}, upsert=True)
     
     client.close()
 